@@ -0,0 +1,239 @@
+"""
+Response cache in front of Gemini.
+
+Answers are keyed on the normalised query, the language and a hash of the retrieved
+context, so a cached answer is only reused when the model would have seen the same
+excerpts. Optionally, a query whose embedding is close enough to a cached one
+(cosine >= threshold, same language and context) reuses that answer to catch paraphrases.
+
+Backends (ANSWER_CACHE_BACKEND):
+  - memory: in-process LRU with TTL (default)
+  - file:   SQLite file shared by all workers on the machine
+  - redis:  any Redis-compatible server (REDIS_URL); needs `pip install redis`
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
+
+from knowledge import normalize_text
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "memory")
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_cache.db"))
+# 0 disables paraphrase matching; ~0.92 works well for MiniLM sentence embeddings
+ANSWER_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD", "0"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+def context_hash(context: str) -> str:
+    """Short stable hash of the retrieved context"""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+
+
+# --- Storage Backends ---
+class MemoryBackend:
+    """In-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FileBackend:
+    """SQLite-backed cache shared across worker processes on one machine"""
+
+    def __init__(self, path: str = ANSWER_CACHE_PATH, max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed_at)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE answers SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+            )
+            # Evict least recently used rows beyond the size cap
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+class RedisBackend:
+    """Redis-compatible backend; any client with get/set(ex=)/scan_iter works, e.g. a local stand-in in tests"""
+
+    def __init__(self, client=None, prefix: str = "dbt:answer:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(REDIS_URL)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        # Size cap is enforced server-side via maxmemory + an LRU eviction policy
+        self.client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=ttl)
+
+    def __len__(self) -> int:
+        # Only this cache's keys: the database may also hold sessions or other apps' data.
+        # SCAN walks the keyspace in batches without blocking the server.
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*", count=1000))
+
+
+# --- Answer Cache ---
+class AnswerCache:
+    """Exact + optional semantic answer cache with hit/miss counters"""
+
+    def __init__(
+        self,
+        backend=None,
+        ttl: int = ANSWER_CACHE_TTL_SECONDS,
+        semantic_threshold: float = ANSWER_CACHE_SEMANTIC_THRESHOLD,
+        max_semantic_entries: int = 2048,
+    ):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self._recent: deque = deque(maxlen=max_semantic_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, language: str, ctx_hash: str) -> str:
+        raw = f"{normalize_text(query)}|{language}|{ctx_hash}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, language: str, ctx_hash: str, embedding: Optional["np.ndarray"] = None) -> Optional[str]:
+        """Return a cached answer for this query, or None on a miss"""
+        value = self.backend.get(self.make_key(query, language, ctx_hash))
+        if value is not None:
+            self.hits += 1
+            return value["answer"]
+
+        if embedding is not None and self.semantic_threshold > 0:
+            key = self._nearest(embedding, language, ctx_hash)
+            value = self.backend.get(key) if key else None
+            if value is not None:
+                self.semantic_hits += 1
+                return value["answer"]
+
+        self.misses += 1
+        return None
+
+    def set(self, query: str, language: str, ctx_hash: str, answer: str, embedding: Optional["np.ndarray"] = None) -> None:
+        key = self.make_key(query, language, ctx_hash)
+        self.backend.set(key, {"answer": answer}, self.ttl)
+        if embedding is not None and self.semantic_threshold > 0:
+            # Only reached with an embedding, i.e. once the retrieval stack has loaded numpy
+            import numpy as np
+            vector = np.asarray(embedding, dtype="float32").ravel()
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+            with self._lock:
+                self._recent.append((vector, language, ctx_hash, key))
+
+    def _nearest(self, embedding: "np.ndarray", language: str, ctx_hash: str) -> Optional[str]:
+        """Key of the most similar recent query with the same language and context"""
+        import numpy as np
+        with self._lock:
+            candidates: List[tuple] = [r for r in self._recent if r[1] == language and r[2] == ctx_hash]
+        if not candidates:
+            return None
+        vector = np.asarray(embedding, dtype="float32").ravel()
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        scores = np.stack([c[0] for c in candidates]) @ vector
+        best = int(np.argmax(scores))
+        return candidates[best][3] if scores[best] >= self.semantic_threshold else None
+
+    @property
+    def blocking(self) -> bool:
+        """Whether get/set do I/O (SQLite, Redis) and belong off the event loop"""
+        return not isinstance(self.backend, MemoryBackend)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters only: len(backend) is a COUNT(*) or a keyspace SCAN, too slow for every probe"""
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_answer_cache() -> AnswerCache:
+    """Build the cache configured by ANSWER_CACHE_BACKEND"""
+    if ANSWER_CACHE_BACKEND == "file":
+        backend = FileBackend()
+    elif ANSWER_CACHE_BACKEND == "redis":
+        backend = RedisBackend()
+    else:
+        backend = MemoryBackend()
+    logger.info(f"Answer cache using {type(backend).__name__}")
+    return AnswerCache(backend)
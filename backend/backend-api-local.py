@@ -1,10 +1,31 @@
 import os
-import google.generativeai as genai
+import time
+import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from typing import Optional, AsyncIterator, Tuple, List, Dict, Any, TYPE_CHECKING
+import json
 import logging
+from collections import Counter
+from contextlib import asynccontextmanager, nullcontext
+
+from answer_cache import create_answer_cache, context_hash
+from knowledge import find_faq_answer, find_keyword_answer, normalize_text
+from status_store import create_status_store
+from prompt_builder import PromptBuilder, usage_counts, log_usage
+from singleflight import SingleFlight
+from metrics import MetricsRegistry, MetricsMiddleware
+from gemini_rest import GeminiRestModel, GEMINI_API_BASE
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, HALF_OPEN
+from fallback import extractive_answer
+
+if TYPE_CHECKING:
+    # Annotations only: numpy comes with the retrieval stack, imported during warm-up
+    import numpy as np
 
 # --- Initial Setup & Configuration ---
 load_dotenv()
@@ -24,28 +45,116 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure the Gemini API
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
-    
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-pro')
-    logger.info("Gemini API configured successfully")
-except Exception as e:
-    logger.error(f"Error configuring Gemini API: {e}")
-    model = None
+# Per-stage latency histograms and counters, scraped from /metrics (METRICS_ENABLED)
+metrics = MetricsRegistry("dbt_dost_api")
+if metrics.enabled:
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
+def configure_gemini():
+    """Import and configure the Gemini client; returns the model or None"""
+    try:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        
+        if GEMINI_API_BASE:
+            # REST endpoint override, e.g. fakes/fake_gemini_api.py for offline load tests
+            logger.info(f"Using Gemini REST API at {GEMINI_API_BASE}")
+            return GeminiRestModel(api_key, 'gemini-pro', GEMINI_API_BASE, timeout=GEMINI_TIMEOUT_SECONDS)
+        
+        # Imported here: the SDK (grpc/protobuf) takes about a second to import
+        import google.generativeai as genai
+        
+        genai.configure(api_key=api_key)
+        gemini_model = genai.GenerativeModel('gemini-pro')
+        logger.info("Gemini API configured successfully")
+        return gemini_model
+    except Exception as e:
+        logger.error(f"Error configuring Gemini API: {e}")
+        return None
+
+GENERATION_CONFIG = {
+    "candidate_count": 1,
+    "max_output_tokens": 800,
+    "temperature": 0.2,  # Slightly higher for more natural responses
+}
+
+# Bound in-flight Gemini calls per worker and give each one a deadline
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+gemini_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+# Calls holding a slot, counted by gemini_slot() rather than read from semaphore internals
+gemini_in_flight = 0
+# Latency SLO for LLM-tier answers: past the deadline, or while the breaker is open
+# because Gemini is failing or slow, an extractive answer is served instead
+ANSWER_DEADLINE_SECONDS = float(os.getenv("ANSWER_DEADLINE_SECONDS", "8"))
+gemini_breaker = CircuitBreaker("gemini")
+
+# Heavy components are loaded by the background warm-up (see /ready), not at import:
+# the Gemini client, the retrieval index + embedding model (each query only sends
+# top-k chunks; concurrent queries are encoded in micro-batches) and the status store
+model = None
+retriever = None
+query_encoder = None
+status_store = None
+answer_cache = create_answer_cache()
+# Identical questions asked while the first is still being answered share its Gemini call
+inflight_answers = SingleFlight()
+metrics.counter("coalesced_answers_saved_total", "Gemini calls saved by coalescing identical questions").set_function(
+    lambda: inflight_answers.stats_counts["shared"])
+metrics.gauge("gemini_in_flight", "Gemini calls holding a concurrency slot").set_function(
+    lambda: gemini_in_flight)
+metrics.gauge("gemini_breaker_state", "Gemini circuit breaker: 0 closed, 1 half-open, 2 open").set_function(
+    lambda: {CLOSED: 0, HALF_OPEN: 1}.get(gemini_breaker.state, 2))
+metrics.counter("gemini_breaker_rejected_total", "Gemini calls refused by the open circuit breaker").set_function(
+    lambda: gemini_breaker.stats_counts["rejected"])
+fallback_answers = metrics.counter("fallback_answers_total", "Extractive answers served instead of Gemini's, by reason", ["reason"])
+encode_skipped = metrics.counter("retrieval_encode_skipped_total", "Queries answered from BM25 alone, without an embedding")
+# Counted at scrape time only: for the file and redis backends this is a COUNT(*) / SCAN
+metrics.gauge("answer_cache_entries", "Entries in the answer cache").set_function(lambda: len(answer_cache.backend))
+metrics.gauge("embed_queue_depth", "Queries waiting for the next embedding batch").set_function(
+    lambda: query_encoder.depth if query_encoder else 0)
+STATUS_MAX_BATCH = int(os.getenv("STATUS_MAX_BATCH", "1000"))
 
 # --- Pydantic Models for Request and Response ---
 class QueryRequest(BaseModel):
     query: str
-    knowledge_base: str
+    language: str = "en"
+    # Deprecated: context is now retrieved server-side; the field is accepted but ignored
+    knowledge_base: Optional[str] = None
 
 class AnswerResponse(BaseModel):
     answer: str
     success: bool = True
-    error: str = None
+    error: Optional[str] = None
+    cached: bool = False
+    # Extractive answer from the FAQ tables or retrieved excerpts, served because Gemini
+    # was unavailable or too slow
+    fallback: bool = False
+
+class ChatRequest(BaseModel):
+    message: str
+    language: str = "en"
+
+class ChatResponse(AnswerResponse):
+    # Which tier produced the answer: faq, keyword, cache, llm or fallback
+    tier: str
+
+class StatusQuery(BaseModel):
+    student_id: str
+    aadhaar_last4: str
+
+class StatusRecord(StatusQuery):
+    ifsc_code: str
+    dbt_status: str
+    seeding_status: str
+
+class StatusBatchRequest(BaseModel):
+    queries: List[StatusQuery]
+
+class StatusBatchResponse(BaseModel):
+    # One entry per query, in request order; null where no record matched
+    results: List[Optional[StatusRecord]]
 
 # --- System Prompt for the AI Model ---
 SYSTEM_PROMPT = """
@@ -55,7 +164,7 @@ You are a helpful AI assistant for the DBT Dost Helpdesk, designed to help users
 - Aadhaar seeding and bank account linking
 
 IMPORTANT INSTRUCTIONS:
-1. Answer questions based ONLY on the provided knowledge base text
+1. Answer questions based ONLY on the provided knowledge base excerpts
 2. Give direct, helpful answers from the available information
 3. Keep answers clear, concise and user-friendly
 4. If you cannot find the exact answer, say "I don't have specific information about this in my current knowledge base. Please contact the support team."
@@ -65,6 +174,97 @@ IMPORTANT INSTRUCTIONS:
 Answer the user's question directly and helpfully based on the knowledge base provided.
 """
 
+# --- Gemini Helpers ---
+def language_instruction(language: str) -> str:
+    """Prompt suffix asking for an answer in the user's language"""
+    return " Respond in Hindi." if language == "hi" else ""
+
+# Ranks, deduplicates and trims the retrieved excerpts to the input-token budget
+prompt_builder = PromptBuilder(SYSTEM_PROMPT)
+
+def build_prompt(query: str, chunks: List[Dict[str, Any]], language: str) -> Tuple[str, str, Dict[str, int]]:
+    """Combine the system prompt, retrieved context, and user query; returns (prompt, context, stats)"""
+    with metrics.span("prompt_build"):
+        return prompt_builder.build(query, chunks, language_instruction(language))
+
+async def retrieve_context(query: str) -> Tuple[List[Dict[str, Any]], Optional["np.ndarray"]]:
+    """Retrieve the top-k chunks for a query; returns the chunks (best first) and query vector
+
+    A confident BM25 hit (or bm25 mode) is returned without encoding; the vector is then None.
+    """
+    with metrics.span("lexical"):
+        chunks = retriever.lexical_shortcut(query)
+    if chunks is not None:
+        encode_skipped.inc()
+        logger.info(f"Retrieved {len(chunks)} chunks for query (lexical, no encode)")
+        return chunks, None
+    with metrics.span("embed"):
+        query_vector = await query_encoder.encode(query)
+    with metrics.span("retrieval"):
+        chunks = retriever.search(query, vector=query_vector)
+    logger.info(f"Retrieved {len(chunks)} chunks for query")
+    return chunks, query_vector
+
+@asynccontextmanager
+async def gemini_slot(timeout: float):
+    """Hold one of the GEMINI_MAX_CONCURRENCY slots; the wait for it is bounded by timeout"""
+    global gemini_in_flight
+    await asyncio.wait_for(gemini_semaphore.acquire(), timeout=timeout)
+    gemini_in_flight += 1
+    try:
+        yield
+    finally:
+        gemini_in_flight -= 1
+        gemini_semaphore.release()
+
+async def generate_content(prompt: str, breaker: bool = True, **kwargs):
+    """Call Gemini without blocking the event loop, bounded by the semaphore and timeout
+
+    Waiting for a semaphore slot has its own timeout, so requests never queue
+    indefinitely, and is not counted by the breaker: it judges Gemini, not this worker's
+    queue. Raises CircuitOpenError without calling Gemini while the breaker is open;
+    breaker=False (diagnostics) bypasses it and its accounting.
+    """
+    async with gemini_slot(GEMINI_TIMEOUT_SECONDS):
+        with gemini_breaker.guard() if breaker else nullcontext(), metrics.span("gemini"):
+            return await asyncio.wait_for(model.generate_content_async(prompt, **kwargs),
+                                          timeout=GEMINI_TIMEOUT_SECONDS)
+
+async def stream_content(prompt: str, usage: Optional[Dict[str, int]] = None, deadline: Optional[float] = None,
+                         **kwargs) -> AsyncIterator[str]:
+    """Yield text chunks from a streaming Gemini call; each step is bounded by the timeout
+
+    The first chunk must also arrive by the deadline (event-loop time), if given, which
+    also bounds the wait for a semaphore slot. The breaker judges the call by its time to
+    first chunk, after the slot is held, and raises CircuitOpenError while open. If given,
+    usage is filled with the token counts reported on the final chunk.
+    """
+    loop = asyncio.get_running_loop()
+
+    def first_timeout() -> float:
+        if deadline is None:
+            return GEMINI_TIMEOUT_SECONDS
+        return min(GEMINI_TIMEOUT_SECONDS, max(0.0, deadline - loop.time()))
+
+    async def _open():
+        response = await model.generate_content_async(prompt, stream=True, **kwargs)
+        chunks = response.__aiter__()
+        return chunks, await anext(chunks, None)
+
+    async with gemini_slot(first_timeout()):
+        with gemini_breaker.guard():
+            chunks, chunk = await asyncio.wait_for(_open(), timeout=first_timeout())
+        while chunk is not None:
+            if usage is not None:
+                usage.update(usage_counts(chunk))
+            if chunk.text:
+                yield chunk.text
+            chunk = await asyncio.wait_for(anext(chunks, None), timeout=GEMINI_TIMEOUT_SECONDS)
+
+def ndjson(event: dict) -> bytes:
+    """Encode one streaming event as a newline-delimited JSON line"""
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
 # --- API Endpoints ---
 @app.get("/")
 async def root():
@@ -75,19 +275,94 @@ async def root():
         "version": "1.0.0"
     }
 
+# --- Warm-up & Readiness ---
+# component -> "pending", "ready" or "unavailable"
+readiness = {"gemini": "pending", "status_store": "pending", "retrieval": "pending"}
+warmup_seconds: Optional[float] = None
+
+def load_retriever():
+    """Import the retrieval stack and load the index (and embedding model); returns the retriever or None"""
+    # Imported here, on the warm-up thread: numpy, FAISS and sentence-transformers take
+    # about a second to import
+    from retrieval import load_retriever as load
+    return load()
+
+async def warm_up():
+    """Load heavy components in the background so the server starts answering /health at once"""
+    global model, retriever, query_encoder, status_store, warmup_seconds
+    start = time.perf_counter()
+    
+    model = await run_in_threadpool(configure_gemini)
+    readiness["gemini"] = "ready" if model else "unavailable"
+    
+    status_store = await run_in_threadpool(create_status_store)
+    readiness["status_store"] = "ready" if status_store else "unavailable"
+    
+    loaded = await run_in_threadpool(load_retriever)
+    if loaded:
+        if loaded.model is not None:
+            # The first forward pass is much slower than the rest; pay for it before serving
+            await run_in_threadpool(loaded.encode, ["warm up"])
+            from embedding_service import BatchingEncoder
+            query_encoder = BatchingEncoder(loaded.encode)
+        retriever = loaded
+    readiness["retrieval"] = "ready" if retriever else "unavailable"
+    
+    warmup_seconds = time.perf_counter() - start
+    logger.info(f"Warm-up finished in {warmup_seconds:.1f}s: {readiness}")
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the warm-up without blocking startup"""
+    app.state.warmup_task = asyncio.create_task(warm_up())
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once warm-up has finished (components may be unavailable), else 503"""
+    ready = "pending" not in readiness.values()
+    body = {"ready": ready, "components": readiness, "warmup_seconds": warmup_seconds}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check endpoint; see /ready for readiness"""
     model_status = "configured" if model else "not configured"
     return {
         "status": "healthy",
         "gemini_model": model_status,
+        "retrieval_index": "loaded" if retriever else "not loaded",
+        "query_encoder": query_encoder.stats() if query_encoder else None,
+        "answer_cache": answer_cache.stats(),
+        "coalesced_answers": inflight_answers.stats(),
+        "gemini_breaker": gemini_breaker.stats(),
+        "chat_tiers": dict(tier_counts),
+        "status_records": len(status_store) if status_store else 0,
         "api_version": "1.0.0"
     }
 
-@app.post("/generate-answer", response_model=AnswerResponse)
-async def generate_answer(request: QueryRequest):
-    """Generate answer using Gemini AI based on knowledge base"""
+# --- Answer Tiers ---
+# Tier 1 (faq/keyword) answers from in-process tables; tier 2 (cache/llm) needs retrieval + Gemini
+tier_counts = Counter()
+answers_by_tier = metrics.counter("answers_total", "Answers served by tier (faq, keyword, cache, llm)", ["tier"])
+
+def count_answer(tier: str) -> None:
+    tier_counts[tier] += 1
+    answers_by_tier.labels(tier).inc()
+
+def answer_from_knowledge_base(message: str, language: str) -> Tuple[Optional[str], Optional[str]]:
+    """Tier 1: exact FAQ question or KNOWLEDGE_BASE keyword hit; returns (answer, tier)"""
+    answer = find_faq_answer(message)
+    if answer:
+        return answer, "faq"
+    answer = find_keyword_answer(message, language)
+    if answer:
+        return answer, "keyword"
+    return None, None
+
+def validate_query(query: str) -> None:
+    """Reject requests the LLM tier cannot serve"""
+    if readiness["gemini"] == "pending" or readiness["retrieval"] == "pending":
+        raise HTTPException(status_code=503, detail="The service is still starting up. Please retry shortly.")
     
     if not model:
         logger.error("Gemini model is not configured")
@@ -96,84 +371,350 @@ async def generate_answer(request: QueryRequest):
             detail="AI model is not configured. Please check the API key configuration."
         )
     
-    if not request.query.strip():
+    if not query.strip():
         raise HTTPException(
             status_code=400,
             detail="Question cannot be empty"
         )
-    
-    if not request.knowledge_base.strip():
-        logger.warning("Knowledge base is empty")
+
+def fallback_answer(query: str, language: str, chunks: List[Dict[str, Any]], reason: str) -> Optional[str]:
+    """Extractive answer from the FAQ tables or the retrieved chunks, for when Gemini can't answer in time"""
+    answer = extractive_answer(query, language, chunks, retriever.lexical.idf if retriever else None)
+    if answer is None:
+        return None
+    logger.warning(f"Serving an extractive answer instead of Gemini's ({reason})")
+    fallback_answers.labels(reason).inc()
+    count_answer("fallback")
+    return answer
+
+def with_fallback(query: str, language: str, chunks: List[Dict[str, Any]], reason: str, failure: AnswerResponse) -> AnswerResponse:
+    """The extractive fallback answer, or the failure response if there is none"""
+    answer = fallback_answer(query, language, chunks, reason)
+    if answer is None:
+        return failure
+    return AnswerResponse(answer=answer, success=True, fallback=True)
+
+# Strong references to the running Gemini calls: one whose request has already fallen
+# back keeps running, unawaited, until its answer reaches the cache
+gemini_tasks = set()
+
+async def cache_call(method, *args):
+    """Call an answer_cache method, on the thread pool if its backend does I/O"""
+    if answer_cache.blocking:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+async def generate_and_cache(query: str, language: str, prompt: str, prompt_stats: Dict[str, int],
+                             ctx_hash: str, query_vector: Optional["np.ndarray"]) -> str:
+    """Gemini's answer to the prompt, stored in the answer cache"""
+    response = await generate_content(prompt, generation_config=GENERATION_CONFIG)
+    log_usage(prompt_stats, usage_counts(response))
+    generated_answer = response.text.strip()
+    if generated_answer:
+        logger.info(f"Successfully generated answer: {generated_answer[:100]}...")
+        await cache_call(answer_cache.set, query, language, ctx_hash, generated_answer, query_vector)
+    return generated_answer
+
+def _gemini_task_done(task: asyncio.Task) -> None:
+    gemini_tasks.discard(task)
+    if not task.cancelled():
+        # Retrieved so an abandoned call's failure is not reported as never retrieved
+        task.exception()
+
+async def answer_with_llm(query: str, language: str) -> AnswerResponse:
+    """Tier 2: answer from the top-k retrieved chunks with Gemini, serving repeats from the cache
+
+    Falls back to an extractive answer if Gemini fails, the breaker is open, or no answer
+    arrives by ANSWER_DEADLINE_SECONDS.
+    """
+    deadline = asyncio.get_running_loop().time() + ANSWER_DEADLINE_SECONDS
+    if not retriever:
+        logger.warning("Retrieval index is not loaded")
         return AnswerResponse(
             answer="I don't have access to the knowledge base right now. Please try again later or contact support.",
             success=False,
-            error="Knowledge base is empty"
+            error="Knowledge base is not loaded"
         )
     
+    chunks = []
     try:
-        logger.info(f"Processing query: {request.query[:100]}...")
+        logger.info(f"Processing query: {query[:100]}...")
         
-        # Combine the system prompt, knowledge base, and user query
-        full_prompt = f"""{SYSTEM_PROMPT}
-
---- Knowledge Base Text ---
-{request.knowledge_base}
-
---- User's Question ---
-{request.query}
-
-Please provide a helpful and accurate answer based on the knowledge base above."""
-
-        # Generate content using the Gemini model
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=800,
-                temperature=0.2,  # Slightly higher for more natural responses
-            )
-        )
+        chunks, query_vector = await retrieve_context(query)
+        full_prompt, context, prompt_stats = build_prompt(query, chunks, language)
+        
+        # Serve repeated (or paraphrased) questions without another Gemini call
+        ctx_hash = context_hash(context)
+        cached_answer = await cache_call(answer_cache.get, query, language, ctx_hash, query_vector)
+        if cached_answer is not None:
+            logger.info("Answer served from cache")
+            count_answer("cache")
+            return AnswerResponse(answer=cached_answer, success=True, cached=True)
         
-        # Extract and clean the generated text
-        generated_answer = response.text.strip()
+        # Gemini gets what is left of the deadline. A call that misses it keeps running
+        # (bounded by GEMINI_TIMEOUT_SECONDS) so its answer reaches the cache for the next asker.
+        gemini_task = asyncio.create_task(
+            generate_and_cache(query, language, full_prompt, prompt_stats, ctx_hash, query_vector))
+        gemini_tasks.add(gemini_task)
+        gemini_task.add_done_callback(_gemini_task_done)
+        remaining = deadline - asyncio.get_running_loop().time()
+        generated_answer = await asyncio.wait_for(asyncio.shield(gemini_task), timeout=max(0.0, remaining))
         
         if not generated_answer:
             logger.warning("Empty response from Gemini model")
-            return AnswerResponse(
+            return with_fallback(query, language, chunks, "empty", AnswerResponse(
                 answer="I'm sorry, I couldn't generate an answer right now. Please try rephrasing your question or contact support.",
                 success=False,
                 error="Empty response from AI model"
-            )
+            ))
         
-        logger.info(f"Successfully generated answer: {generated_answer[:100]}...")
+        count_answer("llm")
         return AnswerResponse(answer=generated_answer, success=True)
         
+    except CircuitOpenError:
+        return with_fallback(query, language, chunks, "circuit_open", AnswerResponse(
+            answer="I'm experiencing technical difficulties right now. Please try again in a moment or contact support if the issue persists.",
+            success=False,
+            error="AI model is temporarily unavailable"
+        ))
+    except asyncio.TimeoutError:
+        logger.error(f"No Gemini answer within the {ANSWER_DEADLINE_SECONDS}s deadline")
+        return with_fallback(query, language, chunks, "deadline", AnswerResponse(
+            answer="I'm taking longer than expected to respond. Please try again in a moment.",
+            success=False,
+            error="AI model request timed out"
+        ))
     except Exception as e:
         logger.error(f"Error during API call: {e}")
         error_message = "I'm experiencing technical difficulties right now. Please try again in a moment or contact support if the issue persists."
         
         # Return a user-friendly error response instead of raising HTTPException
-        return AnswerResponse(
+        return with_fallback(query, language, chunks, "error", AnswerResponse(
             answer=error_message,
             success=False,
             error=str(e)
-        )
+        ))
+
+async def coalesced_answer(query: str, language: str) -> AnswerResponse:
+    """answer_with_llm, shared by concurrent requests with the same normalised query and language"""
+    key = f"{language}|{normalize_text(query)}"
+    return await inflight_answers.do(key, lambda: answer_with_llm(query, language))
+
+def fallback_events(query: str, language: str, chunks: List[Dict[str, Any]], reason: str, failure: dict) -> List[bytes]:
+    """The extractive fallback as token + done events, or the failure done event if there is none"""
+    answer = fallback_answer(query, language, chunks, reason)
+    if answer is None:
+        return [ndjson(failure)]
+    return [
+        ndjson({"type": "token", "text": answer}),
+        ndjson({"type": "done", "success": True, "error": None, "cached": False, "tier": "fallback"}),
+    ]
+
+async def stream_llm_answer(query: str, language: str) -> AsyncIterator[bytes]:
+    """Tier 2 as NDJSON: token events, then one final done event
+
+    Until the first token is sent, failures, an open breaker or a missed deadline fall
+    back to an extractive answer.
+    """
+    deadline = asyncio.get_running_loop().time() + ANSWER_DEADLINE_SECONDS
+    if not retriever:
+        logger.warning("Retrieval index is not loaded")
+        yield ndjson({
+            "type": "done",
+            "success": False,
+            "answer": "I don't have access to the knowledge base right now. Please try again later or contact support.",
+            "error": "Knowledge base is not loaded",
+            "tier": "llm",
+        })
+        return
+    
+    chunks = []
+    parts = []
+    try:
+        logger.info(f"Streaming answer for query: {query[:100]}...")
+        chunks, query_vector = await retrieve_context(query)
+        full_prompt, context, prompt_stats = build_prompt(query, chunks, language)
+        ctx_hash = context_hash(context)
+        cached_answer = await cache_call(answer_cache.get, query, language, ctx_hash, query_vector)
+        if cached_answer is not None:
+            count_answer("cache")
+            yield ndjson({"type": "token", "text": cached_answer})
+            yield ndjson({"type": "done", "success": True, "error": None, "cached": True, "tier": "cache"})
+            return
+        
+        usage = {}
+        with metrics.span("gemini_stream"):
+            async for text in stream_content(full_prompt, usage=usage, deadline=deadline, generation_config=GENERATION_CONFIG):
+                parts.append(text)
+                yield ndjson({"type": "token", "text": text})
+        log_usage(prompt_stats, usage)
+        
+        generated_answer = "".join(parts).strip()
+        if not generated_answer:
+            logger.warning("Empty response from Gemini model")
+            for event in fallback_events(query, language, chunks, "empty", {
+                "type": "done",
+                "success": False,
+                "answer": "I'm sorry, I couldn't generate an answer right now. Please try rephrasing your question or contact support.",
+                "error": "Empty response from AI model",
+                "tier": "llm",
+            }):
+                yield event
+            return
+        
+        count_answer("llm")
+        await cache_call(answer_cache.set, query, language, ctx_hash, generated_answer, query_vector)
+        yield ndjson({"type": "done", "success": True, "error": None, "cached": False, "tier": "llm"})
+    
+    except CircuitOpenError:
+        for event in fallback_events(query, language, chunks, "circuit_open", {
+            "type": "done",
+            "success": False,
+            "answer": "I'm experiencing technical difficulties right now. Please try again in a moment or contact support if the issue persists.",
+            "error": "AI model is temporarily unavailable",
+            "tier": "llm",
+        }):
+            yield event
+    except asyncio.TimeoutError:
+        logger.error(f"Gemini stream timed out ({len(parts)} chunks received)")
+        failure = {
+            "type": "done",
+            "success": False,
+            "answer": "I'm taking longer than expected to respond. Please try again in a moment.",
+            "error": "AI model request timed out",
+            "tier": "llm",
+        }
+        for event in fallback_events(query, language, chunks, "deadline", failure) if not parts else [ndjson(failure)]:
+            yield event
+    except Exception as e:
+        logger.error(f"Error during streaming API call: {e}")
+        failure = {
+            "type": "done",
+            "success": False,
+            "answer": "I'm experiencing technical difficulties right now. Please try again in a moment or contact support if the issue persists.",
+            "error": str(e),
+            "tier": "llm",
+        }
+        for event in fallback_events(query, language, chunks, "error", failure) if not parts else [ndjson(failure)]:
+            yield event
+
+@app.post("/generate-answer", response_model=AnswerResponse)
+async def generate_answer(request: QueryRequest):
+    """Generate answer using Gemini AI based on the top-k retrieved knowledge base chunks"""
+    validate_query(request.query)
+    return await coalesced_answer(request.query, request.language)
+
+@app.post("/generate-answer/stream")
+async def generate_answer_stream(request: QueryRequest):
+    """Stream the Gemini answer as NDJSON: token events, then one final done event"""
+    validate_query(request.query)
+    return StreamingResponse(
+        stream_llm_answer(request.query, request.language),
+        media_type="application/x-ndjson",
+    )
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """Chatbot endpoint: FAQ/keyword tier first, retrieval + Gemini only on a miss"""
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    answer, tier = answer_from_knowledge_base(request.message, request.language)
+    if answer:
+        count_answer(tier)
+        return ChatResponse(answer=answer, success=True, tier=tier)
+    
+    validate_query(request.message)
+    response = await coalesced_answer(request.message, request.language)
+    return ChatResponse(
+        answer=response.answer,
+        success=response.success,
+        error=response.error,
+        cached=response.cached,
+        fallback=response.fallback,
+        tier="fallback" if response.fallback else "cache" if response.cached else "llm",
+    )
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming /chat: tier-1 hits arrive as a single token, LLM answers token by token"""
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    answer, tier = answer_from_knowledge_base(request.message, request.language)
+    if answer:
+        count_answer(tier)
+        
+        async def tier_one():
+            yield ndjson({"type": "token", "text": answer})
+            yield ndjson({"type": "done", "success": True, "error": None, "cached": False, "tier": tier})
+        
+        return StreamingResponse(tier_one(), media_type="application/x-ndjson")
+    
+    validate_query(request.message)
+    return StreamingResponse(
+        stream_llm_answer(request.message, request.language),
+        media_type="application/x-ndjson",
+    )
+
+# --- Metrics ---
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of request, stage and cache metrics"""
+    return metrics.response()
+
+# --- Status Lookup ---
+def require_status_store():
+    if not status_store:
+        raise HTTPException(status_code=503, detail="Status records are not loaded")
+
+def validate_status_query(student_id: str, aadhaar_last4: str) -> None:
+    if not student_id.strip():
+        raise HTTPException(status_code=400, detail="Student ID cannot be empty")
+    if len(aadhaar_last4.strip()) != 4 or not aadhaar_last4.strip().isdigit():
+        raise HTTPException(status_code=400, detail="aadhaar_last4 must be the last 4 digits of the Aadhaar number")
+
+@app.get("/status", response_model=StatusRecord)
+async def get_status(student_id: str, aadhaar_last4: str):
+    """DBT and Aadhaar seeding status for one student"""
+    require_status_store()
+    validate_status_query(student_id, aadhaar_last4)
+    with metrics.span("status_lookup"):
+        record = await run_in_threadpool(status_store.lookup, student_id, aadhaar_last4)
+    if record is None:
+        raise HTTPException(status_code=404, detail="No record found for this Student ID and Aadhaar")
+    return StatusRecord(**record)
+
+@app.post("/status/batch", response_model=StatusBatchResponse)
+async def get_status_batch(request: StatusBatchRequest):
+    """Status for many students in one call"""
+    require_status_store()
+    if len(request.queries) > STATUS_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {STATUS_MAX_BATCH} queries per batch")
+    for query in request.queries:
+        validate_status_query(query.student_id, query.aadhaar_last4)
+    keys = [(query.student_id, query.aadhaar_last4) for query in request.queries]
+    with metrics.span("status_lookup"):
+        records = await run_in_threadpool(status_store.lookup_many, keys)
+    return StatusBatchResponse(results=[StatusRecord(**record) if record else None for record in records])
 
 # --- Test Endpoint for Development ---
 @app.post("/test-connection")
 async def test_connection():
-    """Test endpoint to verify Gemini API connection"""
+    """Test endpoint to verify Gemini API connection (outside the circuit breaker)"""
     if not model:
         raise HTTPException(status_code=500, detail="Gemini model is not configured")
     
     try:
         test_prompt = "Say 'Hello, I am working correctly!' if you can read this."
-        response = model.generate_content(test_prompt)
+        response = await generate_content(test_prompt, breaker=False)
         return {
             "status": "success",
             "response": response.text.strip(),
             "message": "Gemini API is working correctly"
         }
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Gemini API test timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gemini API test failed: {str(e)}")
 
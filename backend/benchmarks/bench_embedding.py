@@ -0,0 +1,124 @@
+"""
+Benchmark micro-batched query encoding against one encode call per request.
+
+Simulates N concurrent clients each sending queries back to back, and reports p50/p99
+request latency and throughput for:
+  - unbatched: every request encodes its own query on the default thread pool
+    (the previous retrieve_context behaviour)
+  - batched:   requests go through BatchingEncoder
+
+Queries are mostly unique (a few repeat) so the cache is not the whole story; run
+with --unique to disable repeats entirely.
+
+By default the real sentence-transformers model is used. --synthetic swaps in a
+BLAS-bound stand-in (matrix products with a fixed per-call overhead) for machines
+without the model weights.
+
+Usage:
+    python benchmarks/bench_embedding.py --clients 1 8 32 --requests 400
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_service import BatchingEncoder
+
+WORDS = ["aadhaar", "seeding", "bank", "account", "dbt", "nsp", "scholarship", "status", "link",
+         "npci", "mapper", "kaise", "kare", "payment", "pending", "kya", "hai", "form", "branch"]
+
+
+def synthetic_encoder(dim: int = 384, hidden: int = 1536, layers: int = 6):
+    """Stand-in with a per-call overhead plus per-item matmul cost, like a small transformer"""
+    rng = np.random.default_rng(0)
+    weights = [rng.standard_normal((dim if i == 0 else hidden, hidden), dtype=np.float32) * 0.02 for i in range(layers)]
+    head = rng.standard_normal((hidden, dim), dtype=np.float32) * 0.02
+
+    def encode(texts):
+        tokens = 32
+        x = rng.standard_normal((len(texts) * tokens, dim), dtype=np.float32)
+        for w in weights:
+            x = np.tanh(x @ w)
+        return (x @ head).reshape(len(texts), tokens, dim).mean(axis=1)
+
+    return encode
+
+
+def model_encoder():
+    from retrieval import EMBEDDING_MODEL
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    return lambda texts: model.encode(texts)
+
+
+def make_queries(count: int, unique: bool, rng: random.Random):
+    queries = []
+    for i in range(count):
+        if not unique and queries and rng.random() < 0.2:
+            queries.append(rng.choice(queries))
+        else:
+            queries.append(" ".join(rng.sample(WORDS, rng.randint(3, 8))) + f" {i}")
+    return queries
+
+
+async def run_clients(encode_one, queries, clients: int):
+    latencies = []
+    it = iter(queries)
+
+    async def client():
+        for query in it:
+            start = time.perf_counter()
+            await encode_one(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def report(name: str, latencies, elapsed: float) -> None:
+    ms = np.asarray(latencies) * 1000
+    print(f"  {name:<10} p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms  "
+          f"{len(latencies) / elapsed:8.1f} queries/s")
+
+
+async def main_async(args):
+    encode = synthetic_encoder() if args.synthetic else model_encoder()
+    encode(["warm up"])
+    rng = random.Random(0)
+    for clients in args.clients:
+        queries = make_queries(args.requests, args.unique, rng)
+        print(f"{clients} concurrent clients, {len(queries)} queries")
+
+        loop = asyncio.get_running_loop()
+        latencies, elapsed = await run_clients(lambda q: loop.run_in_executor(None, encode, [q]), queries, clients)
+        report("unbatched", latencies, elapsed)
+
+        encoder = BatchingEncoder(encode, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        latencies, elapsed = await run_clients(encoder.encode, queries, clients)
+        report("batched", latencies, elapsed)
+        stats = encoder.stats()
+        print(f"  {'':<10} mean batch {stats['mean_batch_size']}, cache hits {stats['cache_hits']}, "
+              f"coalesced {stats['coalesced']}")
+        encoder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--unique", action="store_true", help="no repeated queries")
+    parser.add_argument("--synthetic", action="store_true", help="use a stand-in encoder instead of the model")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark precompiled menu payloads against building and serialising them per send.
+
+For every menu the bot sends, times the original path (build the nested dict from
+MESSAGES / FAQ_DATA, add messaging_product/to, json.dumps) against splicing the
+recipient id into the precompiled byte template, and reports the CPU saved per
+message and per second at the given peak message rate.
+
+Usage:
+    python benchmarks/bench_payloads.py --rate 500
+"""
+import os
+import sys
+import time
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import whatsapp_bot as bot
+
+
+def rebuild(recipient_id: str, data: dict) -> bytes:
+    """The original per-send path"""
+    payload = {"messaging_product": "whatsapp", "to": recipient_id, **data}
+    return json.dumps(payload).encode("utf-8")
+
+
+def cases():
+    category = next(iter(bot.FAQ_DATA))
+    return [
+        ("language selection", bot.build_language_selection, bot.LANGUAGE_SELECTION_PAYLOAD),
+        ("main menu (hi)", lambda: bot.build_main_menu("hi"), bot.MAIN_MENU_PAYLOADS["hi"]),
+        ("continue menu (en)", lambda: bot.build_continue_menu("en"), bot.CONTINUE_MENU_PAYLOADS["en"]),
+        ("faq categories", bot.build_faq_category_menu, bot.FAQ_CATEGORY_MENU_PAYLOAD),
+        (f"faq questions ({category})", lambda: bot.build_faq_question_menu(category), bot.FAQ_QUESTION_MENU_PAYLOADS[category]),
+    ]
+
+
+def time_per_call(fn, iterations: int) -> float:
+    start = time.process_time()
+    for i in range(iterations):
+        fn(str(919800000000 + i))
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--rate", type=int, default=500, help="peak outbound messages per second")
+    args = parser.parse_args()
+
+    print(f"{'payload':<28}{'rebuild us':>12}{'template us':>13}{'saved us':>10}")
+    saved = []
+    for name, build, template in cases():
+        assert json.loads(rebuild("91", build())) == json.loads(template.render("91"))
+        rebuild_us = time_per_call(lambda rid: rebuild(rid, build()), args.iterations)
+        template_us = time_per_call(template.render, args.iterations)
+        saved.append(rebuild_us - template_us)
+        print(f"{name:<28}{rebuild_us:>12.2f}{template_us:>13.2f}{rebuild_us - template_us:>10.2f}")
+
+    mean_saved = sum(saved) / len(saved)
+    print(f"\nmean CPU saved: {mean_saved:.2f} us/message; "
+          f"{mean_saved * args.rate / 1000:.1f} ms of CPU per second at {args.rate} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark snapshot reconciliation on synthetic students.csv dumps.
+
+Generates an "old" snapshot of N rows and a "new" one with a fraction of records
+changed, removed and added, runs reconcile() and reports throughput and the peak
+resident memory of the parent and of the largest worker process. The detected change
+counts are checked against what was generated.
+
+Usage:
+    python benchmarks/bench_reconcile.py --rows 10000000 --workers 8
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reconcile import reconcile
+from status_store import STATUS_FIELDS
+
+DBT_STATUSES = ["Active", "Pending", "Inactive"]
+SEEDING_STATUSES = ["Completed", "Pending", "Not Done"]
+BANKS = ["SBIN", "HDFC", "ICIC", "BARB", "PUNB", "UBIN"]
+
+
+def row(i: int, dbt: str, seeding: str) -> str:
+    return f"{i},{i * 7919 % 10000:04d},{BANKS[i % len(BANKS)]}{i % 10000000:07d},{dbt},{seeding}\n"
+
+
+def generate(old_path: str, new_path: str, rows: int, change_rate: float, rng: random.Random) -> dict:
+    """Write both snapshots; returns the expected change counts"""
+    expected = {"changed": 0, "removed": 0, "added": 0}
+    header = ",".join(STATUS_FIELDS) + "\n"
+    with open(old_path, "w") as old, open(new_path, "w") as new:
+        old.write(header)
+        new.write(header)
+        for i in range(rows):
+            dbt, seeding = DBT_STATUSES[i % 3], SEEDING_STATUSES[i // 3 % 3]
+            old.write(row(i, dbt, seeding))
+            r = rng.random()
+            if r < change_rate:
+                expected["changed"] += 1
+                new.write(row(i, dbt, SEEDING_STATUSES[(SEEDING_STATUSES.index(seeding) + 1) % 3]))
+            elif r < change_rate * 1.2:
+                expected["removed"] += 1
+            else:
+                new.write(row(i, dbt, seeding))
+        for i in range(rows, rows + int(rows * change_rate * 0.2)):
+            expected["added"] += 1
+            new.write(row(i, "Pending", "Not Done"))
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--partitions", type=int, default=64)
+    parser.add_argument("--tmp-dir", help="where the synthetic snapshots and partitions go")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as work_dir:
+        old_path = os.path.join(work_dir, "old.csv")
+        new_path = os.path.join(work_dir, "new.csv")
+        output_path = os.path.join(work_dir, "changes.csv")
+
+        start = time.perf_counter()
+        expected = generate(old_path, new_path, args.rows, args.change_rate, random.Random(0))
+        size_mb = (os.path.getsize(old_path) + os.path.getsize(new_path)) / 1e6
+        print(f"Generated 2 x {args.rows} rows ({size_mb:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+        parent_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        counts = reconcile(old_path, new_path, output_path, args.workers, args.partitions, work_dir)
+        elapsed = time.perf_counter() - start
+
+        total_rows = counts["old_rows"] + counts["new_rows"]
+        print(f"Reconciled in {elapsed:.1f}s with {args.workers} workers, {args.partitions} partitions")
+        print(f"  throughput: {total_rows / elapsed / 1e6:.2f} M rows/s, {size_mb / elapsed:.0f} MB/s")
+        # ru_maxrss is in KiB on Linux; RUSAGE_CHILDREN reports the largest child
+        print(f"  peak RSS: parent {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB "
+              f"(before run {parent_rss / 1024:.0f} MB), "
+              f"largest worker {resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024:.0f} MB")
+        for name in ("changed", "removed", "added"):
+            status = "ok" if counts[name] == expected[name] else f"MISMATCH (expected {expected[name]})"
+            print(f"  {name}: {counts[name]} {status}")
+
+
+if __name__ == "__main__":
+    main()
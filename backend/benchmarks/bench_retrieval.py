@@ -0,0 +1,99 @@
+"""
+Evaluate retrieval quality and latency per RETRIEVAL_MODE on a labelled query set.
+
+Each entry of retrieval_eval.json has a query and one or more `expect` phrases; a
+query counts as recalled at k when any of the top-k chunks contains one of them
+(case- and whitespace-insensitive), which keeps the labels valid across re-chunking.
+The set mixes English, Hinglish and Devanagari queries, and exact-term lookups
+(codes, e-mail addresses, scheme names) that dense search tends to miss.
+
+For every mode the query path mirrors the API: a confident BM25 hit is served without
+encoding, anything else is encoded and searched. Reports recall@1 and recall@k,
+p50/p99 latency per query, and the share of queries that skipped the encode.
+Modes whose embedding model cannot be loaded are skipped. Corpus chunks missing from
+the index are searched alongside it, but are embedded at every load; rebuild the index
+with build_index.py after corpus changes.
+
+Usage:
+    python benchmarks/bench_retrieval.py [--modes bm25 vector hybrid] [--k 4] [--show-misses]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval import Retriever, RETRIEVAL_MODES, TOP_K
+
+EVAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_eval.json")
+
+
+def squash(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def first_hit_rank(chunks, expect) -> int:
+    """1-based rank of the first chunk containing an expected phrase, 0 if none"""
+    phrases = [squash(phrase) for phrase in expect]
+    for rank, chunk in enumerate(chunks, start=1):
+        text = squash(chunk["text"])
+        if any(phrase in text for phrase in phrases):
+            return rank
+    return 0
+
+
+def evaluate(retriever: Retriever, items, k: int, show_misses: bool) -> None:
+    retriever.search("warm up", k)
+    ranks, latencies, skipped = [], [], 0
+    for item in items:
+        start = time.perf_counter()
+        chunks = retriever.lexical_shortcut(item["query"], k)
+        if chunks is None:
+            vector = retriever.encode([item["query"]])
+            chunks = retriever.search(item["query"], k, vector=vector)
+        else:
+            skipped += 1
+        latencies.append(time.perf_counter() - start)
+        rank = first_hit_rank(chunks, item["expect"])
+        ranks.append(rank)
+        if show_misses and rank == 0:
+            print(f"    miss: {item['query']}")
+
+    ranks = np.asarray(ranks)
+    ms = np.asarray(latencies) * 1000
+    print(f"  {retriever.mode:<7} ({len(retriever.chunks)} chunks) recall@1 {np.mean(ranks == 1):.2f}  recall@{k} {np.mean(ranks > 0):.2f}  "
+          f"p50 {np.percentile(ms, 50):7.3f} ms  p99 {np.percentile(ms, 99):7.3f} ms  "
+          f"encode skipped {skipped}/{len(items)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=RETRIEVAL_MODES, default=["bm25", "vector", "hybrid"])
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--eval", default=EVAL_PATH, help="labelled queries (JSON list of {query, expect})")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with open(args.eval, encoding="utf-8") as f:
+        items = json.load(f)
+    print(f"{len(items)} labelled queries")
+    for mode in args.modes:
+        try:
+            retriever = Retriever(mode=mode)
+        except Exception as e:
+            print(f"  {mode:<7} skipped: {e}")
+            continue
+        if retriever.mode != mode:
+            print(f"  {mode:<7} skipped: embedding model unavailable (fell back to {retriever.mode})")
+            continue
+        evaluate(retriever, items, args.k, args.show_misses)
+
+
+if __name__ == "__main__":
+    main()
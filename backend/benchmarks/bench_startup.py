@@ -0,0 +1,95 @@
+"""
+Profile the API's cold start.
+
+1. Import profile: imports backend-api-local in a fresh interpreter under
+   `python -X importtime` and lists the top-level packages with the largest
+   cumulative import time.
+2. Boot timeline: starts the API under uvicorn and polls /health (liveness) and
+   /ready (readiness), reporting how long after process start each first answered.
+
+With lazy imports and the background warm-up, /health should answer in well under a
+second while /ready follows once Gemini, the status store and the retrieval index
+have loaded.
+
+Usage:
+    python benchmarks/bench_startup.py [--top 15] [--port 8765]
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_MODULE = "backend-api-local"
+
+
+def import_profile(top: int) -> None:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import importlib; importlib.import_module('{API_MODULE}')"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Only top-level entries: nested imports are already in their parent's total
+        if name.startswith(" ") and not name.startswith("  "):
+            packages[name.strip()] = int(cumulative) / 1e6
+
+    print(f"Import of {API_MODULE}: {wall:.2f}s wall (including interpreter start)")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {seconds:7.3f}s  {name}")
+
+
+def boot_timeline(port: int, timeout: float) -> None:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{API_MODULE}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    live_at = ready_at = None
+    ready_body = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            while time.perf_counter() - start < timeout and ready_at is None:
+                try:
+                    if live_at is None and client.get("/health").status_code == 200:
+                        live_at = time.perf_counter() - start
+                    response = client.get("/ready")
+                    if response.status_code == 200:
+                        ready_at = time.perf_counter() - start
+                        ready_body = response.json()
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"Boot timeline on port {port}:")
+    print(f"  live  (/health 200): {f'{live_at:.2f}s' if live_at is not None else 'timed out'}")
+    print(f"  ready (/ready 200):  {f'{ready_at:.2f}s' if ready_at is not None else 'timed out'}")
+    if ready_body:
+        print(f"  components: {ready_body['components']} (warm-up {ready_body['warmup_seconds']:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=180)
+    args = parser.parse_args()
+    import_profile(args.top)
+    boot_timeline(args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark the memory-mapped vector index against the pickled IndexFlatL2.
+
+Queries are the corpus vectors plus small noise, so no embedding model is needed.
+Reports load time, private (non-shareable) memory added by the load, p50/p99 query latency and
+recall@k against exact flat search. --scale grows the corpus synthetically to show
+how IVF / IVFPQ stay sub-linear when the corpus gets large.
+
+Usage:
+    python benchmarks/bench_vector_store.py --scale 1000 --nprobe 1 4 16
+"""
+import os
+import sys
+import gc
+import time
+import pickle
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import INDEX_PATH, build_index, write_index, open_index, set_nprobe, load_pickled
+
+
+def private_rss_mb() -> float:
+    """Resident memory of this process not backed by shared file pages, in MB (Linux)"""
+    with open("/proc/self/statm") as f:
+        fields = f.read().split()
+    return (int(fields[1]) - int(fields[2])) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def percentile_ms(samples, pct) -> float:
+    return float(np.percentile(samples, pct) * 1000)
+
+
+def time_queries(index, queries, k):
+    latencies = []
+    results = []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids[0])
+    return latencies, results
+
+
+def recall(results, truth, k) -> float:
+    hits = sum(len(set(r[:k]) & set(t[:k])) for r, t in zip(results, truth))
+    return hits / (len(truth) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--scale", type=int, default=1, help="replicate the corpus N times with jitter")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    flat, _ = load_pickled(args.index)
+    base = flat.reconstruct_n(0, flat.ntotal)
+    rng = np.random.default_rng(0)
+    vectors = np.vstack([base + rng.normal(0, 0.01, base.shape) for _ in range(args.scale)]).astype("float32")
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + rng.normal(0, 0.02, (args.queries, vectors.shape[1]))
+    queries = queries.astype("float32")
+    print(f"corpus: {len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, k={args.k}\n")
+
+    # Baseline: the current pickled in-RAM flat index
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, "flat.pkl")
+        exact = build_index(vectors, "flat")
+        with open(pkl_path, "wb") as f:
+            pickle.dump((exact, []), f)
+        del exact
+        gc.collect()
+
+        before = private_rss_mb()
+        start = time.perf_counter()
+        baseline, _ = load_pickled(pkl_path)
+        load_s = time.perf_counter() - start
+        latencies, truth = time_queries(baseline, queries, args.k)
+        rows = [("pickle flat", "-", load_s, private_rss_mb() - before, latencies, 1.0, os.path.getsize(pkl_path))]
+        del baseline
+        gc.collect()
+
+        for kind in ("flat", "ivf", "ivfpq"):
+            path = os.path.join(tmp, f"{kind}.faiss")
+            write_index(build_index(vectors, kind), path)
+            gc.collect()
+            before = private_rss_mb()
+            start = time.perf_counter()
+            index = open_index(path)
+            load_s = time.perf_counter() - start
+            for nprobe in (args.nprobe if kind != "flat" else ["-"]):
+                if nprobe != "-":
+                    set_nprobe(index, nprobe)
+                latencies, results = time_queries(index, queries, args.k)
+                mem = private_rss_mb() - before
+                rows.append((f"mmap {kind}", nprobe, load_s, mem, latencies, recall(results, truth, args.k), os.path.getsize(path)))
+
+    print(f"{'index':<12} {'nprobe':>6} {'load ms':>8} {'+priv MB':>8} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7} {'disk KB':>8}")
+    for name, nprobe, load_s, mem, latencies, rec, size in rows:
+        print(f"{name:<12} {str(nprobe):>6} {load_s * 1000:>8.2f} {mem:>8.2f} "
+              f"{percentile_ms(latencies, 50):>8.3f} {percentile_ms(latencies, 99):>8.3f} {rec:>7.3f} {size / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+Offline load test for the API (/chat, /generate-answer) or the WhatsApp bot (/webhook).
+
+Starts fakes/fake_gemini_api.py and fakes/fake_graph_api.py, then the service under
+test under uvicorn pointed at them (GEMINI_API_BASE / GRAPH_API_BASE), waits for it
+to be ready, and drives it with a closed loop of --concurrency clients:
+  - api:     a mix of exact FAQ questions on /chat (tier 1), free-form questions on
+             /generate-answer (a finite pool, so some repeat and hit the cache) and
+             streamed /chat/stream answers read to the end
+  - webhook: Meta webhook envelopes from --senders simulated users, each walking a
+             realistic conversation (hi -> language button -> menu buttons -> FAQ
+             list replies -> continue/exit, status lookups, free text), with a few
+             redeliveries of already-sent message ids; --batch puts several users'
+             messages in each delivery, as Meta does under load
+After the run the bot is given time to drain its queue, so the report includes the
+replies it sent and how long processing took, not just the webhook acks.
+
+Reports throughput, p50/p95/p99 latency, errors, the service's RSS growth over the
+run and (if METRICS_ENABLED) mean time per stage from its /metrics. --results appends
+the same as one JSON line tagged with the git commit, to compare runs commit to commit.
+The load generator shares the machine with the service, so compare runs from the
+same host only.
+
+The api scenario needs the retrieval index (and the embedding model, unless run with
+RETRIEVAL_MODE=bm25) for the LLM tier; without them those requests return the
+"knowledge base is not loaded" answer.
+
+Usage:
+    python benchmarks/loadtest.py webhook --senders 200 --requests 5000 --concurrency 64
+    python benchmarks/loadtest.py webhook --senders 200 --requests 1000 --batch 5
+    python benchmarks/loadtest.py api --requests 2000 --concurrency 32 --gemini-latency-ms 800 --results loadtest.jsonl
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import subprocess
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from knowledge import FAQ_DATA
+
+SERVICES = {
+    "api": ("backend-api-local:app", "dbt_dost_api", "/ready"),
+    "webhook": ("whatsapp_bot:app", "dbt_dost_bot", "/health"),
+}
+
+FREE_FORM_QUESTIONS = [
+    "How many days does Aadhaar seeding take after submitting the form?",
+    "My scholarship is approved but the money has not come, what should I do?",
+    "Can I receive DBT in a joint bank account?",
+    "What documents do I need to link Aadhaar with my bank account?",
+    "How do I check if my Aadhaar is mapped on the NPCI mapper?",
+    "Why is my NSP application showing pending at the institute level?",
+    "मेरा आधार बैंक खाते से लिंक है या नहीं कैसे पता करें?",
+    "Scholarship ka paisa kis account mein aayega?",
+    "What is the difference between Aadhaar linking and Aadhaar seeding?",
+    "Can I change the bank account for DBT after applying on NSP?",
+    "What should I do if my bank says my Aadhaar is seeded but NPCI shows inactive?",
+    "Is there a last date for NSP renewal applications this year?",
+]
+
+
+# --- Processes ---
+def start_server(app_path: str, port: int, env: Dict[str, str], verbose: bool) -> subprocess.Popen:
+    output = None if verbose else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=output, stderr=output,
+    )
+
+
+def wait_until_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    with httpx.Client(timeout=2) as client:
+        while time.monotonic() < deadline:
+            try:
+                if client.get(url).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} was not ready after {timeout:.0f}s")
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process (Linux /proc), in MB"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except OSError:
+        return "unknown"
+
+
+# --- Traffic: API ---
+def api_requests(rng: random.Random, stream_ratio: float) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    faq_questions = [item["question"] for category in FAQ_DATA.values() for item in category["questions"]]
+    while True:
+        roll = rng.random()
+        language = "hi" if rng.random() < 0.3 else "en"
+        if roll < stream_ratio:
+            yield "/chat/stream", {"message": rng.choice(FREE_FORM_QUESTIONS), "language": language}
+        elif roll < stream_ratio + 0.3:
+            yield "/chat", {"message": rng.choice(faq_questions), "language": language}
+        else:
+            yield "/generate-answer", {"query": rng.choice(FREE_FORM_QUESTIONS), "language": language}
+
+
+# --- Traffic: Webhook ---
+def text_message(body: str) -> Dict[str, Any]:
+    return {"type": "text", "text": {"body": body}}
+
+
+def button_reply(button_id: str) -> Dict[str, Any]:
+    return {"type": "interactive", "interactive": {"type": "button_reply", "button_reply": {"id": button_id, "title": button_id}}}
+
+
+def list_reply(row_id: str) -> Dict[str, Any]:
+    return {"type": "interactive", "interactive": {"type": "list_reply", "list_reply": {"id": row_id, "title": row_id}}}
+
+
+def conversation(rng: random.Random) -> Iterator[Dict[str, Any]]:
+    """One simulated user's messages, in the order a real user would send them"""
+    yield text_message(rng.choice(["hi", "Hi", "hello", "नमस्ते"]))
+    yield button_reply(rng.choice(["lang_en", "lang_en", "lang_hi"]))
+    while True:
+        roll = rng.random()
+        if roll < 0.55:
+            yield button_reply("menu_faq")
+            for _ in range(rng.randint(1, 3)):
+                category = rng.choice(list(FAQ_DATA))
+                yield list_reply(f"faq_cat_{category}")
+                yield list_reply(f"faq_q_{category}_{rng.randrange(len(FAQ_DATA[category]['questions']))}")
+                yield button_reply("continue_faq")
+            yield button_reply("exit_faq")
+        elif roll < 0.75:
+            yield button_reply("menu_check_status")
+            yield text_message(f"{rng.randint(100, 999)} {rng.randint(1000, 9999)}")
+        elif roll < 0.85:
+            yield button_reply("menu_help_support")
+        elif roll < 0.95:
+            yield text_message(rng.choice(["scholarship kab aayegi", "status?", "thank you", "ok"]))
+        else:
+            yield text_message("menu")
+
+
+def webhook_requests(rng: random.Random, senders: int, redeliver: float, batch: int = 1) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    conversations = {f"91900{i:07d}": conversation(random.Random(rng.random())) for i in range(senders)}
+    sender_ids = list(conversations)
+    message_ids = itertools.count(1)
+    sent: List[Dict[str, Any]] = []
+    while True:
+        if sent and rng.random() < redeliver:
+            # Meta redelivers when an ack is slow; the bot must drop these
+            yield "/webhook", rng.choice(sent)
+            continue
+        # Under load Meta batches messages from several users into one delivery
+        batch_senders = rng.sample(sender_ids, min(batch, len(sender_ids)))
+        messages = [
+            {"from": sender, "id": f"wamid.load{next(message_ids)}", "timestamp": str(int(time.time())), **next(conversations[sender])}
+            for sender in batch_senders
+        ]
+        envelope = {
+            "object": "whatsapp_business_account",
+            "entry": [{"id": "loadtest", "changes": [{"field": "messages", "value": {
+                "messaging_product": "whatsapp",
+                "metadata": {"display_phone_number": "15550000000", "phone_number_id": "loadtest"},
+                "contacts": [{"profile": {"name": "Load Test"}, "wa_id": sender} for sender in batch_senders],
+                "messages": messages,
+            }}]}],
+        }
+        sent = sent[-999:] + [envelope]
+        yield "/webhook", envelope
+
+
+# --- Driver ---
+async def drive(base_url: str, requests: Iterator[Tuple[str, Dict[str, Any]]], total: int, concurrency: int):
+    latencies: List[float] = []
+    statuses = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        remaining = itertools.islice(requests, total)
+
+        async def worker():
+            for path, body in remaining:
+                start = time.perf_counter()
+                try:
+                    if path.endswith("/stream"):
+                        async with client.stream("POST", path, json=body) as response:
+                            async for _ in response.aiter_bytes():
+                                pass
+                    else:
+                        response = await client.post(path, json=body)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, statuses, time.perf_counter() - start
+
+
+def wait_for_drain(base_url: str, timeout: float) -> float:
+    """Seconds until the bot's webhook queue has processed everything it accepted"""
+    start = time.perf_counter()
+    with httpx.Client(base_url=base_url, timeout=5) as client:
+        while time.perf_counter() - start < timeout:
+            queue = client.get("/health").json()["webhook_queue"]
+            if queue["depth"] == 0 and queue["processed"] + queue["errors"] >= queue["enqueued"]:
+                break
+            time.sleep(0.05)
+    return time.perf_counter() - start
+
+
+def stage_means(base_url: str, prefix: str) -> Dict[str, float]:
+    """Mean milliseconds per stage from the service's /metrics (empty if disabled)"""
+    response = httpx.get(f"{base_url}/metrics", timeout=5)
+    if response.status_code != 200:
+        return {}
+    sums, counts = {}, {}
+    for line in response.text.splitlines():
+        for suffix, target in (("_stage_seconds_sum", sums), ("_stage_seconds_count", counts)):
+            if line.startswith(f"{prefix}{suffix}{{"):
+                stage = line.split('stage="', 1)[1].split('"', 1)[0]
+                target[stage] = float(line.rsplit(" ", 1)[1])
+    return {stage: round(sums[stage] / counts[stage] * 1000, 3) for stage in sums if counts.get(stage)}
+
+
+def run(args) -> Dict[str, Any]:
+    app_path, prefix, ready_path = SERVICES[args.scenario]
+    gemini_port, graph_port, service_port = args.port + 1, args.port + 2, args.port
+    base_url = f"http://127.0.0.1:{service_port}"
+    processes = [
+        start_server("fakes.fake_gemini_api:app", gemini_port, {
+            "FAKE_GEMINI_LATENCY_MS": str(args.gemini_latency_ms),
+            "FAKE_GEMINI_CHUNK_MS": str(args.gemini_chunk_ms),
+            "FAKE_GEMINI_FAILURE_RATE": str(args.failure_rate),
+        }, args.verbose),
+        start_server("fakes.fake_graph_api:app", graph_port, {
+            "FAKE_GRAPH_LATENCY_MS": str(args.graph_latency_ms),
+            "FAKE_GRAPH_FAILURE_RATE": str(args.failure_rate),
+        }, args.verbose),
+    ]
+    try:
+        wait_until_ready(f"http://127.0.0.1:{gemini_port}/_stats", 30)
+        wait_until_ready(f"http://127.0.0.1:{graph_port}/_stats", 30)
+        service = start_server(app_path, service_port, {
+            "GEMINI_API_BASE": f"http://127.0.0.1:{gemini_port}",
+            "GEMINI_API_KEY": "loadtest",
+            "GRAPH_API_BASE": f"http://127.0.0.1:{graph_port}/v18.0",
+            "WHATSAPP_ACCESS_TOKEN": "loadtest",
+            "WHATSAPP_PHONE_NUMBER_ID": "loadtest",
+        }, args.verbose)
+        processes.append(service)
+        wait_until_ready(f"{base_url}{ready_path}", args.ready_timeout)
+
+        rng = random.Random(args.seed)
+        if args.scenario == "api":
+            traffic = api_requests(rng, args.stream_ratio)
+        else:
+            traffic = webhook_requests(rng, args.senders, args.redeliver, args.batch)
+
+        # Warm-up requests settle allocator pools and caches before the baseline
+        asyncio.run(drive(base_url, traffic, args.warmup, args.concurrency))
+        rss_start = rss_mb(service.pid)
+        latencies, statuses, elapsed = asyncio.run(drive(base_url, traffic, args.requests, args.concurrency))
+        drain_seconds = wait_for_drain(base_url, 120) if args.scenario == "webhook" else 0.0
+        rss_end = rss_mb(service.pid)
+
+        ms = np.asarray(latencies) * 1000
+        result = {
+            "commit": git_commit(),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scenario": args.scenario,
+            "requests": len(latencies),
+            "concurrency": args.concurrency,
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(float(np.percentile(ms, 50)), 2),
+            "p95_ms": round(float(np.percentile(ms, 95)), 2),
+            "p99_ms": round(float(np.percentile(ms, 99)), 2),
+            "statuses": {str(status): count for status, count in statuses.items()},
+            "rss_start_mb": round(rss_start, 1) if rss_start else None,
+            "rss_growth_mb": round(rss_end - rss_start, 1) if rss_start and rss_end else None,
+            "stage_mean_ms": stage_means(base_url, prefix),
+            "gemini_calls": httpx.get(f"http://127.0.0.1:{gemini_port}/_stats").json()["requests"],
+            "graph_sends": httpx.get(f"http://127.0.0.1:{graph_port}/_stats").json()["requests"],
+        }
+        if args.scenario == "webhook":
+            result["senders"] = args.senders
+            result["batch"] = args.batch
+            result["drain_seconds"] = round(drain_seconds, 2)
+            result["processed_per_second"] = round(len(latencies) * args.batch / (elapsed + drain_seconds), 1)
+        return result
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+def report(result: Dict[str, Any]) -> None:
+    print(f"{result['scenario']} @ {result['commit']}: {result['requests']} requests, {result['concurrency']} concurrent")
+    print(f"  throughput  {result['rps']:.1f} req/s")
+    print(f"  latency     p50 {result['p50_ms']:.2f} ms  p95 {result['p95_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms")
+    print(f"  statuses    {result['statuses']}")
+    print(f"  memory      {result['rss_start_mb']} MB at start, {result['rss_growth_mb']:+} MB over the run"
+          if result["rss_growth_mb"] is not None else "  memory      unavailable (no /proc)")
+    print(f"  upstream    {result['gemini_calls']} Gemini calls, {result['graph_sends']} Graph sends")
+    if "drain_seconds" in result:
+        print(f"  processing  queue drained {result['drain_seconds']:.2f}s after the last ack; "
+              f"{result['processed_per_second']:.1f} messages/s end to end")
+    for stage, mean in sorted(result["stage_mean_ms"].items()):
+        print(f"  stage       {stage:<16} {mean:9.3f} ms mean")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", choices=sorted(SERVICES))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--senders", type=int, default=200, help="webhook: simulated users")
+    parser.add_argument("--batch", type=int, default=1, help="webhook: messages per delivery")
+    parser.add_argument("--redeliver", type=float, default=0.02, help="webhook: share of duplicate deliveries")
+    parser.add_argument("--stream-ratio", type=float, default=0.2, help="api: share of /chat/stream requests")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800)
+    parser.add_argument("--gemini-chunk-ms", type=float, default=40)
+    parser.add_argument("--graph-latency-ms", type=float, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0, help="injected 429s from both fakes")
+    parser.add_argument("--port", type=int, default=9100, help="service port; the fakes use the next two")
+    parser.add_argument("--ready-timeout", type=float, default=180)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", help="append the result as a JSON line to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the servers' output")
+    args = parser.parse_args()
+
+    result = run(args)
+    report(result)
+    if args.results:
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
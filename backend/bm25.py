@@ -0,0 +1,136 @@
+"""
+Lexical (BM25) retrieval over the corpus chunks, and reciprocal-rank fusion with
+vector search.
+
+Dense search matches exact terms poorly: scheme names, IFSC-style codes, "NPCI
+mapper". BM25 over an inverted index catches those, and fusing both rankings with
+reciprocal-rank fusion (RRF: each list contributes 1 / (RRF_K + rank)) needs no score
+calibration between them.
+
+Tokenisation is the matcher's normalisation (NFC, case-folding, punctuation removal,
+Devanagari nukta/chandrabindu folding, Hinglish spelling variants), splitting on
+whitespace only so Devanagari vowel signs and viramas stay inside their words. Common
+Hindi domain words are mapped to the English terms the corpus uses, and English /
+Hindi / Hinglish function words are dropped.
+
+A lexical hit is "confident" when the best chunk contains every content term of the
+query, at least one of them is distinctive (high IDF), and it outscores the runner-up
+by BM25_CONFIDENT_MARGIN; such queries can skip the embedding step.
+"""
+import os
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from matcher import normalize_text
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+BM25_CONFIDENT_MARGIN = float(os.getenv("BM25_CONFIDENT_MARGIN", "1.3"))
+# A query term this rare is specific enough to trust an exact match on it
+BM25_CONFIDENT_MIN_IDF = float(os.getenv("BM25_CONFIDENT_MIN_IDF", "1.5"))
+
+STOPWORDS = frozenset(normalize_text(" ".join([
+    # English
+    "a an and are as at be by can do does for from how i if in is it its me my no not of on or",
+    "please should so that the their there this to was what when where which who why will with you your",
+    # Hinglish
+    "hai ka ki ke ko kya kaise kab kahan mera meri mere main mein se aur ya bhi",
+    # Hindi
+    "है हैं का की के को क्या कैसे कब कहाँ कहां मेरा मेरी मेरे मैं में से और या भी तो यह वह कृपया करें करे",
+])).split())
+
+# Hindi words in queries -> the English terms used in the corpus
+HINDI_TERMS = {normalize_text(hindi): english for hindi, english in {
+    "आधार": "aadhaar", "बैंक": "bank", "खाता": "account", "खाते": "account", "खातों": "account",
+    "छात्रवृत्ति": "scholarship", "स्कॉलरशिप": "scholarship", "सीडिंग": "seeding", "लिंक": "link",
+    "भुगतान": "payment", "पैसा": "payment", "आवेदन": "application", "स्थिति": "status",
+    "योजना": "scheme", "लाभ": "benefit", "प्रत्यक्ष": "direct", "हस्तांतरण": "transfer",
+    "पोर्टल": "portal", "सत्यापन": "verification", "संस्थान": "institute", "नवीनीकरण": "renewal",
+    "मैपर": "mapper", "एनपीसीआई": "npci", "डीबीटी": "dbt", "शाखा": "branch", "फॉर्म": "form",
+    "छात्र": "student", "दस्तावेज": "document", "सहमति": "consent", "मोबाइल": "mobile",
+    "जांच": "check", "जांचें": "check",
+}.items()}
+
+
+def _stem(token: str) -> str:
+    # English plurals only; Devanagari inflections are covered by HINDI_TERMS
+    if token.isascii() and len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalised, stopword-free index terms of a text"""
+    tokens = []
+    for token in normalize_text(text).split():
+        token = _stem(HINDI_TERMS.get(token, token))
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, texts: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        # term -> {doc id: term frequency}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: List[int] = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        count = len(self.doc_lengths)
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def query_terms(self, query: str) -> List[str]:
+        """Distinct query terms that occur in the index"""
+        return [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """(doc id, score) of the best-scoring documents, best first"""
+        scores: Dict[int, float] = {}
+        for term in self.query_terms(query):
+            idf = self.idf[term]
+            for doc_id, tf in self.postings[term].items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+
+    def is_confident(self, query: str, hits: List[Tuple[int, float]]) -> bool:
+        """True if the top hit is a clear, complete lexical match for the query"""
+        if not hits:
+            return False
+        terms = self.query_terms(query)
+        # Query words the corpus has never seen: BM25 saw only part of the question
+        if len(terms) < len(tokenize(query)) or not terms:
+            return False
+        top_id, top_score = hits[0]
+        if any(top_id not in self.postings[term] for term in terms):
+            return False
+        if max(self.idf[term] for term in terms) < BM25_CONFIDENT_MIN_IDF:
+            return False
+        runner_up = hits[1][1] if len(hits) > 1 else 0.0
+        return top_score >= BM25_CONFIDENT_MARGIN * runner_up
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = RRF_K, top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank), rank from 1"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    fused = sorted(scores.items(), key=lambda item: -item[1])
+    return fused[:top_k] if top_k is not None else fused
@@ -0,0 +1,209 @@
+"""
+Outbound WhatsApp broadcasts, e.g. status-change notifications.
+
+Business-initiated messages outside the 24-hour customer-service window must use a
+template approved in WhatsApp Manager; free-form text is rejected. Takes a recipients
+CSV (a `recipient` column with the WhatsApp number plus any columns the parameters
+use), the template name and its body parameters in str.format syntax, e.g. `--param
+"{student_id}" --param "{new_seeding_status}"` for a body like "Aadhaar seeding status
+of {{1}} is now {{2}}". A reconcile.py change set joined with a phone-number column is
+a valid recipients file.
+
+Sends run in parallel on a pool of async workers, paced by a token bucket to
+BROADCAST_RATE_PER_SECOND (retries included). Every outcome is appended (and flushed)
+to a JSONL log that doubles as the checkpoint: re-running the same command skips
+recipients that were already sent, so a crashed broadcast resumes where it stopped.
+
+Point GRAPH_API_BASE (or --graph-base) at fakes/fake_graph_api.py to test locally.
+
+Usage:
+    python broadcast.py recipients.csv --template dbt_status_update --language en \
+        --param "{student_id}" --param "{new_dbt_status}" --outcomes outcomes.jsonl --rate 20
+"""
+import os
+import csv
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from typing import Dict, Iterable, Optional, Sequence, Set
+
+from dotenv import load_dotenv
+
+from graph_client import GraphClient, TokenBucket, GRAPH_API_BASE
+from payloads import encode_payload
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_RATE_PER_SECOND = float(os.getenv("BROADCAST_RATE_PER_SECOND", "20"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "16"))
+
+
+def load_checkpoint(outcomes_path: str, retry_failed: bool = False) -> Set[str]:
+    """Recipients already handled by a previous run (only successes if retry_failed)"""
+    done: Set[str] = set()
+    if not os.path.exists(outcomes_path):
+        return done
+    with open(outcomes_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                outcome = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash; that recipient is simply retried
+                continue
+            if not isinstance(outcome, dict) or not isinstance(outcome.get("recipient"), str):
+                # Not one of our outcome lines (truncated, or another tool's log)
+                continue
+            if outcome.get("status") == "sent" or not retry_failed:
+                done.add(outcome["recipient"])
+    return done
+
+
+def ends_with_newline(path: str) -> bool:
+    """False if a crash left the outcome log ending in a partial line"""
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def read_recipients(path: str) -> Iterable[Dict[str, str]]:
+    """Stream recipient rows from a CSV with a `recipient` column"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if "recipient" not in (reader.fieldnames or ()):
+            raise ValueError(f"{path} has no 'recipient' column")
+        for row in reader:
+            row["recipient"] = (row["recipient"] or "").strip().lstrip("+")
+            if row["recipient"]:
+                yield row
+
+
+class Broadcaster:
+    """Parallel, resumable sender of one approved template message per recipient
+
+    Pacing is the client's: give it a TokenBucket rate_limiter.
+    """
+
+    def __init__(
+        self,
+        client: GraphClient,
+        template: str,
+        outcomes_path: str,
+        language: str = "en",
+        parameters: Sequence[str] = (),
+        concurrency: int = BROADCAST_CONCURRENCY,
+    ):
+        self.client = client
+        self.template = template
+        # Both in str.format syntax over the recipient's CSV row
+        self.language = language
+        self.parameters = list(parameters)
+        self.outcomes_path = outcomes_path
+        self.concurrency = concurrency
+        self.counts = Counter()
+
+    def render(self, row: Dict[str, str]) -> bytes:
+        template = {"name": self.template, "language": {"code": self.language.format(**row)}}
+        if self.parameters:
+            template["components"] = [{
+                "type": "body",
+                "parameters": [{"type": "text", "text": parameter.format(**row)} for parameter in self.parameters],
+            }]
+        return encode_payload(row["recipient"], {"type": "template", "template": template})
+
+    async def run(self, rows: Iterable[Dict[str, str]], retry_failed: bool = False) -> Counter:
+        done = load_checkpoint(self.outcomes_path, retry_failed)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        with open(self.outcomes_path, "a", encoding="utf-8") as outcomes:
+            if outcomes.tell() and not ends_with_newline(self.outcomes_path):
+                outcomes.write("\n")
+
+            def record(recipient: str, status: str, error: Optional[str] = None) -> None:
+                self.counts[status] += 1
+                outcomes.write(json.dumps({"recipient": recipient, "status": status, "error": error, "at": time.time()}) + "\n")
+                outcomes.flush()
+
+            async def worker():
+                while True:
+                    row = await queue.get()
+                    try:
+                        try:
+                            body = self.render(row)
+                        except (KeyError, IndexError, ValueError) as e:
+                            record(row["recipient"], "failed", f"template error: {e!r}")
+                            continue
+                        ok, error = await self.client.deliver(row["recipient"], body)
+                        record(row["recipient"], "sent" if ok else "failed", error)
+                    except Exception as e:
+                        # A worker that died here would leave queue.join() waiting forever
+                        logger.exception(f"Error sending to {row['recipient']}")
+                        record(row["recipient"], "failed", repr(e))
+                    finally:
+                        queue.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                for row in rows:
+                    if row["recipient"] in done:
+                        self.counts["skipped"] += 1
+                        continue
+                    # One message per recipient, even if the list repeats a number
+                    done.add(row["recipient"])
+                    await queue.put(row)
+                await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        return self.counts
+
+
+async def run_broadcast(args) -> Counter:
+    client = GraphClient(
+        os.getenv("WHATSAPP_ACCESS_TOKEN"),
+        os.getenv("WHATSAPP_PHONE_NUMBER_ID"),
+        base_url=args.graph_base,
+        max_concurrency=args.concurrency,
+        rate_limiter=TokenBucket(args.rate),
+    )
+    broadcaster = Broadcaster(client, args.template, args.outcomes, args.language, args.param, args.concurrency)
+    try:
+        return await broadcaster.run(read_recipients(args.recipients), args.retry_failed)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recipients", help="CSV with a 'recipient' column and the parameters' fields")
+    parser.add_argument("--template", required=True, help="name of an approved WhatsApp message template")
+    parser.add_argument("--language", default="en", help="template language code, e.g. en, hi or {language}")
+    parser.add_argument("--param", action="append", default=[],
+                        help="body parameter in str.format syntax, in {{1}}, {{2}}, ... order; repeatable")
+    parser.add_argument("--outcomes", default="broadcast_outcomes.jsonl", help="per-recipient outcome log / checkpoint")
+    parser.add_argument("--rate", type=float, default=BROADCAST_RATE_PER_SECOND, help="messages per second")
+    parser.add_argument("--concurrency", type=int, default=BROADCAST_CONCURRENCY)
+    parser.add_argument("--retry-failed", action="store_true", help="resend to recipients whose last attempt failed")
+    parser.add_argument("--graph-base", default=GRAPH_API_BASE)
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    try:
+        counts = asyncio.run(run_broadcast(args))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    attempted = counts["sent"] + counts["failed"]
+    print(f"Broadcast finished in {elapsed:.1f}s: {counts['sent']} sent, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped (already handled); {attempted / max(elapsed, 1e-9):.1f} msg/s")
+    print(f"Per-recipient outcomes: {args.outcomes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Offline build of the retrieval index.
+
+Chunks the corpus files in backend/, embeds the chunks with sentence-transformers
+in batches, and writes:
+  - dbt_index.pkl         (IndexFlatL2, chunk_texts) as loaded by retrieval.py
+  - dbt_chunks.json       chunk id -> text/source/offset/hash sidecar
+  - dbt_manifest.json     build settings and content hash -> embedding row
+  - dbt_embeddings.npy    embedding cache reused by incremental rebuilds
+  - dbt_index.faiss       memory-mappable index, only with --mmap-kind (see vector_store.py)
+  - dbt_faiss_chunks.json chunk sidecar of dbt_index.faiss, written with it
+
+Usage:
+    python build_index.py                # incremental: only changed chunks are re-embedded
+    python build_index.py --full         # ignore the manifest and re-embed everything
+    python build_index.py --mmap-kind ivf
+"""
+import os
+import json
+import pickle
+import hashlib
+import argparse
+import logging
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+import faiss
+from sentence_transformers import SentenceTransformer
+
+from retrieval import BASE_DIR, EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP, load_corpus_chunks
+from vector_store import (
+    INDEX_PATH, INDEX_KINDS, VECTOR_INDEX_PATH, build_index as build_vector_index, write_index, sidecar_paths,
+    write_chunk_metadata,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash used to decide whether a chunk needs re-embedding"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_previous(paths: Dict[str, str], model_name: str) -> Tuple[Dict[str, int], np.ndarray]:
+    """Load the embedding cache from an earlier build, if it is compatible"""
+    if not (os.path.exists(paths["manifest"]) and os.path.exists(paths["embeddings"])):
+        return {}, None
+    with open(paths["manifest"], encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("model") != model_name:
+        logger.info("Manifest was built with different settings; doing a full rebuild")
+        return {}, None
+    return manifest.get("hashes", {}), np.load(paths["embeddings"])
+
+
+def embed_chunks(
+    chunks: List[Dict[str, Any]],
+    model_name: str,
+    previous: Dict[str, int],
+    cached: np.ndarray,
+    batch_size: int,
+) -> np.ndarray:
+    """Embed chunks, reusing cached vectors for unchanged content"""
+    hashes = [c["hash"] for c in chunks]
+    missing = [h for h in dict.fromkeys(hashes) if h not in previous]
+    logger.info(f"{len(chunks)} chunks, {len(chunks) - len(missing)} reused, {len(missing)} to embed")
+
+    fresh = {}
+    if missing:
+        model = SentenceTransformer(model_name)
+        texts = {c["hash"]: c["text"] for c in chunks}
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = model.encode([texts[h] for h in batch], batch_size=batch_size)
+            for h, vector in zip(batch, vectors):
+                fresh[h] = np.asarray(vector, dtype="float32")
+            logger.info(f"Embedded {min(start + batch_size, len(missing))}/{len(missing)}")
+
+    rows = [fresh[h] if h in fresh else cached[previous[h]] for h in hashes]
+    return np.vstack(rows).astype("float32")
+
+
+def build(output: str, model_name: str, batch_size: int, full: bool, mmap_kind: Optional[str] = None,
+          mmap_output: Optional[str] = None) -> None:
+    """Build the index and sidecars at output, and the memory-mapped index at mmap_output"""
+    paths = sidecar_paths(output)
+    chunks = load_corpus_chunks(BASE_DIR)
+    if not chunks:
+        raise SystemExit("No corpus chunks found; nothing to index")
+    for i, chunk in enumerate(chunks):
+        chunk["id"] = i
+        chunk["hash"] = chunk_hash(chunk["text"])
+
+    previous, cached = ({}, None) if full else load_previous(paths, model_name)
+    embeddings = embed_chunks(chunks, model_name, previous, cached, batch_size)
+
+    index = faiss.IndexFlatL2(embeddings.shape[1])
+    index.add(embeddings)
+
+    with open(output, "wb") as f:
+        pickle.dump((index, [c["text"] for c in chunks]), f)
+    write_chunk_metadata(chunks, output)
+    np.save(paths["embeddings"], embeddings)
+    with open(paths["manifest"], "w", encoding="utf-8") as f:
+        json.dump({
+            "version": MANIFEST_VERSION,
+            "model": model_name,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "dimension": int(embeddings.shape[1]),
+            "hashes": {c["hash"]: c["id"] for c in chunks},
+        }, f, indent=1)
+
+    logger.info(f"Wrote {index.ntotal} vectors to {output}")
+
+    mmap_output = mmap_output or os.path.splitext(output)[0] + ".faiss"
+    if mmap_kind:
+        write_index(build_vector_index(embeddings, mmap_kind), mmap_output)
+        write_chunk_metadata(chunks, mmap_output)
+        logger.info(f"Wrote {mmap_kind} index to {mmap_output}")
+    elif os.path.exists(mmap_output):
+        logger.warning(f"{mmap_output} is from an earlier build and is ignored until rebuilt with --mmap-kind")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the DBT Dost retrieval index")
+    parser.add_argument("--output", default=INDEX_PATH)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--full", action="store_true", help="re-embed every chunk")
+    parser.add_argument("--mmap-kind", choices=INDEX_KINDS, help="also write the memory-mapped index")
+    parser.add_argument("--mmap-output", help="memory-mapped index path (default: VECTOR_INDEX_PATH, "
+                        "or next to --output when that is given)")
+    args = parser.parse_args()
+    mmap_output = args.mmap_output or (VECTOR_INDEX_PATH if args.output == INDEX_PATH else None)
+    build(args.output, args.model, args.batch_size, args.full, args.mmap_kind, mmap_output)
+
+
+if __name__ == "__main__":
+    main()
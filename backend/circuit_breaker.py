@@ -0,0 +1,172 @@
+"""
+Circuit breaker around an unreliable upstream (the Gemini API).
+
+During an upstream brownout every request still waits for its call to fail or time out,
+and the retries add load to an upstream that is already struggling. The breaker keeps
+a rolling window of recent calls (BREAKER_WINDOW_SECONDS) with their outcome and
+latency, and trips when, over at least BREAKER_MIN_CALLS calls, either
+  - the share of failed calls reaches BREAKER_ERROR_RATE, or
+  - the share of slow calls (BREAKER_SLOW_CALL_SECONDS or longer, failures included)
+    reaches BREAKER_SLOW_RATE.
+While open, calls are refused at once with CircuitOpenError so the caller can serve a
+fallback. After BREAKER_OPEN_SECONDS it is half-open: up to BREAKER_HALF_OPEN_PROBES
+calls go through as probes; a fast success closes it again, a failure or slow call
+re-opens it for another cool-down.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "30"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "6"))
+BREAKER_SLOW_RATE = float(os.getenv("BREAKER_SLOW_RATE", "0.5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "20"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The breaker is open; the call was not attempted"""
+
+
+class CircuitBreaker:
+    """Rolling error-rate and latency circuit breaker for one upstream"""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = BREAKER_WINDOW_SECONDS,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        slow_rate: float = BREAKER_SLOW_RATE,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_probes: int = BREAKER_HALF_OPEN_PROBES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        # (finished at, duration, failed) of the calls in the window, oldest first
+        self._calls: Deque[Tuple[float, float, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.stats_counts = {"calls": 0, "failures": 0, "slow": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+            logger.info(f"Circuit {self.name} half-open: probing")
+        return self._state
+
+    def _is_slow(self, duration: float, failed: bool) -> bool:
+        return failed or duration >= self.slow_call_seconds
+
+    def _evict(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            _, duration, failed = self._calls.popleft()
+            self._failures -= failed
+            self._slow -= self._is_slow(duration, failed)
+
+    def _open(self, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self.stats_counts["opened"] += 1
+        logger.warning(f"Circuit {self.name} open for {self.open_seconds:.0f}s: {reason}")
+
+    def _admit(self) -> bool:
+        """Claim permission for one call; returns whether it is a half-open probe"""
+        state = self.state
+        if state == CLOSED:
+            return False
+        if state == HALF_OPEN and self._probes < self.half_open_probes:
+            self._probes += 1
+            return True
+        self.stats_counts["rejected"] += 1
+        raise CircuitOpenError(f"Circuit {self.name} is open")
+
+    def record(self, duration: float, failed: bool, probe: bool = False) -> None:
+        """Add one finished call to the window and trip or reset the breaker"""
+        slow = self._is_slow(duration, failed)
+        self.stats_counts["calls"] += 1
+        self.stats_counts["failures"] += failed
+        self.stats_counts["slow"] += slow
+        if probe:
+            self._probes -= 1
+            if self._state != HALF_OPEN:
+                return
+            if slow:
+                self._open(f"probe {'failed' if failed else 'slow'} ({duration:.2f}s)")
+            else:
+                # Upstream recovered: start over with an empty window
+                self._state = CLOSED
+                self._calls.clear()
+                self._failures = self._slow = 0
+                logger.info(f"Circuit {self.name} closed")
+            return
+
+        now = self._clock()
+        self._calls.append((now, duration, failed))
+        self._failures += failed
+        self._slow += slow
+        self._evict(now)
+        calls = len(self._calls)
+        if self._state != CLOSED or calls < self.min_calls:
+            return
+        if self._failures / calls >= self.error_rate:
+            self._open(f"{self._failures}/{calls} calls failed in the last {self.window_seconds:.0f}s")
+        elif self._slow / calls >= self.slow_rate:
+            self._open(f"{self._slow}/{calls} calls slower than {self.slow_call_seconds:.1f}s")
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run the block as one call: raises CircuitOpenError if open, else records its outcome
+
+        A cancelled block (e.g. a client disconnect) is not held against the upstream.
+        """
+        probe = self._admit()
+        start = self._clock()
+        try:
+            yield
+        except asyncio.CancelledError:
+            if probe:
+                self._probes -= 1
+            raise
+        except Exception:
+            self.record(self._clock() - start, True, probe)
+            raise
+        self.record(self._clock() - start, False, probe)
+
+    def stats(self) -> Dict[str, Any]:
+        self._evict(self._clock())
+        calls = len(self._calls)
+        durations = sorted(duration for _, duration, _ in self._calls)
+        return {
+            "state": self.state,
+            **self.stats_counts,
+            "window_calls": calls,
+            "window_error_rate": round(self._failures / calls, 3) if calls else 0,
+            "window_slow_rate": round(self._slow / calls, 3) if calls else 0,
+            "window_p50_seconds": round(durations[calls // 2], 3) if calls else None,
+            "window_p95_seconds": round(durations[min(calls - 1, calls * 95 // 100)], 3) if calls else None,
+        }
@@ -0,0 +1,101 @@
+"""
+Time-bounded index of WhatsApp message ids that were already accepted.
+
+Meta redelivers a webhook when our ack is slow, so the same message id can arrive
+several times. The in-process index keeps two rotating generations of ids: a new id
+goes into the current generation, and generations rotate every DEDUP_WINDOW_SECONDS,
+so each id is remembered for between one and two windows with memory bounded by the
+traffic of two windows (and by DEDUP_MAX_IDS per generation).
+
+With several workers behind a load balancer, DEDUP_BACKEND=redis shares the index via
+SET NX EX on any Redis-compatible server.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+DEDUP_BACKEND = os.getenv("DEDUP_BACKEND", "memory")
+DEDUP_WINDOW_SECONDS = int(os.getenv("DEDUP_WINDOW_SECONDS", "600"))
+DEDUP_MAX_IDS = int(os.getenv("DEDUP_MAX_IDS", "200000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class SeenMessageIndex:
+    """Rotating two-generation set of recently seen message ids"""
+
+    def __init__(self, window: int = DEDUP_WINDOW_SECONDS, max_ids: int = DEDUP_MAX_IDS):
+        self.window = window
+        self.max_ids = max_ids
+        self._current = set()
+        self._previous = set()
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.suppressed = 0
+
+    def check_and_add(self, message_id: str) -> bool:
+        """Record a message id; returns True if it was already seen (a duplicate)"""
+        with self._lock:
+            self.checked += 1
+            now = time.monotonic()
+            if now - self._rotated_at >= self.window or len(self._current) >= self.max_ids:
+                self._previous = self._current
+                self._current = set()
+                self._rotated_at = now
+            if message_id in self._current or message_id in self._previous:
+                self.suppressed += 1
+                return True
+            self._current.add(message_id)
+            return False
+
+    def discard(self, message_id: str) -> None:
+        """Forget an id, e.g. when the delivery was rejected and will be retried"""
+        with self._lock:
+            self._current.discard(message_id)
+            self._previous.discard(message_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "checked": self.checked,
+            "suppressed": self.suppressed,
+            "tracked_ids": len(self._current) + len(self._previous),
+        }
+
+
+class RedisSeenMessageIndex:
+    """Shared seen-id index using SET NX with the window as expiry"""
+
+    def __init__(self, client=None, window: int = DEDUP_WINDOW_SECONDS, prefix: str = "dbt:seen:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(REDIS_URL)
+        self.client = client
+        self.window = window
+        self.prefix = prefix
+        self.checked = 0
+        self.suppressed = 0
+
+    def check_and_add(self, message_id: str) -> bool:
+        self.checked += 1
+        # SET NX returns a falsy value when the key already exists
+        if self.client.set(self.prefix + message_id, 1, nx=True, ex=self.window):
+            return False
+        self.suppressed += 1
+        return True
+
+    def discard(self, message_id: str) -> None:
+        self.client.delete(self.prefix + message_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {"checked": self.checked, "suppressed": self.suppressed}
+
+
+def create_seen_index():
+    """Build the index configured by DEDUP_BACKEND"""
+    index = RedisSeenMessageIndex() if DEDUP_BACKEND == "redis" else SeenMessageIndex()
+    logger.info(f"Webhook dedup using {type(index).__name__} ({DEDUP_WINDOW_SECONDS}s window)")
+    return index
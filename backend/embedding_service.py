@@ -0,0 +1,147 @@
+"""
+Micro-batching query encoder.
+
+Concurrent requests each want one query embedded; encoding them one at a time wastes
+most of the BLAS throughput of a forward pass. BatchingEncoder collects the queries
+that arrive within EMBED_MAX_WAIT_MS (up to EMBED_MAX_BATCH), encodes them in a
+single call on a dedicated worker thread and fans the vectors back out to the
+awaiting requests. While a batch is encoding, new queries accumulate and go out as
+the next batch the moment it finishes, so batches grow with load. Embeddings of
+recent queries are kept in an LRU cache, and identical queries already waiting
+share one slot in the batch.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "2"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+
+
+def cache_key(text: str) -> str:
+    """Queries differing only in case or spacing embed identically with the uncased model"""
+    return " ".join(text.lower().split())
+
+
+class BatchingEncoder:
+    """Async front end that batches single-query encode calls"""
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], np.ndarray],
+        max_batch: int = EMBED_MAX_BATCH,
+        max_wait_ms: float = EMBED_MAX_WAIT_MS,
+        cache_size: int = EMBED_CACHE_SIZE,
+    ):
+        self.encode_batch = encode_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # key -> shared future for queries queued or being encoded; _pending is the queue
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._pending: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._busy = False
+        # One thread: batches run back to back and the next one fills up meanwhile
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self.stats_counts = {"requests": 0, "cache_hits": 0, "coalesced": 0, "batches": 0, "encoded": 0}
+        self._encode_seconds = 0.0
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Embedding of one query (a 1-D float32 vector)"""
+        key = cache_key(text)
+        self.stats_counts["requests"] += 1
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+            self.stats_counts["cache_hits"] += 1
+            return vector
+
+        future = self._futures.get(key)
+        if future is not None:
+            self.stats_counts["coalesced"] += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[key] = future
+            self._pending.append(key)
+            # While a batch is encoding, new queries wait for it and form the next one
+            if not self._busy:
+                if len(self._pending) >= self.max_batch:
+                    self._flush()
+                elif self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        # shield: one cancelled request must not cancel the shared result
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._busy or not self._pending:
+            return
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self._busy = True
+        asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    def _timed_encode(self, texts: List[str]) -> Tuple[np.ndarray, float]:
+        start = time.perf_counter()
+        vectors = np.asarray(self.encode_batch(texts), dtype="float32")
+        return vectors, time.perf_counter() - start
+
+    async def _run_batch(self, batch: List[str]) -> None:
+        try:
+            vectors, seconds = await asyncio.get_running_loop().run_in_executor(self._executor, self._timed_encode, batch)
+        except Exception as e:
+            logger.error(f"Error encoding batch of {len(batch)} queries: {e}")
+            for key in batch:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.stats_counts["batches"] += 1
+            self.stats_counts["encoded"] += len(batch)
+            self._encode_seconds += seconds
+            for key, vector in zip(batch, vectors):
+                self._remember(key, vector)
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_result(vector)
+        finally:
+            self._busy = False
+            # Queries that arrived meanwhile have already waited a whole batch
+            self._flush()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @property
+    def depth(self) -> int:
+        """Queries waiting for the next batch"""
+        return len(self._pending)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, float]:
+        batches = self.stats_counts["batches"]
+        return {
+            **self.stats_counts,
+            "mean_batch_size": round(self.stats_counts["encoded"] / batches, 2) if batches else 0,
+            "mean_batch_ms": round(self._encode_seconds / batches * 1000, 2) if batches else 0,
+            "cache_entries": len(self._cache),
+        }
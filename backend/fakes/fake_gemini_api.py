@@ -0,0 +1,109 @@
+"""
+Local stand-in for the Gemini REST API (generateContent and streamGenerateContent).
+
+Answers every prompt with a canned reply after a configurable latency, streams it as
+server-sent events in FAKE_GEMINI_CHUNKS pieces, reports usageMetadata, and can inject
+429/5xx failures, so the API can be load-tested without spending quota.
+
+Usage:
+    FAKE_GEMINI_LATENCY_MS=800 FAKE_GEMINI_CHUNK_MS=40 uvicorn fakes.fake_gemini_api:app --port 9002
+    GEMINI_API_BASE=http://localhost:9002 GEMINI_API_KEY=fake uvicorn backend-api-local:app
+"""
+import os
+import json
+import random
+import asyncio
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Time to the first byte (the whole response when not streaming)
+LATENCY_MS = float(os.getenv("FAKE_GEMINI_LATENCY_MS", "0"))
+# Delay between streamed chunks
+CHUNK_MS = float(os.getenv("FAKE_GEMINI_CHUNK_MS", "0"))
+CHUNKS = int(os.getenv("FAKE_GEMINI_CHUNKS", "8"))
+FAILURE_RATE = float(os.getenv("FAKE_GEMINI_FAILURE_RATE", "0"))
+FAILURE_STATUS = int(os.getenv("FAKE_GEMINI_FAILURE_STATUS", "429"))
+
+ANSWER = (
+    "To receive DBT benefits, your Aadhaar number must be seeded with your bank account "
+    "and mapped on the NPCI mapper. Visit your bank branch with your Aadhaar card and "
+    "passbook, submit the Aadhaar seeding consent form, and check the status after a few "
+    "working days. Contact the support team if the status does not update."
+)
+
+app = FastAPI(title="Fake Gemini API")
+
+stats = {"requests": 0, "streams": 0, "failures_injected": 0, "prompt_chars": 0}
+
+
+def _prompt(body: Dict[str, Any]) -> str:
+    return "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+
+
+def _response(text: str, prompt: str, final: bool = True) -> Dict[str, Any]:
+    data: Dict[str, Any] = {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}],
+    }
+    if final:
+        data["candidates"][0]["finishReason"] = "STOP"
+        data["usageMetadata"] = {
+            "promptTokenCount": len(prompt) // 4,
+            "candidatesTokenCount": len(ANSWER) // 4,
+            "totalTokenCount": (len(prompt) + len(ANSWER)) // 4,
+        }
+    return data
+
+
+async def _accept(request: Request):
+    """Parse the request and apply latency / failure injection; returns (prompt, error response)"""
+    stats["requests"] += 1
+    body = json.loads(await request.body())
+    prompt = _prompt(body)
+    stats["prompt_chars"] += len(prompt)
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        stats["failures_injected"] += 1
+        error = JSONResponse(
+            {"error": {"code": FAILURE_STATUS, "message": "Injected failure", "status": "UNAVAILABLE"}},
+            status_code=FAILURE_STATUS,
+        )
+        return prompt, error
+    return prompt, None
+
+
+@app.post("/{version}/models/{model}:generateContent")
+async def generate_content(version: str, model: str, request: Request):
+    prompt, error = await _accept(request)
+    return error or _response(ANSWER, prompt)
+
+
+@app.post("/{version}/models/{model}:streamGenerateContent")
+async def stream_generate_content(version: str, model: str, request: Request):
+    prompt, error = await _accept(request)
+    if error:
+        return error
+    stats["streams"] += 1
+    size = -(-len(ANSWER) // max(1, CHUNKS))
+    pieces = [ANSWER[i:i + size] for i in range(0, len(ANSWER), size)]
+
+    async def events():
+        for i, piece in enumerate(pieces):
+            if i and CHUNK_MS:
+                await asyncio.sleep(CHUNK_MS / 1000)
+            yield f"data: {json.dumps(_response(piece, prompt, final=i == len(pieces) - 1))}\r\n\r\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/_stats")
+async def get_stats():
+    return stats
+
+
+@app.delete("/_stats")
+async def reset_stats():
+    stats.update(requests=0, streams=0, failures_injected=0, prompt_chars=0)
+    return {"status": "cleared"}
@@ -0,0 +1,92 @@
+"""
+Local stand-in for the WhatsApp Cloud API messages endpoint.
+
+Records every message it receives and can inject latency and 429/5xx failures, so
+the outbound client, broadcasts and load tests run without Meta credentials. Failures
+are random (FAKE_GRAPH_FAILURE_RATE) or scripted: POST /_failures?count=2&status=429
+makes the next two requests fail.
+
+Usage:
+    FAKE_GRAPH_LATENCY_MS=50 FAKE_GRAPH_FAILURE_RATE=0.1 uvicorn fakes.fake_graph_api:app --port 9001
+    GRAPH_API_BASE=http://localhost:9001/v18.0 python whatsapp_bot.py
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import itertools
+from typing import List, Dict, Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_MS = float(os.getenv("FAKE_GRAPH_LATENCY_MS", "0"))
+FAILURE_RATE = float(os.getenv("FAKE_GRAPH_FAILURE_RATE", "0"))
+FAILURE_STATUS = int(os.getenv("FAKE_GRAPH_FAILURE_STATUS", "429"))
+
+app = FastAPI(title="Fake WhatsApp Graph API")
+
+received: List[Dict[str, Any]] = []
+_message_ids = itertools.count(1)
+stats = {"requests": 0, "failures_injected": 0}
+# Failures for the next requests, set by POST /_failures
+scripted_failures = {"count": 0, "status": FAILURE_STATUS}
+
+
+def _failure(status: int) -> JSONResponse:
+    stats["failures_injected"] += 1
+    return JSONResponse(
+        {"error": {"message": "Injected failure", "code": status}},
+        status_code=status,
+        headers={"Retry-After": "0"},
+    )
+
+
+@app.post("/{version}/{phone_number_id}/messages")
+async def send_message(version: str, phone_number_id: str, request: Request):
+    """Accept a message like the Cloud API does, after optional latency / failure injection"""
+    stats["requests"] += 1
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    if scripted_failures["count"]:
+        scripted_failures["count"] -= 1
+        return _failure(scripted_failures["status"])
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        return _failure(FAILURE_STATUS)
+
+    payload = json.loads(await request.body())
+    message_id = f"wamid.fake{next(_message_ids)}"
+    received.append({"id": message_id, "received_at": time.time(), "phone_number_id": phone_number_id, **payload})
+    return {
+        "messaging_product": "whatsapp",
+        "contacts": [{"input": payload.get("to"), "wa_id": payload.get("to")}],
+        "messages": [{"id": message_id}],
+    }
+
+
+@app.get("/_messages")
+async def list_messages(to: str = None):
+    """Messages received so far, optionally filtered by recipient"""
+    return [m for m in received if to is None or m.get("to") == to]
+
+
+@app.delete("/_messages")
+async def reset_messages():
+    """Forget recorded messages and counters"""
+    received.clear()
+    stats.update(requests=0, failures_injected=0)
+    scripted_failures.update(count=0, status=FAILURE_STATUS)
+    return {"status": "cleared"}
+
+
+@app.post("/_failures")
+async def script_failures(count: int = 1, status: int = FAILURE_STATUS):
+    """Fail the next `count` message requests with `status`"""
+    scripted_failures.update(count=count, status=status)
+    return scripted_failures
+
+
+@app.get("/_stats")
+async def get_stats():
+    return {**stats, "messages": len(received)}
@@ -0,0 +1,52 @@
+"""
+In-process stand-in for the part of the redis-py client the Redis backends use.
+
+A dict of key -> (value, expiry) with lazy expiry on an injectable clock, so
+answer_cache.RedisBackend and session_store.RedisSessionStore can be tested without
+a server. Like redis-py's default client, values and scanned keys come back as bytes.
+"""
+import time
+import fnmatch
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+
+class FakeRedis:
+    """get / set(ex=) / expire / delete / dbsize / scan_iter over a dict"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _live(self, key: str) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        if entry[1] is not None and entry[1] <= self._clock():
+            del self._data[key]
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._data[key][0] if self._live(key) else None
+
+    def set(self, key: str, value: Union[str, bytes], ex: Optional[float] = None) -> bool:
+        raw = value.encode("utf-8") if isinstance(value, str) else value
+        self._data[key] = (raw, self._clock() + ex if ex is not None else None)
+        return True
+
+    def expire(self, key: str, seconds: float) -> bool:
+        if not self._live(key):
+            return False
+        self._data[key] = (self._data[key][0], self._clock() + seconds)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def dbsize(self) -> int:
+        return sum(self._live(key) for key in list(self._data))
+
+    def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None) -> Iterator[bytes]:
+        for key in list(self._data):
+            if self._live(key) and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key.encode("utf-8")
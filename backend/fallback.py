@@ -0,0 +1,118 @@
+"""
+Extractive answers for when Gemini cannot answer in time.
+
+When the circuit breaker around Gemini is open, or a request misses its deadline, the
+API answers from material it already has instead of apologising:
+  1. the FAQ_DATA / KNOWLEDGE_BASE entry in the user's language that best matches the
+     question, if it contains at least FALLBACK_FAQ_MIN_COVERAGE of the question's
+     terms (a curated answer reads better than excerpts; FAQ_DATA is English only);
+  2. otherwise the sentences of the top FALLBACK_CHUNKS retrieved chunks that share
+     the most IDF-weighted terms with the question, in document order, up to
+     FALLBACK_MAX_CHARS;
+  3. otherwise the best-matching FAQ entry in the user's language, however weak.
+Everything is local and takes well under a millisecond.
+"""
+import os
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from bm25 import BM25Index, tokenize
+from knowledge import FAQ_DATA, KNOWLEDGE_BASE
+
+FALLBACK_MAX_CHARS = int(os.getenv("FALLBACK_MAX_CHARS", "700"))
+FALLBACK_CHUNKS = int(os.getenv("FALLBACK_CHUNKS", "3"))
+FALLBACK_FAQ_MIN_COVERAGE = float(os.getenv("FALLBACK_FAQ_MIN_COVERAGE", "0.6"))
+# Headings and list markers ("Step-1:", "2.") say nothing on their own
+MIN_SENTENCE_CHARS = 25
+
+INTRO = {
+    "en": "I can't reach the AI assistant right now, so here is the most relevant information from the official guidelines:",
+    "hi": "अभी एआई सहायक उपलब्ध नहीं है, इसलिए आधिकारिक दिशानिर्देशों से सबसे प्रासंगिक जानकारी यहाँ दी गई है:",
+}
+OUTRO = {
+    "en": "For more help, please contact the support team.",
+    "hi": "अधिक सहायता के लिए कृपया सहायता टीम से संपर्क करें।",
+}
+
+SENTENCE_END = re.compile(r"(?<=[.?!।])\s+")
+
+# --- FAQ Index ---
+# (language, answer) per entry, and a BM25 index over question + answer; built once at import
+FAQ_ENTRIES: List[Tuple[str, str]] = []
+_faq_texts: List[str] = []
+for _category in FAQ_DATA.values():
+    for _item in _category["questions"]:
+        # FAQ_DATA is written in English only
+        FAQ_ENTRIES.append(("en", _item["answer"]))
+        _faq_texts.append(f"{_item['question']} {_item['answer']}")
+for _lang, _intents in KNOWLEDGE_BASE.items():
+    for _intent in _intents.values():
+        FAQ_ENTRIES.append((_lang, _intent["answer"]))
+        _faq_texts.append(" ".join(_intent["keywords"]) + " " + _intent["answer"])
+FAQ_INDEX = BM25Index(_faq_texts)
+FAQ_TERMS = [set(tokenize(text)) for text in _faq_texts]
+
+
+def best_faq_answer(query: str, language: str) -> Tuple[Optional[str], float]:
+    """Best FAQ / KNOWLEDGE_BASE answer in the language for the query and the share of query terms it contains"""
+    terms = set(tokenize(query))
+    if not terms:
+        return None, 0.0
+    # Every entry: the best matches may all be in another language
+    for entry_id, _ in FAQ_INDEX.search(query, len(FAQ_ENTRIES)):
+        entry_language, answer = FAQ_ENTRIES[entry_id]
+        if entry_language == language:
+            return answer, len(terms & FAQ_TERMS[entry_id]) / len(terms)
+    return None, 0.0
+
+
+# --- Chunk Extraction ---
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a chunk, with PDF line breaks folded into spaces"""
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        sentences.extend(SENTENCE_END.split(" ".join(paragraph.split())))
+    return [sentence for sentence in sentences if len(sentence) >= MIN_SENTENCE_CHARS]
+
+
+def extract_sentences(query: str, chunks: List[Dict[str, Any]], idf: Optional[Mapping[str, float]] = None,
+                      max_chars: int = FALLBACK_MAX_CHARS) -> List[str]:
+    """Sentences of the top chunks that best cover the query's terms, in document order"""
+    terms = set(tokenize(query))
+    candidates = []
+    for rank, chunk in enumerate(chunks[:FALLBACK_CHUNKS]):
+        for position, sentence in enumerate(split_sentences(chunk["text"])):
+            matched = terms.intersection(tokenize(sentence))
+            score = sum(idf.get(term, 1.0) if idf else 1.0 for term in matched)
+            candidates.append((score, rank, position, sentence))
+    if any(candidate[0] for candidate in candidates):
+        candidates = [candidate for candidate in candidates if candidate[0]]
+    else:
+        # Nothing matches word for word: the top chunk is still the retriever's best guess
+        candidates = [candidate for candidate in candidates if candidate[1] == 0]
+
+    picked, seen, length = [], set(), 0
+    for score, rank, position, sentence in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        key = sentence.lower()
+        # Overlapping chunks repeat sentences
+        if key in seen or (picked and length + len(sentence) > max_chars):
+            continue
+        seen.add(key)
+        if len(sentence) > max_chars:
+            sentence = sentence[:max_chars].rsplit(" ", 1)[0] + " ..."
+        picked.append((rank, position, sentence))
+        length += len(sentence) + 1
+    return [sentence for _, _, sentence in sorted(picked)]
+
+
+def extractive_answer(query: str, language: str, chunks: List[Dict[str, Any]],
+                      idf: Optional[Mapping[str, float]] = None) -> Optional[str]:
+    """Answer built without the LLM from the FAQ tables or the retrieved chunks; None if nothing fits"""
+    faq_answer, coverage = best_faq_answer(query, language)
+    if faq_answer and coverage >= FALLBACK_FAQ_MIN_COVERAGE:
+        return faq_answer
+    sentences = extract_sentences(query, chunks, idf)
+    if sentences:
+        intro, outro = INTRO.get(language, INTRO["en"]), OUTRO.get(language, OUTRO["en"])
+        return intro + "\n\n" + "\n".join(sentences) + "\n\n" + outro
+    return faq_answer
@@ -0,0 +1,87 @@
+"""
+Gemini over the REST API with a pooled httpx client.
+
+Used instead of the google-generativeai SDK when GEMINI_API_BASE is set, e.g. to point
+the API at fakes/fake_gemini_api.py for offline load tests (the SDK's async client
+only speaks gRPC). GeminiRestModel mirrors the part of GenerativeModel the API uses:
+generate_content_async(prompt, stream=..., generation_config=...) returning responses
+with .text and .usage_metadata.
+"""
+import os
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "")
+GEMINI_REST_MAX_CONNECTIONS = int(os.getenv("GEMINI_REST_MAX_CONNECTIONS", "64"))
+
+
+class GeminiRestError(Exception):
+    """Non-2xx response from the Gemini REST API"""
+
+
+class RestResponse:
+    """One generateContent response (or one streamed chunk)"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        usage = data.get("usageMetadata")
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=usage.get("promptTokenCount", 0),
+            candidates_token_count=usage.get("candidatesTokenCount", 0),
+        ) if usage else None
+
+    @property
+    def text(self) -> str:
+        candidates = self.data.get("candidates") or [{}]
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+
+def _camel(key: str) -> str:
+    head, *rest = key.split("_")
+    return head + "".join(word.title() for word in rest)
+
+
+class GeminiRestModel:
+    """Async Gemini text generation over REST, streaming via server-sent events"""
+
+    def __init__(self, api_key: str, model_name: str, base_url: str = GEMINI_API_BASE, timeout: float = 30):
+        self.url = f"{base_url.rstrip('/')}/v1beta/models/{model_name}"
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=GEMINI_REST_MAX_CONNECTIONS, max_keepalive_connections=20),
+            headers={"x-goog-api-key": api_key, "Content-Type": "application/json"},
+        )
+
+    def _body(self, prompt: str, generation_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if generation_config:
+            body["generationConfig"] = {_camel(key): value for key, value in generation_config.items()}
+        return body
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, generation_config: Optional[Dict[str, Any]] = None):
+        body = self._body(prompt, generation_config)
+        if stream:
+            return self._stream(body)
+        response = await self.client.post(f"{self.url}:generateContent", json=body)
+        if response.status_code >= 400:
+            raise GeminiRestError(f"HTTP {response.status_code} {response.text[:200]}")
+        return RestResponse(response.json())
+
+    async def _stream(self, body: Dict[str, Any]) -> AsyncIterator[RestResponse]:
+        async with self.client.stream("POST", f"{self.url}:streamGenerateContent", params={"alt": "sse"}, json=body) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise GeminiRestError(f"HTTP {response.status_code} {response.text[:200]}")
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    yield RestResponse(json.loads(line[len("data:"):]))
+
+    async def close(self) -> None:
+        await self.client.aclose()
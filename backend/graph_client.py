@@ -0,0 +1,159 @@
+"""
+Async WhatsApp Graph API client.
+
+One shared httpx.AsyncClient (HTTP/2 when the `h2` package is installed) keeps
+connections to graph.facebook.com warm across sends. Sends to the same recipient
+are serialised so messages arrive in order, while sends to different recipients run
+concurrently up to GRAPH_MAX_CONCURRENCY. 429 and 5xx responses and transport
+errors are retried with exponential backoff (honouring Retry-After). An optional
+token bucket paces every attempt, retries included, so a throttled burst of
+retries never exceeds the configured rate.
+
+Point GRAPH_API_BASE at fakes/fake_graph_api.py to run without Meta credentials.
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+from payloads import encode_payload
+
+logger = logging.getLogger(__name__)
+
+GRAPH_API_BASE = os.getenv("GRAPH_API_BASE", "https://graph.facebook.com/v18.0")
+GRAPH_MAX_CONCURRENCY = int(os.getenv("GRAPH_MAX_CONCURRENCY", "64"))
+GRAPH_TIMEOUT_SECONDS = float(os.getenv("GRAPH_TIMEOUT_SECONDS", "10"))
+GRAPH_MAX_RETRIES = int(os.getenv("GRAPH_MAX_RETRIES", "3"))
+GRAPH_BACKOFF_SECONDS = float(os.getenv("GRAPH_BACKOFF_SECONDS", "0.5"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class GraphClient:
+    """Pooled, ordered, retrying sender for the WhatsApp Cloud API messages endpoint"""
+
+    def __init__(
+        self,
+        access_token: Optional[str],
+        phone_number_id: Optional[str],
+        base_url: str = GRAPH_API_BASE,
+        max_concurrency: int = GRAPH_MAX_CONCURRENCY,
+        timeout: float = GRAPH_TIMEOUT_SECONDS,
+        max_retries: int = GRAPH_MAX_RETRIES,
+        backoff: float = GRAPH_BACKOFF_SECONDS,
+        rate_limiter: Optional[TokenBucket] = None,
+    ):
+        self.url = f"{base_url.rstrip('/')}/{phone_number_id}/messages"
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+        }
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        # recipient -> [lock, number of senders holding or waiting on it]
+        self._recipient_locks: Dict[str, list] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=_http2_available(),
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=20),
+                headers=self.headers,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def send(self, recipient_id: str, data: Dict[str, Any]) -> bool:
+        """Send one message payload (without messaging_product/to) to a recipient"""
+        return await self.send_raw(recipient_id, encode_payload(recipient_id, data))
+
+    async def send_raw(self, recipient_id: str, body: bytes) -> bool:
+        """Send an already-serialised request body; returns True on success"""
+        ok, _ = await self.deliver(recipient_id, body)
+        return ok
+
+    async def deliver(self, recipient_id: str, body: bytes) -> Tuple[bool, Optional[str]]:
+        """Like send_raw, but returns (success, error description)"""
+        entry = self._recipient_locks.setdefault(recipient_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._post_with_retry(recipient_id, body)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._recipient_locks[recipient_id]
+
+    async def _post_with_retry(self, recipient_id: str, body: bytes) -> Tuple[bool, Optional[str]]:
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                async with self._semaphore:
+                    response = await self.client.post(self.url, content=body)
+                if response.status_code < 400:
+                    logger.debug(f"Message sent successfully to {recipient_id}")
+                    return True, None
+                error = f"HTTP {response.status_code} {response.text[:200]}"
+                if response.status_code not in RETRYABLE_STATUS:
+                    logger.error(f"Error sending message to {recipient_id}: {error}")
+                    return False, error
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isascii() and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+            except httpx.TransportError as e:
+                error = repr(e)
+
+            if attempt < self.max_retries:
+                logger.warning(f"Send to {recipient_id} failed ({error}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        logger.error(f"Error sending message to {recipient_id}: giving up after {self.max_retries + 1} attempts")
+        return False, f"gave up after {self.max_retries + 1} attempts: {error}"
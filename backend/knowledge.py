@@ -1,3 +1,8 @@
+import os
+from typing import Optional
+
+from matcher import compile_matchers, normalize_text
+
 # --- Rule-Based FAQ Knowledge Base ---
 KNOWLEDGE_BASE = {
     'en': {
@@ -28,4 +33,128 @@ KNOWLEDGE_BASE = {
             'answer': "नेशनल स्कॉलरशिप पोर्टल (NSP) विभिन्न सरकारी छात्रवृत्तियों के लिए आवेदन करने की आधिकारिक वेबसाइट है। आप इसे scholarships.gov.in पर देख सकते हैं।"
         }
     }
-}
\ No newline at end of file
+}
+
+# --- FAQ Data with Built-in Answers ---
+FAQ_DATA = {
+    "dbt": {
+        "title": "DBT Guidelines",
+        "questions": [
+            {
+                "question": "What is Direct Benefit Transfer?",
+                "answer": "Direct Benefit Transfer (DBT) is a major reform initiative launched by Government of India on 1 January 2013 to transfer benefits directly into the bank/postal accounts of beneficiaries. It aims to eliminate middlemen, reduce leakages, and ensure better delivery of government subsidies and welfare payments using modern Information and Communication Technology (ICT)."
+            },
+            {
+                "question": "How does DBT work?",
+                "answer": "DBT works by digitizing beneficiary databases and making payments directly to bank accounts through electronic transfer. For cash benefits, funds flow from Central Government to State Treasury via PFMS (Public Financial Management System) and then to individual beneficiary accounts. For in-kind benefits, distribution happens through PoS devices with authentication."
+            },
+            {
+                "question": "What are the transaction charges for DBT?",
+                "answer": "As per Government Order dated 26.02.2016:\n\n• Transaction charges: Rs. 0.50/- per transaction shared between sponsor banks, destination entities and NPCI\n• Cash out incentives: For MGNREGA, Maternity Benefits and Pension Schemes - Rs. 5/- fixed + Rs. 0.50/- per Rs. 100 (maximum Rs. 5/-) to promote last mile delivery"
+            },
+            {
+                "question": "How many schemes are under DBT?",
+                "answer": "As of April 2016, 66 schemes of 15 Ministries/Departments are reported to be on DBT. DBT is being implemented across the country, delivering benefits to more than 30 crore beneficiaries with over 100 crore DBT transactions completed."
+            },
+            {
+                "question": "Is Aadhaar mandatory for DBT?",
+                "answer": "At present, Aadhaar is not mandatory for availing DBT in any welfare schemes. DBT can be undertaken by digitizing beneficiary database and making payments directly to bank accounts. However, Aadhaar seeding in beneficiary database and bank accounts is highly desirable to achieve DBT objectives effectively and prevent leakages."
+            },
+            {
+                "question": "What is Aadhaar seeding?",
+                "answer": "Aadhaar seeding is done by updating Aadhaar number in the beneficiary database and linking the Aadhaar number with the bank account of the beneficiary in the Core Banking System (CBS). This helps in de-duplication, curbing leakages, and provides faster channels for welfare payments without middlemen."
+            }
+        ]
+    },
+    "nsp": {
+        "title": "NSP Scholarship",
+        "questions": [
+            {
+                "question": "What is the National Scholarship Portal?",
+                "answer": "National Scholarship Portal (NSP) is a one-stop IT solution launched on 1st July 2015 under 'Digital India'. It facilitates various services from student application, receipt, verification, processing, and disbursal of scholarships to students directly into their accounts through Direct Benefit Transfer (DBT). NSP is a Mission Mode Project providing a SMART system - Simplified, Mission-oriented, Accountable, Responsive and Transparent."
+            },
+            {
+                "question": "How do I apply for a scholarship on NSP?",
+                "answer": "To apply on NSP:\n\n1. Fresh Students: Register at https://scholarships.gov.in/ using 'New Registration'\n2. Provide accurate information as per documents\n3. Keep Aadhaar number, bank details, educational documents ready\n4. Submit application and get unique Application ID via SMS\n5. Login and change password on first login\n6. Submit documents to your Institute after online submission\n\nRenewal Students: Use previous year's Application ID and update marks obtained."
+            },
+            {
+                "question": "What is the workflow for NSP?",
+                "answer": "NSP follows a 7-step workflow:\n\n1. Student Registration and Application Submission\n2. Level 1 Verification at Institute Level\n3. Level 2/3 Verification at District/State/Ministry Level\n4. Beneficiary Records Creation and Account Validation by PFMS\n5. Applications Deduplication and Merit List Generation\n6. Payment File Generation and Financial Approval\n7. Scholarship Disbursement through DBT"
+            },
+            {
+                "question": "Who are the users of NSP?",
+                "answer": "Primary users of NSP include:\n\n• Students/Applicants (Fresh and Renewal)\n• Institute Nodal Officers\n• District/State/Ministry Nodal Officers\n• Scheme owner Ministries/Departments\n• Ministry of Electronics & Information Technology (MeitY)\n• Direct Benefit Transfer (DBT) Mission\n• National Informatics Center (NIC)\n• Help Desk support"
+            },
+            {
+                "question": "What are the steps for scholarship disbursement?",
+                "answer": "Scholarship disbursement steps:\n\n1. Applications verified at Institute and State/District levels\n2. Beneficiary records created and account validation by PFMS\n3. Deduplication process and merit list generation\n4. Payment file generation and financial approval\n5. Final disbursement through DBT directly to student's bank account\n\nNote: Priority is given to Aadhaar seeded bank accounts for disbursement."
+            },
+            {
+                "question": "What documents are required for NSP application?",
+                "answer": "Required documents for NSP:\n\n• Educational documents (certificates, mark sheets)\n• Aadhaar number (mandatory if available)\n• Bank passbook with photograph (PDF/JPEG, max 200KB)\n• Enrolment ID (if Aadhaar not available)\n• Bonafide student certificate from Institute\n• Category certificates (if applicable)\n• Income certificate\n• Any scheme-specific documents as per eligibility criteria"
+            }
+        ]
+    },
+    "aadhaar": {
+        "title": "Aadhaar Steps",
+        "questions": [
+            {
+                "question": "How do I link my Aadhaar to my bank account?",
+                "answer": "To link Aadhaar to your bank account:\n\n1. Visit your bank branch where you have the account\n2. Request bank officials to link your Aadhaar with your account\n3. Fill up the mandate and consent form of the bank\n4. Bank will verify your details and documents\n5. Bank officials will link Aadhaar number to your account in CBS\n6. Bank will also update NPCI mapper\n7. Once completed, your account becomes DBT enabled"
+            },
+            {
+                "question": "How can I check my bank seeding status?",
+                "answer": "You can check your bank seeding status from:\n\n• Official website: https://myaadhaar.uidai.gov.in/\n• NPCI website: https://base.npci.org.in/catalog/seedingRequestDetails\n\nNote: Information is fetched from National Payment Corporation of India (NPCI) server. UIDAI is not responsible for its correctness and does not store this information."
+            },
+            {
+                "question": "What is the process for Aadhaar seeding?",
+                "answer": "Aadhaar seeding process:\n\n1. Customer visits bank branch and submits duly filled consent form\n2. Bank officials verify details, documents and customer authenticity\n3. Bank accepts consent form and provides acknowledgement\n4. Branch links Aadhaar number to customer's account and NPCI mapper\n5. Once completed, Aadhaar number reflects in NPCI mapper\n6. Account becomes ready for DBT transactions\n\nCustomer can link only one account with Aadhaar at any point of time."
+            },
+            {
+                "question": "What do I do if my Aadhaar status is inactive?",
+                "answer": "If your Aadhaar status is inactive:\n\n1. Visit your respective bank branch in person\n2. Submit duly filled customer consent form\n3. Bank will reactivate your Aadhaar seeding status\n4. For pending subsidies, approach Oil Marketing Companies (OMCs)\n5. Contact OMCs through toll free number: 1800 2333 555\n6. OMCs will reinitiate failed transactions to your seeded bank account"
+            },
+            {
+                "question": "Who do I contact for grievance redressal?",
+                "answer": "For Aadhaar seeding grievances:\n\n1. First approach your bank's customer service cell\n2. Follow bank's escalation matrix if issue not resolved\n3. If Aadhaar not reflecting in NPCI mapper after submitting documents, contact bank only\n4. For NPCI related issues: Write to npci.dbtl@npci.org.in with Aadhaar consent acknowledgment copy from bank\n5. NPCI will coordinate with concerned bank teams for resolution"
+            },
+            {
+                "question": "How do I receive benefits in my bank account?",
+                "answer": "To receive DBT benefits in your bank account:\n\n1. Visit the bank branch where you have opened the account\n2. Request bank to link your Aadhaar with your account\n3. Fill up the mandate and consent form of the bank\n4. This account will be seeded with NPCI-mapper by the bank\n5. Account becomes DBT enabled for receiving government benefits\n6. All eligible scheme benefits will be directly transferred to this account\n\nEnsure your account remains active and functional to receive payments."
+            }
+        ]
+    }
+}
+
+# --- Lookup Helpers ---
+# Keyword automatons and FAQ question table, compiled once at import
+KEYWORD_MATCHERS = compile_matchers(KNOWLEDGE_BASE)
+
+# A keyword hit only answers a message that is about nothing else: at most
+# KEYWORD_SHORT_WORDS words, or mostly (KEYWORD_MIN_COVERAGE of its characters) made of
+# the matched keywords. A longer question that merely mentions "nsp" goes on to retrieval.
+KEYWORD_SHORT_WORDS = int(os.getenv("KEYWORD_SHORT_WORDS", "2"))
+KEYWORD_MIN_COVERAGE = float(os.getenv("KEYWORD_MIN_COVERAGE", "0.6"))
+
+FAQ_ANSWERS = {
+    normalize_text(item["question"]): item["answer"]
+    for category in FAQ_DATA.values()
+    for item in category["questions"]
+}
+
+
+def find_faq_answer(message: str) -> Optional[str]:
+    """Exact (normalised) match against the FAQ_DATA questions"""
+    return FAQ_ANSWERS.get(normalize_text(message))
+
+
+def find_keyword_answer(message: str, lang: str = 'en') -> Optional[str]:
+    """Answer of the best-scoring KNOWLEDGE_BASE intent, if the message is mostly its keywords"""
+    matcher = KEYWORD_MATCHERS.get(lang, KEYWORD_MATCHERS['en'])
+    match = matcher.match(message)
+    if match is None:
+        return None
+    text = normalize_text(message)
+    if len(text.split()) > KEYWORD_SHORT_WORDS and match[1] < KEYWORD_MIN_COVERAGE * len(text):
+        return None
+    return KNOWLEDGE_BASE.get(lang, KNOWLEDGE_BASE['en'])[match[0]]['answer']
@@ -0,0 +1,161 @@
+"""
+Compiled multi-pattern keyword matcher for the rule-based knowledge base.
+
+Matches only count on word boundaries, and each intent scores the number of
+characters its keywords cover, so the most specific phrase wins. Small keyword sets
+(the real knowledge base has about ten per language) are matched by scanning for each
+keyword in turn, which is faster at that size; from AUTOMATON_MIN_KEYWORDS keywords a
+language's keywords are compiled into an Aho-Corasick automaton instead, so matching
+is a single pass over the message however many intents exist. Both find the same
+matches; see benchmarks/bench_matcher.py for the crossover.
+
+Messages and keywords go through the same normalisation: Unicode NFC, case-folding,
+punctuation removal, Devanagari nukta/chandrabindu folding and common Hinglish
+spelling variants (e.g. "aadhar" -> "aadhaar").
+"""
+import unicodedata
+from collections import deque
+from typing import Dict, Any, List, Tuple, Iterable, Iterator, Optional
+
+# Devanagari marks that users type inconsistently
+_DEVANAGARI_FOLD = str.maketrans({
+    "\u093c": None,      # nukta: फ़ -> फ
+    "\u0901": "\u0902",  # chandrabindu -> anusvara
+    "\u200c": None,      # zero-width non-joiner
+    "\u200d": None,      # zero-width joiner
+})
+
+# Common Roman-script (Hinglish) spelling variants -> canonical token
+HINGLISH_VARIANTS = {
+    "aadhar": "aadhaar", "adhar": "aadhaar", "adhaar": "aadhaar", "aadar": "aadhaar",
+    "scholership": "scholarship", "scolarship": "scholarship", "schlorship": "scholarship",
+    "kyaa": "kya", "kia": "kya",
+    "h": "hai", "hain": "hai", "hei": "hai",
+    "matlb": "matlab", "mtlb": "matlab",
+    "kese": "kaise", "kaisay": "kaise", "kaese": "kaise",
+    "karein": "kare", "karen": "kare",
+    "sedding": "seeding", "seding": "seeding",
+}
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, strip punctuation/symbols, fold Devanagari variants and Hinglish spellings"""
+    text = unicodedata.normalize("NFC", text).casefold().translate(_DEVANAGARI_FOLD)
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return " ".join(HINGLISH_VARIANTS.get(token, token) for token in text.split())
+
+
+# Below this many keywords the per-keyword scan beats the automaton
+AUTOMATON_MIN_KEYWORDS = 80
+
+
+# --- Aho-Corasick Automaton ---
+class AhoCorasick:
+    """Character-level Aho-Corasick automaton over a fixed set of patterns"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_links()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build_links(self) -> None:
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state == 0:
+                    continue
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end_index, pattern_id) for every pattern occurrence in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in out[state]:
+                yield i + 1, pattern_id
+
+
+# --- Intent Matcher ---
+class IntentMatcher:
+    """Best-scoring intent for a message in one pass over the text"""
+
+    def __init__(self, intents: Dict[str, Dict[str, Any]], min_automaton_keywords: int = AUTOMATON_MIN_KEYWORDS):
+        self.keywords: List[str] = []
+        self._owners: List[str] = []
+        self._order = {name: i for i, name in enumerate(intents)}
+        for name, intent in intents.items():
+            for keyword in intent["keywords"]:
+                normalized = normalize_text(keyword)
+                if normalized:
+                    self.keywords.append(normalized)
+                    self._owners.append(name)
+        self._automaton = AhoCorasick(self.keywords) if len(self.keywords) >= min_automaton_keywords else None
+        # Space-padded so a plain substring search only finds whole words / phrases
+        self._needles = [(f" {keyword} ", len(keyword), owner) for keyword, owner in zip(self.keywords, self._owners)]
+
+    def _scan(self, text: str) -> Dict[str, int]:
+        """Scores from searching for each keyword in turn"""
+        scores: Dict[str, int] = {}
+        padded = f" {text} "
+        for needle, length, owner in self._needles:
+            start = padded.find(needle)
+            while start != -1:
+                scores[owner] = scores.get(owner, 0) + length
+                # +1, not +len: consecutive hits share the space between them
+                start = padded.find(needle, start + 1)
+        return scores
+
+    def _scan_automaton(self, text: str) -> Dict[str, int]:
+        """Scores from one pass of the automaton over the text"""
+        scores: Dict[str, int] = {}
+        patterns = self._automaton.patterns
+        for end, pattern_id in self._automaton.iter_matches(text):
+            start = end - len(patterns[pattern_id])
+            # Only whole-word / whole-phrase hits count
+            if (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " "):
+                owner = self._owners[pattern_id]
+                scores[owner] = scores.get(owner, 0) + end - start
+        return scores
+
+    def match(self, message: str) -> Optional[Tuple[str, int]]:
+        """Return (intent, score) for the best match, or None"""
+        text = normalize_text(message)
+        scores = self._scan(text) if self._automaton is None else self._scan_automaton(text)
+        if not scores:
+            return None
+        # Highest score wins; ties go to the intent defined first
+        best = min(scores, key=lambda name: (-scores[name], self._order[name]))
+        return best, scores[best]
+
+
+def compile_matchers(knowledge_base: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, IntentMatcher]:
+    """One compiled matcher per language"""
+    return {lang: IntentMatcher(intents) for lang, intents in knowledge_base.items()}
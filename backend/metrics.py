@@ -0,0 +1,304 @@
+"""
+In-process metrics with a Prometheus text endpoint.
+
+Each service owns one MetricsRegistry. It holds counters, gauges and histograms, and
+renders them in the Prometheus text exposition format for GET /metrics. Two series
+are built in:
+  - <prefix>_stage_seconds{stage}: a histogram fed by span("retrieval"), span("gemini"), ...
+  - <prefix>_errors_total{stage}: incremented when a span exits with an exception
+MetricsMiddleware adds <prefix>_http_request_seconds{method,route,status} for every
+request (total request time, including the body of streamed responses).
+
+With METRICS_ENABLED=0 the registry hands out shared no-op objects, spans do not read
+the clock, the middleware is not installed and /metrics answers 404.
+
+Metrics are updated from the event loop only (no locking).
+"""
+import os
+import time
+import bisect
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+# Seconds; spans range from sub-millisecond lookups to multi-second Gemini calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# --- Metric Types ---
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """The series for these label values (created on first use)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh series for one set of label values"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from function() at scrape time (e.g. a queue depth)"""
+        self._function = function
+
+    def render(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> List[str]:
+        value = self.value
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception as e:
+                logger.error(f"Error reading metric {name}: {e}")
+                return []
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonic count; use labels(...).inc() or inc() when unlabelled"""
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Mirror a count kept elsewhere (e.g. a component's stats), read at scrape time"""
+        self.labels().set_function(function)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, set directly or read from a function at scrape time"""
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.labels().set_function(function)
+
+
+class _Buckets:
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.bounds) + ["+Inf"], self.counts):
+            cumulative += count
+            le = 'le="{}"'.format(bound if bound == "+Inf" else _format_value(bound))
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies in seconds) over fixed buckets"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class _NoopMetric:
+    """Stands in for every metric (and series) when metrics are disabled"""
+
+    def labels(self, *values: str) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+_NOOP_METRIC = _NoopMetric()
+
+
+# --- Spans ---
+class _Span:
+    """Times a block into the stage histogram; counts an error if it raises"""
+    __slots__ = ("series", "errors", "start")
+
+    def __init__(self, series: _Buckets, errors: _Value):
+        self.series = series
+        self.errors = errors
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.series.observe(time.perf_counter() - self.start)
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.errors.inc()
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+# --- Registry ---
+class MetricsRegistry:
+    """All metrics of one service, rendered together for /metrics"""
+
+    def __init__(self, prefix: str, enabled: bool = METRICS_ENABLED):
+        self.prefix = prefix
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+        self.stage_seconds = self.histogram("stage_seconds", "Time spent in each request stage", ["stage"])
+        self.errors = self.counter("errors_total", "Errors raised per request stage", ["stage"])
+
+    def _register(self, metric: _Metric):
+        if not self.enabled:
+            return _NOOP_METRIC
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.prefix}_{name}", help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(f"{self.prefix}_{name}", help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.prefix}_{name}", help_text, labelnames, buckets))
+
+    def span(self, stage: str):
+        """Context manager timing one stage: `with metrics.span("retrieval"): ...`"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self.stage_seconds.labels(stage), self.errors.labels(stage))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def response(self) -> PlainTextResponse:
+        """The /metrics response: Prometheus text format, or 404 when disabled"""
+        if not self.enabled:
+            return PlainTextResponse("Metrics are disabled", status_code=404)
+        return PlainTextResponse(self.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# --- Middleware ---
+class MetricsMiddleware:
+    """ASGI middleware recording total request time by method, route and status"""
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.requests = registry.histogram(
+            "http_request_seconds", "Total HTTP request time", ["method", "route", "status"]
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; route templates keep
+            # the label set bounded (unknown paths share one series)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            self.requests.labels(scope["method"], path, status).observe(time.perf_counter() - start)
@@ -0,0 +1,35 @@
+"""
+Pre-serialised WhatsApp message bodies.
+
+Menu payloads are static per (language, menu, category), so each one is JSON-encoded
+once into a byte template with a placeholder for the recipient. Sending only splices
+the recipient id between the two halves, instead of rebuilding and re-serialising the
+nested dicts for every message.
+"""
+import json
+from typing import Dict, Any
+
+_PLACEHOLDER = "\x00recipient\x00"
+
+
+def encode_payload(recipient_id: str, data: Dict[str, Any]) -> bytes:
+    """Serialise a full request body for one recipient (the uncached path)"""
+    payload = {"messaging_product": "whatsapp", "to": recipient_id, **data}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class PayloadTemplate:
+    """A request body serialised once, with the recipient id spliced in per send"""
+
+    __slots__ = ("prefix", "suffix")
+
+    def __init__(self, data: Dict[str, Any]):
+        body = encode_payload(_PLACEHOLDER, data)
+        self.prefix, self.suffix = body.split(json.dumps(_PLACEHOLDER).encode("utf-8"))
+
+    def render(self, recipient_id: str) -> bytes:
+        # WhatsApp ids are ASCII digits, so they never need JSON escaping (isdigit alone
+        # also accepts other scripts' digits and superscripts)
+        if recipient_id.isascii() and recipient_id.isdigit():
+            return b'%s"%s"%s' % (self.prefix, recipient_id.encode("ascii"), self.suffix)
+        return self.prefix + json.dumps(recipient_id).encode("utf-8") + self.suffix
@@ -0,0 +1,169 @@
+"""
+Token-budgeted prompt assembly for Gemini.
+
+The prompt is the system prompt, the retrieved knowledge-base excerpts and the user's
+question. Token counts are estimated locally (no API round trip), and the excerpts are
+fitted into PROMPT_INPUT_TOKEN_BUDGET:
+  1. overlapping chunks of the same source are merged, and near-duplicate chunks
+     (mostly the same word shingles) are dropped in favour of the better-ranked one;
+  2. chunks are taken in rank order (retrieval order, best first) while they fit;
+     the first one that does not fit is trimmed at a sentence boundary, and the
+     rest are left out.
+
+Every request's estimated and actual (usage_metadata) token counts are logged so the
+estimate and the budget can be tuned against real cost.
+"""
+import os
+import math
+import logging
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPT_INPUT_TOKEN_BUDGET = int(os.getenv("PROMPT_INPUT_TOKEN_BUDGET", "3000"))
+PROMPT_MAX_QUERY_TOKENS = int(os.getenv("PROMPT_MAX_QUERY_TOKENS", "400"))
+# A trimmed chunk shorter than this is not worth including
+MIN_TRIMMED_CHUNK_TOKENS = 60
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate Gemini token count: ~4 chars/token for Latin text, ~2 for Devanagari"""
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, preferring a sentence or line boundary"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = max(1, len(text) * max_tokens // estimate_tokens(text))
+    while cut > 1 and estimate_tokens(text[:cut]) > max_tokens:
+        cut = cut * 9 // 10
+    head = text[:cut]
+    # Back off to the last sentence end / line break in the final third, else a word break
+    boundary = max(head.rfind(sep) + len(sep) for sep in ("\n", ". ", "। ", "? "))
+    if boundary < len(head) * 2 // 3:
+        boundary = head.rfind(" ")
+    return head[:boundary].rstrip() if boundary > 0 else head
+
+
+def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = text.lower().split()
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _merge(kept: Dict[str, Any], chunk: Dict[str, Any]) -> bool:
+    """Merge chunk into kept if they are overlapping spans of the same source"""
+    if kept.get("source") is None or kept.get("source") != chunk.get("source"):
+        return False
+    if kept.get("offset") is None or chunk.get("offset") is None:
+        return False
+    ks, cs = kept["offset"], chunk["offset"]
+    ke, ce = ks + len(kept["text"]), cs + len(chunk["text"])
+    if cs >= ke or ks >= ce:
+        return False
+    # Both are exact slices of the source, so the union is stitched from them
+    if cs >= ks:
+        kept["text"] = kept["text"] + chunk["text"][ke - cs:] if ce > ke else kept["text"]
+    else:
+        kept["text"] = chunk["text"] + kept["text"][ce - ks:] if ke > ce else chunk["text"]
+        kept["offset"] = cs
+    return True
+
+
+def dedupe_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge overlapping same-source chunks and drop near-duplicates, keeping rank order"""
+    kept: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        chunk = dict(chunk)
+        if any(_merge(existing, chunk) for existing in kept):
+            continue
+        shingles = _shingles(chunk["text"])
+        duplicate = False
+        for existing in kept:
+            other = _shingles(existing["text"])
+            overlap = len(shingles & other) / max(1, min(len(shingles), len(other)))
+            if overlap >= NEAR_DUPLICATE_THRESHOLD:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(chunk)
+    return kept
+
+
+class PromptBuilder:
+    """Assembles the Gemini prompt within an input-token budget"""
+
+    def __init__(self, system_prompt: str, budget: int = PROMPT_INPUT_TOKEN_BUDGET, max_query_tokens: int = PROMPT_MAX_QUERY_TOKENS):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.max_query_tokens = max_query_tokens
+
+    def render(self, query: str, context: str, language_instruction: str = "") -> str:
+        return f"""{self.system_prompt}
+
+--- Knowledge Base Excerpts ---
+{context}
+
+--- User's Question ---
+{query}
+
+Please provide a helpful and accurate answer based on the knowledge base above.{language_instruction}"""
+
+    def build(self, query: str, chunks: List[Dict[str, Any]], language_instruction: str = "") -> Tuple[str, str, Dict[str, int]]:
+        """Return (prompt, context, stats) with the context ranked, deduplicated and fitted to the budget"""
+        query = trim_to_tokens(query, self.max_query_tokens)
+        fixed_tokens = estimate_tokens(self.render(query, "", language_instruction))
+        available = self.budget - fixed_tokens
+
+        unique = dedupe_chunks(chunks)
+        parts: List[str] = []
+        trimmed = 0
+        for chunk in unique:
+            # Excerpts are joined by a blank line (~1 token)
+            cost = estimate_tokens(chunk["text"]) + 1
+            if cost <= available:
+                parts.append(chunk["text"])
+                available -= cost
+                continue
+            if available - 1 >= MIN_TRIMMED_CHUNK_TOKENS:
+                parts.append(trim_to_tokens(chunk["text"], available - 1))
+                trimmed = 1
+            break
+
+        context = "\n\n".join(parts)
+        prompt = self.render(query, context, language_instruction)
+        stats = {
+            "input_tokens_est": estimate_tokens(prompt),
+            "budget": self.budget,
+            "chunks_in": len(chunks),
+            "chunks_deduped": len(chunks) - len(unique),
+            "chunks_used": len(parts),
+            "chunks_trimmed": trimmed,
+        }
+        return prompt, context, stats
+
+
+def usage_counts(response: Any) -> Dict[str, int]:
+    """Token counts reported by Gemini for a response (or the last streamed chunk)"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+
+def log_usage(stats: Dict[str, int], usage: Optional[Dict[str, int]] = None) -> None:
+    """One log line per request with estimated and actual tokens in/out"""
+    usage = usage or {}
+    logger.info(
+        f"Prompt tokens: ~{stats['input_tokens_est']} est / {usage.get('prompt_tokens', '?')} actual in, "
+        f"{usage.get('output_tokens', '?')} out (budget {stats['budget']}); "
+        f"chunks {stats['chunks_used']}/{stats['chunks_in']} used, {stats['chunks_deduped']} deduped, "
+        f"{stats['chunks_trimmed']} trimmed"
+    )
@@ -0,0 +1,231 @@
+"""
+Reconcile two students.csv snapshots and write out the records that changed.
+
+Both snapshots are streamed, never loaded whole:
+  1. partition: each file is split into newline-aligned byte ranges, and a process
+     pool hash-partitions the rows of every range by (student_id, aadhaar_last4)
+     into small partition files;
+  2. diff: the pool diffs partition i of the old snapshot against partition i of
+     the new one with in-memory dicts, so peak memory per worker scales with
+     rows / partitions rather than with the file size.
+
+The change set is a CSV with one row per added, removed or changed record and the
+old/new value of every status field; a summary of the status transitions (e.g.
+seeding_status Pending -> Completed) is printed and optionally written as JSON.
+
+Rows are assumed not to contain quoted newlines (true for the students.csv schema).
+
+Usage:
+    python reconcile.py old.csv new.csv -o changes.csv [--workers 8] [--partitions 64]
+"""
+import os
+import csv
+import sys
+import json
+import time
+import zlib
+import shutil
+import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from status_store import STATUS_FIELDS
+
+KEY_FIELDS = STATUS_FIELDS[:2]
+VALUE_FIELDS = STATUS_FIELDS[2:]
+CHANGE_COLUMNS = (*KEY_FIELDS, "change", *(f"{side}_{field}" for field in VALUE_FIELDS for side in ("old", "new")))
+# Only transitions of these fields are summarised
+SUMMARY_FIELDS = ("dbt_status", "seeding_status")
+
+
+def _split_line(line: bytes) -> List[bytes]:
+    if b'"' in line:
+        return [field.encode("utf-8") for field in next(csv.reader([line.decode("utf-8")]))]
+    return line.split(b",")
+
+
+def _parse(line: bytes) -> Optional[Tuple[bytes, bytes]]:
+    """(key, values) as canonical bytes for one data line, or None for blank/short lines"""
+    line = line.rstrip(b"\r\n")
+    # Fast path for the common unquoted, unpadded five-column row
+    if (line.count(b",") == len(STATUS_FIELDS) - 1 and b'"' not in line and b", " not in line
+            and b" ," not in line and line[:1] != b" " and line[-1:] != b" "):
+        i = line.find(b",")
+        j = line.find(b",", i + 1)
+        if i == 0 or j == i + 1:
+            return None
+        return line[:j], line[j + 1:]
+    fields = [field.strip() for field in _split_line(line)]
+    if len(fields) < len(STATUS_FIELDS) or not fields[0] or not fields[1]:
+        return None
+    return fields[0] + b"," + fields[1], b",".join(fields[2:len(STATUS_FIELDS)])
+
+
+def _decode(value: bytes) -> List[str]:
+    return value.decode("utf-8").split(",")
+
+
+def _check_header(path: str) -> int:
+    """Validate the header; returns the byte offset of the first data row"""
+    with open(path, "rb") as f:
+        header = [field.strip().decode("utf-8") for field in _split_line(f.readline().rstrip(b"\r\n"))]
+        if tuple(header[:len(STATUS_FIELDS)]) != STATUS_FIELDS:
+            raise ValueError(f"{path}: expected columns {','.join(STATUS_FIELDS)}, got {','.join(header)}")
+        return f.tell()
+
+
+def byte_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split the data rows of a file into newline-aligned (start, end) byte ranges"""
+    start = _check_header(path)
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            target = start + (size - start) * i // parts
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()
+            if f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def partition_range(path: str, start: int, end: int, out_prefix: str, partitions: int) -> int:
+    """Hash-partition the rows in [start, end) into out_prefix-<p>.csv; returns the row count"""
+    outputs = [open(f"{out_prefix}-{p}.csv", "wb", buffering=1 << 16) for p in range(partitions)]
+    rows = 0
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            for line in f:
+                remaining -= len(line)
+                parsed = _parse(line)
+                if parsed is not None:
+                    outputs[zlib.crc32(parsed[0]) % partitions].write(parsed[0] + b"," + parsed[1] + b"\n")
+                    rows += 1
+                if remaining <= 0:
+                    break
+    finally:
+        for output in outputs:
+            output.close()
+    return rows
+
+
+def _read_partition(paths: List[str]):
+    for path in paths:
+        with open(path, "rb") as f:
+            for line in f:
+                parsed = _parse(line)
+                if parsed is not None:
+                    yield parsed
+
+
+def diff_partition(old_paths: List[str], new_paths: List[str], out_path: str) -> Counter:
+    """Diff one partition pair into out_path; returns change and transition counts"""
+    previous: Dict[bytes, bytes] = dict(_read_partition(old_paths))
+    counts = Counter()
+    empty = [""] * len(VALUE_FIELDS)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+
+        def emit(key, change, old, new):
+            counts[change] += 1
+            writer.writerow([*_decode(key), change, *(value for pair in zip(old, new) for value in pair)])
+            if change != "changed":
+                return
+            for i, field in enumerate(VALUE_FIELDS):
+                if field in SUMMARY_FIELDS and old[i] != new[i]:
+                    counts[f"{field}: {old[i]} -> {new[i]}"] += 1
+
+        # Later rows win on duplicate keys, as in the status store loader
+        for key, new in dict(_read_partition(new_paths)).items():
+            old = previous.pop(key, None)
+            if old is None:
+                emit(key, "added", empty, _decode(new))
+            elif old != new:
+                emit(key, "changed", _decode(old), _decode(new))
+            else:
+                counts["unchanged"] += 1
+        for key, old in previous.items():
+            emit(key, "removed", _decode(old), empty)
+    return counts
+
+
+def reconcile(old_path: str, new_path: str, output_path: str, workers: int = os.cpu_count() or 1,
+              partitions: int = 64, tmp_dir: Optional[str] = None) -> Counter:
+    """Write the change set between two snapshots to output_path; returns the summary counts"""
+    work_dir = tempfile.mkdtemp(prefix="reconcile-", dir=tmp_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Phase 1: hash-partition both snapshots, one task per byte range
+            jobs = []
+            for tag, path in (("old", old_path), ("new", new_path)):
+                for i, (start, end) in enumerate(byte_ranges(path, workers)):
+                    prefix = os.path.join(work_dir, f"{tag}-{i}")
+                    jobs.append((tag, prefix, pool.submit(partition_range, path, start, end, prefix, partitions)))
+            counts = Counter()
+            prefixes = {"old": [], "new": []}
+            for tag, prefix, job in jobs:
+                counts[f"{tag}_rows"] += job.result()
+                prefixes[tag].append(prefix)
+
+            # Phase 2: diff each partition pair independently
+            diffs = []
+            for p in range(partitions):
+                diffs.append(pool.submit(
+                    diff_partition,
+                    [f"{prefix}-{p}.csv" for prefix in prefixes["old"]],
+                    [f"{prefix}-{p}.csv" for prefix in prefixes["new"]],
+                    os.path.join(work_dir, f"changes-{p}.csv"),
+                ))
+            for job in diffs:
+                counts.update(job.result())
+
+        with open(output_path, "w", newline="", encoding="utf-8") as out:
+            csv.writer(out).writerow(CHANGE_COLUMNS)
+            for p in range(partitions):
+                with open(os.path.join(work_dir, f"changes-{p}.csv"), encoding="utf-8") as part:
+                    shutil.copyfileobj(part, out)
+        return counts
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old_csv")
+    parser.add_argument("new_csv")
+    parser.add_argument("-o", "--output", default="changes.csv")
+    parser.add_argument("--summary", help="also write the summary counts to this JSON file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--partitions", type=int, default=64)
+    parser.add_argument("--tmp-dir", help="where partition files go (defaults to the system temp dir)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        counts = reconcile(args.old_csv, args.new_csv, args.output, args.workers, args.partitions, args.tmp_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"Reconciled {counts['old_rows']} -> {counts['new_rows']} rows in {elapsed:.1f}s")
+    for name in ("added", "removed", "changed", "unchanged"):
+        print(f"  {name}: {counts[name]}")
+    for name, count in sorted(counts.items()):
+        if "->" in name:
+            print(f"  {name}: {count}")
+    print(f"Change set written to {args.output}")
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(dict(counts, elapsed_seconds=round(elapsed, 3)), f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
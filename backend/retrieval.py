@@ -0,0 +1,222 @@
+import os
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from vector_store import (
+    BASE_DIR, INDEX_PATH, VECTOR_INDEX_PATH, VECTOR_NPROBE, open_index, load_chunk_metadata, load_pickled,
+    build_index,
+)
+from bm25 import BM25Index, reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
+
+# --- Retrieval Configuration ---
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+CORPUS_FILES = ["steps.txt", "Guidelines-dbt.txt", "NSP_SOP 10.04.01 PM.txt"]
+
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+# hybrid: BM25 + vector fused by reciprocal rank (confident BM25 hits skip the encode);
+# vector: dense only; bm25: lexical only, the embedding model is not loaded
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+RETRIEVAL_MODES = ("hybrid", "vector", "bm25")
+# Candidates taken from each ranking before fusion
+FUSION_CANDIDATES = int(os.getenv("RETRIEVAL_FUSION_CANDIDATES", "20"))
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+
+
+# --- Corpus Helpers ---
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[Dict[str, Any]]:
+    """Split text into overlapping chunks, preferring paragraph boundaries"""
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            # Break on the last blank line / newline / sentence end inside the window
+            for sep in ("\n\n", "\n", ". "):
+                cut = text.rfind(sep, start + chunk_size // 2, end)
+                if cut != -1:
+                    end = cut + len(sep)
+                    break
+        raw = text[start:end]
+        piece = raw.strip()
+        if piece:
+            chunks.append({"text": piece, "offset": start + len(raw) - len(raw.lstrip())})
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def load_corpus_chunks(base_dir: str = BASE_DIR) -> List[Dict[str, Any]]:
+    """Chunk every corpus file and tag each chunk with its source file"""
+    chunks = []
+    for filename in CORPUS_FILES:
+        path = os.path.join(base_dir, filename)
+        if not os.path.exists(path):
+            logger.warning(f"Corpus file missing: {path}")
+            continue
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+        for chunk in chunk_text(text):
+            chunk["source"] = filename
+            chunks.append(chunk)
+    return chunks
+
+
+# --- Retriever ---
+class Retriever:
+    """Top-k hybrid (BM25 + semantic) search over the DBT/NSP corpus, loaded once per process"""
+
+    def __init__(self, index_path: str = INDEX_PATH, model_name: str = EMBEDDING_MODEL, mode: str = RETRIEVAL_MODE):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"RETRIEVAL_MODE must be one of {RETRIEVAL_MODES}, got {mode!r}")
+        self.mode = mode
+        # Preferred: memory-mapped index shared by all workers via the page cache
+        if not self._load_mmap(index_path):
+            self._load_pickle(index_path)
+
+        if self.index.ntotal != len(self.chunks):
+            logger.warning(
+                f"Index has {self.index.ntotal} vectors but {len(self.chunks)} chunks were loaded; "
+                "results beyond the shorter of the two are ignored"
+            )
+        # Chunks from here on are not in self.index (see _add_uncovered_corpus)
+        self.indexed = len(self.chunks)
+        self._add_uncovered_corpus()
+
+        self.lexical = BM25Index([chunk["text"] for chunk in self.chunks])
+
+        self.model = None
+        self.extra_index = None
+        if mode != "bm25":
+            try:
+                # Imported here: sentence-transformers pulls in torch and takes seconds to import
+                from sentence_transformers import SentenceTransformer
+                self.model = SentenceTransformer(model_name)
+            except Exception as e:
+                if mode != "hybrid":
+                    raise
+                # BM25 alone still answers; better than no knowledge base at all
+                logger.warning(f"Embedding model {model_name} could not be loaded ({e}); falling back to bm25 mode")
+                self.mode = "bm25"
+        if self.model is not None and len(self.chunks) > self.indexed:
+            self.extra_index = build_index(self.encode([c["text"] for c in self.chunks[self.indexed:]]))
+        logger.info(
+            f"Retriever loaded {self.index.ntotal} vectors from {self.index_path}, "
+            f"{len(self.chunks) - self.indexed} unindexed corpus chunks and "
+            f"{len(self.lexical.postings)} BM25 terms ({self.mode} mode)"
+        )
+
+    def _load_mmap(self, index_path: str) -> bool:
+        """Open the memory-mapped index if it is there and in step with the pickle; returns success"""
+        metadata = load_chunk_metadata(VECTOR_INDEX_PATH)
+        if not (os.path.exists(VECTOR_INDEX_PATH) and metadata):
+            return False
+        # build_index.py without --mmap-kind rebuilds only the pickle and its sidecar
+        pickled = load_chunk_metadata(index_path)
+        if pickled and [m["text"] for m in pickled] != [m["text"] for m in metadata]:
+            logger.warning(f"{VECTOR_INDEX_PATH} was built from other chunks than {index_path}; ignoring it")
+            return False
+        index = open_index(VECTOR_INDEX_PATH, VECTOR_NPROBE)
+        if index.ntotal != len(metadata):
+            logger.warning(f"{VECTOR_INDEX_PATH} has {index.ntotal} vectors for {len(metadata)} chunks; ignoring it")
+            return False
+        self.index = index
+        self.chunks = metadata
+        self.index_path = VECTOR_INDEX_PATH
+        return True
+
+    def _load_pickle(self, index_path: str) -> None:
+        """Load the legacy in-RAM pickled IndexFlatL2"""
+        self.index, texts = load_pickled(index_path)
+        self.index_path = index_path
+
+        # dbt_index.pkl holds (IndexFlatL2, chunk_texts); a bare index is
+        # paired with a fresh chunking of the corpus files instead.
+        if texts is not None:
+            self.chunks = [{"text": t, "source": None, "offset": None} for t in texts]
+            metadata = load_chunk_metadata(index_path)
+            if metadata and [m["text"] for m in metadata] == texts:
+                self.chunks = metadata
+        else:
+            self.chunks = load_corpus_chunks()
+
+    def _add_uncovered_corpus(self) -> None:
+        """Append the corpus chunks the index does not hold, so every corpus file stays retrievable
+
+        An index built by build_index.py from the current corpus holds all of them; an
+        older one (the committed dbt_index.pkl holds 31 curated texts) covers only part.
+        The extra chunks are searched by BM25 and, once the model is loaded, embedded
+        into a small in-memory index of their own.
+        """
+        indexed = {" ".join(chunk["text"].split()) for chunk in self.chunks}
+        extra = [chunk for chunk in load_corpus_chunks() if " ".join(chunk["text"].split()) not in indexed]
+        if extra:
+            logger.warning(
+                f"{self.index_path} is missing {len(extra)} corpus chunks; searching them alongside it. "
+                "Rebuild it with build_index.py"
+            )
+            self.chunks = self.chunks + extra
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into float32 vectors matching the index dimension"""
+        return np.asarray(self.model.encode(texts), dtype="float32")
+
+    def _results(self, scored: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+        return [{**self.chunks[idx], "id": int(idx), "score": float(score)} for idx, score in scored]
+
+    def lexical_shortcut(self, query: str, top_k: int = TOP_K) -> Optional[List[Dict[str, Any]]]:
+        """BM25 results when they are enough on their own (no encode needed), else None"""
+        if self.mode == "vector":
+            return None
+        hits = self.lexical.search(query, top_k)
+        if self.mode == "bm25" or self.lexical.is_confident(query, hits):
+            return self._results(hits)
+        return None
+
+    def _dense(self, query: str, k: int, vector: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        indexes = [(index, offset) for index, offset in ((self.index, 0), (self.extra_index, self.indexed))
+                   if index is not None and index.ntotal]
+        if k <= 0 or not indexes:
+            return []
+        if vector is None:
+            vector = self.encode([query])
+        vector = np.asarray(vector, dtype="float32").reshape(1, -1)
+        scored = []
+        for index, offset in indexes:
+            distances, ids = index.search(vector, min(k, index.ntotal))
+            limit = self.indexed if offset == 0 else len(self.chunks)
+            scored.extend((offset + int(idx), float(distance)) for distance, idx in zip(distances[0], ids[0])
+                          if 0 <= offset + idx < limit)
+        # Both indexes hold L2 distances from the same model, so they merge directly
+        return sorted(scored, key=lambda item: item[1])[:k]
+
+    def search(self, query: str, top_k: int = TOP_K, vector: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Return the top-k chunks for a query, best first; pass vector to skip re-encoding
+
+        score is the L2 distance in vector mode, the BM25 score in bm25 mode and the
+        fused reciprocal-rank score in hybrid mode.
+        """
+        if self.mode == "bm25":
+            return self._results(self.lexical.search(query, top_k))
+        if self.mode == "vector":
+            return self._results(self._dense(query, top_k, vector))
+        candidates = max(top_k, FUSION_CANDIDATES)
+        dense = self._dense(query, candidates, vector)
+        lexical = self.lexical.search(query, candidates)
+        fused = reciprocal_rank_fusion([[idx for idx, _ in dense], [idx for idx, _ in lexical]], top_k=top_k)
+        return self._results(fused)
+
+
+def load_retriever() -> Optional[Retriever]:
+    """Create the process-wide retriever, or None if the index cannot be loaded"""
+    try:
+        return Retriever()
+    except Exception as e:
+        logger.error(f"Error loading retrieval index: {e}")
+        return None
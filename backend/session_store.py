@@ -0,0 +1,184 @@
+"""
+Conversation-state store for the WhatsApp bot.
+
+Sessions are small (language, menu state, current FAQ category) and are packed into
+one compact string per sender. Every backend evicts sessions idle for longer than
+SESSION_IDLE_TTL_SECONDS, so memory stays bounded no matter how many numbers have
+ever messaged the bot.
+
+Backends (SESSION_BACKEND):
+  - memory: in-process LRU, for a single worker (default)
+  - sqlite: one SQLite file (SESSION_DB_PATH) shared by all workers on a machine
+  - redis:  any Redis-compatible server (REDIS_URL), shared across machines
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("SESSION_IDLE_TTL_SECONDS", str(24 * 3600)))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "100000"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.db"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Only these fields are persisted, in this order
+SESSION_FIELDS = ("lang", "state", "current_category")
+_SEPARATOR = "\x1f"
+
+
+def pack_session(session: Dict[str, Any]) -> str:
+    """Encode a session as one compact delimited string"""
+    return _SEPARATOR.join(str(session.get(field) or "") for field in SESSION_FIELDS)
+
+
+def unpack_session(packed: Optional[str]) -> Dict[str, Any]:
+    """Decode a packed session; missing or empty fields are left out"""
+    if not packed:
+        return {}
+    values = packed.split(_SEPARATOR)
+    return {field: value for field, value in zip(SESSION_FIELDS, values) if value}
+
+
+class MemorySessionStore:
+    """In-process LRU with idle-TTL eviction"""
+
+    def __init__(self, ttl: int = SESSION_IDLE_TTL_SECONDS, max_entries: int = SESSION_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sender_id: str) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(sender_id)
+            if entry is None:
+                return {}
+            if now - entry[0] > self.ttl:
+                del self._sessions[sender_id]
+                return {}
+            self._sessions[sender_id] = (now, entry[1])
+            self._sessions.move_to_end(sender_id)
+            return unpack_session(entry[1])
+
+    def set(self, sender_id: str, session: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._sessions[sender_id] = (now, pack_session(session))
+            self._sessions.move_to_end(sender_id)
+            # Oldest entries are at the front: drop the idle ones and anything over the cap
+            while self._sessions:
+                oldest_id, (last_seen, _) = next(iter(self._sessions.items()))
+                if len(self._sessions) > self.max_entries or now - last_seen > self.ttl:
+                    del self._sessions[oldest_id]
+                else:
+                    break
+
+    def delete(self, sender_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(sender_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """SQLite-backed store shared by every worker process on one machine"""
+
+    # Reads refresh last_seen at most this often, to avoid a write per message
+    TOUCH_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str = SESSION_DB_PATH, ttl: int = SESSION_IDLE_TTL_SECONDS):
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (sender_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_seen REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, sender_id: str) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_seen FROM sessions WHERE sender_id = ?", (sender_id,)
+            ).fetchone()
+            if row is None:
+                return {}
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM sessions WHERE sender_id = ?", (sender_id,))
+                return {}
+            if now - row[1] > self.TOUCH_INTERVAL_SECONDS:
+                self._conn.execute("UPDATE sessions SET last_seen = ? WHERE sender_id = ?", (now, sender_id))
+        return unpack_session(row[0])
+
+    def set(self, sender_id: str, session: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (sender_id, data, last_seen) VALUES (?, ?, ?)",
+                (sender_id, pack_session(session), now),
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._conn.execute("DELETE FROM sessions WHERE last_seen < ?", (now - self.ttl,))
+
+    def delete(self, sender_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE sender_id = ?", (sender_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class RedisSessionStore:
+    """Redis-compatible store; the key TTL is the idle timeout and is refreshed on access"""
+
+    def __init__(self, client=None, ttl: int = SESSION_IDLE_TTL_SECONDS, prefix: str = "dbt:session:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(REDIS_URL)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, sender_id: str) -> Dict[str, Any]:
+        key = self.prefix + sender_id
+        raw = self.client.get(key)
+        if raw is None:
+            return {}
+        self.client.expire(key, self.ttl)
+        return unpack_session(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+
+    def set(self, sender_id: str, session: Dict[str, Any]) -> None:
+        self.client.set(self.prefix + sender_id, pack_session(session), ex=self.ttl)
+
+    def delete(self, sender_id: str) -> None:
+        self.client.delete(self.prefix + sender_id)
+
+    def __len__(self) -> int:
+        # Only this store's keys: the database may be shared with the answer cache. A full
+        # SCAN, so it is read by /metrics scrapes only, not by the /health probe
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*", count=1000))
+
+
+def create_session_store():
+    """Build the store configured by SESSION_BACKEND"""
+    if SESSION_BACKEND == "sqlite":
+        store = SQLiteSessionStore()
+    elif SESSION_BACKEND == "redis":
+        store = RedisSessionStore()
+    else:
+        store = MemorySessionStore()
+    logger.info(f"Session store using {type(store).__name__}")
+    return store
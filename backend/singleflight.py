@@ -0,0 +1,58 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+When a deadline is announced, many users ask the same question within seconds, before
+the first answer has reached the answer cache. SingleFlight runs one call per key at
+a time: the first request for a key (the leader) starts the work as a task, and every
+request for the same key that arrives while it is running awaits that same task
+instead of starting its own. All of them receive its result, or its exception.
+
+The task is shielded from its waiters, so a client that disconnects does not cancel
+the call for everyone else (or for the cache it is about to fill).
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Share one execution of an async call among concurrent callers with the same key"""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats_counts = {"calls": 0, "executions": 0, "shared": 0, "errors": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of fn(), run at most once at a time per key"""
+        self.stats_counts["calls"] += 1
+        task = self._tasks.get(key)
+        if task is not None:
+            # An upstream call saved
+            self.stats_counts["shared"] += 1
+        else:
+            self.stats_counts["executions"] += 1
+            task = asyncio.get_running_loop().create_task(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        # Later requests start a fresh call (and normally hit the answer cache)
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.stats_counts["errors"] += 1
+            logger.error(f"Coalesced call failed: {error!r}")
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.stats_counts["calls"]
+        return {
+            **self.stats_counts,
+            "in_flight": len(self._tasks),
+            "saved_ratio": round(self.stats_counts["shared"] / calls, 3) if calls else 0,
+        }
@@ -0,0 +1,207 @@
+"""
+Indexed student DBT status store.
+
+Records from students.csv (student_id, aadhaar_last4, ifsc_code, dbt_status,
+seeding_status) live in a SQLite table whose primary key is (student_id,
+aadhaar_last4), so a lookup is a single index probe however many rows are loaded.
+
+The bulk loader streams the CSV in chunks (never holding the whole file in memory)
+into a temporary database of its own and atomically swaps it into place, so readers
+never see a half-loaded table. When a process opens the store it rebuilds the database
+if the CSV has changed since it was built; a file lock makes concurrent processes (API
+workers, the bot) build it once rather than race. A CSV updated while the services run
+is picked up on their next start, or at once by running this module.
+
+Usage:
+    python status_store.py students.csv [--db students.db] [--chunk-size 50000]
+"""
+import os
+import csv
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no build lock, but each build still has its own temporary file
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STUDENTS_CSV_PATH = os.getenv("STUDENTS_CSV_PATH", os.path.join(BASE_DIR, "students.csv"))
+STATUS_DB_PATH = os.getenv("STATUS_DB_PATH", os.path.join(BASE_DIR, "students.db"))
+STATUS_LOAD_CHUNK_SIZE = int(os.getenv("STATUS_LOAD_CHUNK_SIZE", "50000"))
+
+STATUS_FIELDS = ("student_id", "aadhaar_last4", "ifsc_code", "dbt_status", "seeding_status")
+# Pairs per batched query; keeps well under SQLite's bound-parameter limit
+_BATCH_SIZE = 400
+
+
+def _chunks(rows: Iterable, size: int) -> Iterable[List]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _read_rows(csv_path: str) -> Iterable[Tuple[str, ...]]:
+    """Stream normalised rows from the CSV; malformed rows are skipped"""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = set(STATUS_FIELDS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{csv_path} is missing columns: {', '.join(sorted(missing))}")
+        for row in reader:
+            student_id = (row["student_id"] or "").strip()
+            last4 = (row["aadhaar_last4"] or "").strip()
+            if not student_id or not last4:
+                continue
+            yield (student_id, last4, *((row[field] or "").strip() for field in STATUS_FIELDS[2:]))
+
+
+def load_csv(csv_path: str = STUDENTS_CSV_PATH, db_path: str = STATUS_DB_PATH, chunk_size: int = STATUS_LOAD_CHUNK_SIZE) -> int:
+    """Bulk-load the CSV into a fresh database and swap it into place; returns the row count"""
+    start = time.perf_counter()
+    # A temporary file of this build's own, in the same directory so the swap is a rename
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(db_path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(db_path)))
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path, isolation_level=None)
+        try:
+            # Throwaway file until the swap, so durability is not needed while loading
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE students (student_id TEXT NOT NULL, aadhaar_last4 TEXT NOT NULL, ifsc_code TEXT, "
+                "dbt_status TEXT, seeding_status TEXT, PRIMARY KEY (student_id, aadhaar_last4)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            rows = 0
+            for chunk in _chunks(_read_rows(csv_path), chunk_size):
+                conn.execute("BEGIN")
+                conn.executemany("INSERT OR REPLACE INTO students VALUES (?, ?, ?, ?, ?)", chunk)
+                conn.execute("COMMIT")
+                rows += len(chunk)
+            stat = os.stat(csv_path)
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("source_mtime", str(stat.st_mtime)), ("source_size", str(stat.st_size)), ("rows", str(rows))],
+            )
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    logger.info(f"Loaded {rows} status records from {csv_path} in {time.perf_counter() - start:.1f}s")
+    return rows
+
+
+def is_stale(csv_path: str = STUDENTS_CSV_PATH, db_path: str = STATUS_DB_PATH) -> bool:
+    """True if the database is missing or was built from a different version of the CSV"""
+    if not os.path.exists(db_path):
+        return True
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            conn.close()
+        stat = os.stat(csv_path)
+        return meta.get("source_mtime") != str(stat.st_mtime) or meta.get("source_size") != str(stat.st_size)
+    except (sqlite3.Error, OSError):
+        return True
+
+
+class StatusStore:
+    """Read-only lookups by (student_id, aadhaar_last4)"""
+
+    def __init__(self, db_path: str = STATUS_DB_PATH):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def lookup(self, student_id: str, aadhaar_last4: str) -> Optional[Dict[str, str]]:
+        """One record, or None if there is no match"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM students WHERE student_id = ? AND aadhaar_last4 = ?",
+                (student_id.strip(), aadhaar_last4.strip()),
+            ).fetchone()
+        return dict(zip(STATUS_FIELDS, row)) if row else None
+
+    def lookup_many(self, keys: List[Tuple[str, str]]) -> List[Optional[Dict[str, str]]]:
+        """Records for many keys (in input order) with one query per batch"""
+        keys = [(student_id.strip(), last4.strip()) for student_id, last4 in keys]
+        found: Dict[Tuple[str, str], Dict[str, str]] = {}
+        for batch in _chunks(dict.fromkeys(keys), _BATCH_SIZE):
+            values = ", ".join(["(?, ?)"] * len(batch))
+            params = [value for key in batch for value in key]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"WITH q(student_id, aadhaar_last4) AS (VALUES {values}) "
+                    "SELECT s.* FROM q JOIN students s USING (student_id, aadhaar_last4)",
+                    params,
+                ).fetchall()
+            for row in rows:
+                found[(row[0], row[1])] = dict(zip(STATUS_FIELDS, row))
+        return [found.get(key) for key in keys]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT value FROM meta WHERE key = 'rows'").fetchone()[0])
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+@contextmanager
+def _build_lock(db_path: str) -> Iterator[None]:
+    """Exclusive lock (across processes) on building the database at db_path"""
+    with open(f"{db_path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Released when the file is closed
+        yield
+
+
+def create_status_store(csv_path: str = STUDENTS_CSV_PATH, db_path: str = STATUS_DB_PATH) -> Optional[StatusStore]:
+    """Open the store, (re)building it from the CSV if needed; None if no data is available"""
+    try:
+        if os.path.exists(csv_path) and is_stale(csv_path, db_path):
+            with _build_lock(db_path):
+                # Another process may have built it while this one waited for the lock
+                if is_stale(csv_path, db_path):
+                    load_csv(csv_path, db_path)
+        if not os.path.exists(db_path):
+            logger.warning(f"No status data: {csv_path} not found")
+            return None
+        return StatusStore(db_path)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logger.error(f"Error loading status store: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_path", nargs="?", default=STUDENTS_CSV_PATH)
+    parser.add_argument("--db", default=STATUS_DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=STATUS_LOAD_CHUNK_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    load_csv(args.csv_path, args.db, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import threading
+
+import httpx
+import pytest
+
+# The backend modules are flat scripts imported by name, as the services run them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def fake_graph_server():
+    """fakes/fake_graph_api.py served by uvicorn on a free local port; yields its root URL"""
+    import uvicorn
+    from fakes import fake_graph_api
+
+    server = uvicorn.Server(uvicorn.Config(fake_graph_api.app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake Graph API did not start")
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def fake_graph(fake_graph_server):
+    """The fake Graph API with no recorded messages, counters or scripted failures"""
+    httpx.delete(f"{fake_graph_server}/_messages")
+    return fake_graph_server
+
+
+class FakeClock:
+    """Clock for code that takes an injectable time source; move it with `clock.now += seconds`"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
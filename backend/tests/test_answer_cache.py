@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from answer_cache import AnswerCache, MemoryBackend, RedisBackend
+from fakes.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def redis(clock):
+    return FakeRedis(clock)
+
+
+@pytest.fixture
+def cache(redis):
+    return AnswerCache(RedisBackend(redis), ttl=60)
+
+
+def test_exact_hit_after_set(cache):
+    assert cache.get("What is DBT?", "en", "ctx1") is None
+    cache.set("What is DBT?", "en", "ctx1", "Direct Benefit Transfer.")
+    # Same question after normalisation (case, punctuation)
+    assert cache.get("what is dbt", "en", "ctx1") == "Direct Benefit Transfer."
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], len(cache.backend)) == (1, 1, 1)
+    assert stats["backend"] == "RedisBackend"
+
+
+def test_language_and_context_are_part_of_the_key(cache):
+    cache.set("What is DBT?", "en", "ctx1", "Direct Benefit Transfer.")
+    assert cache.get("What is DBT?", "hi", "ctx1") is None
+    # Different retrieved excerpts: the model would have seen other context
+    assert cache.get("What is DBT?", "en", "ctx2") is None
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("What is DBT?", "en", "ctx1", "Direct Benefit Transfer.")
+    clock.now += 59
+    assert cache.get("What is DBT?", "en", "ctx1") is not None
+    clock.now += 2
+    assert cache.get("What is DBT?", "en", "ctx1") is None
+    assert len(cache.backend) == 0
+
+
+def test_entries_count_only_this_caches_keys(cache, redis):
+    redis.set("dbt:session:919000000001", "{}")
+    redis.set("other-app:key", "x")
+    cache.set("What is DBT?", "en", "ctx1", "Direct Benefit Transfer.")
+    assert redis.dbsize() == 3
+    assert len(cache.backend) == 1
+
+
+def test_semantic_hit_for_a_paraphrase(redis):
+    cache = AnswerCache(RedisBackend(redis), ttl=60, semantic_threshold=0.9)
+    cache.set("How do I link Aadhaar to my bank?", "en", "ctx1", "Visit your branch.", np.array([1.0, 0.1, 0.0]))
+    assert cache.get("Linking Aadhaar with bank account", "en", "ctx1", np.array([0.95, 0.15, 0.0])) == "Visit your branch."
+    assert cache.get("Something unrelated", "en", "ctx1", np.array([0.0, 0.0, 1.0])) is None
+    assert (cache.semantic_hits, cache.misses) == (1, 1)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = AnswerCache(MemoryBackend(max_entries=2), ttl=60)
+    cache.set("q1", "en", "c", "a1")
+    cache.set("q2", "en", "c", "a2")
+    cache.get("q1", "en", "c")
+    cache.set("q3", "en", "c", "a3")
+    assert cache.get("q2", "en", "c") is None
+    assert cache.get("q1", "en", "c") == "a1"
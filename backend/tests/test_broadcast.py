@@ -0,0 +1,100 @@
+import json
+import time
+import asyncio
+
+import httpx
+
+from broadcast import Broadcaster, load_checkpoint
+from graph_client import GraphClient, TokenBucket
+
+ROWS = [
+    {"recipient": "919000000001", "student_id": "S1", "new_dbt_status": "Paid"},
+    {"recipient": "919000000002", "student_id": "S2", "new_dbt_status": "Pending"},
+    {"recipient": "919000000003", "student_id": "S3", "new_dbt_status": "Paid"},
+]
+
+
+def broadcast(fake_graph, outcomes_path, rows=ROWS, rate=1000.0, **kwargs):
+    client = GraphClient("test-token", "12345", base_url=f"{fake_graph}/v18.0", backoff=0.01,
+                         rate_limiter=TokenBucket(rate, capacity=1))
+    broadcaster = Broadcaster(client, "dbt_status_update", str(outcomes_path),
+                              parameters=["{student_id}", "{new_dbt_status}"], **kwargs)
+
+    async def main():
+        try:
+            return await broadcaster.run(rows)
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def test_sends_approved_template_with_body_parameters(fake_graph, tmp_path):
+    counts = broadcast(fake_graph, tmp_path / "outcomes.jsonl")
+    assert counts["sent"] == 3
+    message = httpx.get(f"{fake_graph}/_messages", params={"to": "919000000002"}).json()[0]
+    assert message["type"] == "template"
+    assert message["template"] == {
+        "name": "dbt_status_update",
+        "language": {"code": "en"},
+        "components": [{"type": "body", "parameters": [{"type": "text", "text": "S2"}, {"type": "text", "text": "Pending"}]}],
+    }
+
+
+def test_resume_skips_recipients_already_sent(fake_graph, tmp_path):
+    outcomes = tmp_path / "outcomes.jsonl"
+    broadcast(fake_graph, outcomes, rows=ROWS[:2])
+    httpx.delete(f"{fake_graph}/_messages")
+    counts = broadcast(fake_graph, outcomes)
+    assert counts["sent"] == 1 and counts["skipped"] == 2
+    assert [m["to"] for m in httpx.get(f"{fake_graph}/_messages").json()] == ["919000000003"]
+    assert load_checkpoint(str(outcomes)) == {row["recipient"] for row in ROWS}
+
+
+def test_missing_template_field_is_recorded_as_failed(fake_graph, tmp_path):
+    outcomes = tmp_path / "outcomes.jsonl"
+    counts = broadcast(fake_graph, outcomes, rows=[{"recipient": "919000000001", "student_id": "S1"}])
+    assert counts["failed"] == 1
+    assert "template error" in json.loads(outcomes.read_text())["error"]
+    assert httpx.get(f"{fake_graph}/_stats").json()["requests"] == 0
+
+
+def test_429_retries_are_paced_by_the_rate(fake_graph, tmp_path):
+    httpx.post(f"{fake_graph}/_failures", params={"count": 3, "status": 429})
+    start = time.perf_counter()
+    counts = broadcast(fake_graph, tmp_path / "outcomes.jsonl", rows=ROWS[:1], rate=10.0)
+    elapsed = time.perf_counter() - start
+    assert counts["sent"] == 1
+    assert httpx.get(f"{fake_graph}/_stats").json()["requests"] == 4
+    # Four attempts at 10/s with a burst of one: every retry waited for a token
+    assert elapsed >= 0.3
+
+
+class FlakyClient:
+    """deliver() raises for one recipient, as an unexpected client error would"""
+
+    async def deliver(self, recipient, body):
+        if recipient == "919000000002":
+            raise httpx.DecodingError("garbled response")
+        return True, None
+
+
+def test_unexpected_send_error_is_recorded_and_the_run_finishes(tmp_path):
+    outcomes = tmp_path / "outcomes.jsonl"
+    broadcaster = Broadcaster(FlakyClient(), "dbt_status_update", str(outcomes), concurrency=1)
+    counts = asyncio.run(asyncio.wait_for(broadcaster.run(ROWS), timeout=5))
+    assert (counts["sent"], counts["failed"]) == (2, 1)
+    failed = [json.loads(line) for line in outcomes.read_text().splitlines() if '"failed"' in line]
+    assert failed[0]["recipient"] == "919000000002" and "garbled" in failed[0]["error"]
+
+
+def test_checkpoint_skips_lines_that_are_not_outcomes(tmp_path):
+    outcomes = tmp_path / "outcomes.jsonl"
+    outcomes.write_text("\n".join([
+        json.dumps({"recipient": "919000000001", "status": "sent"}),
+        json.dumps({"status": "sent"}),
+        json.dumps(["919000000002"]),
+        "42",
+        json.dumps({"recipient": "919000000003", "status": "failed"}),
+    ]) + "\n")
+    assert load_checkpoint(str(outcomes)) == {"919000000001", "919000000003"}
+    assert load_checkpoint(str(outcomes), retry_failed=True) == {"919000000001"}
@@ -0,0 +1,96 @@
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+api = importlib.import_module("backend-api-local")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No lifespan: the warm-up (Gemini, index, status store) is not needed here
+    monkeypatch.setitem(api.readiness, "gemini", "ready")
+    monkeypatch.setitem(api.readiness, "retrieval", "ready")
+    monkeypatch.setattr(api, "model", object())
+    return TestClient(api.app)
+
+
+def test_chat_llm_answer_has_null_error(client, monkeypatch):
+    async def answer(query, language):
+        return api.AnswerResponse(answer="Visit your bank branch.", success=True)
+
+    monkeypatch.setattr(api, "coalesced_answer", answer)
+    response = client.post("/chat", json={"message": "When will the money reach my account?"})
+    assert response.status_code == 200
+    assert response.json()["tier"] == "llm"
+    assert response.json()["error"] is None
+
+
+def test_chat_cached_answer(client, monkeypatch):
+    async def answer(query, language):
+        return api.AnswerResponse(answer="Cached.", success=True, cached=True)
+
+    monkeypatch.setattr(api, "coalesced_answer", answer)
+    response = client.post("/chat", json={"message": "Who approves the payment file?"})
+    assert response.status_code == 200
+    assert response.json()["tier"] == "cache"
+
+
+def test_keyword_mention_in_longer_question_goes_to_llm(client, monkeypatch):
+    async def answer(query, language):
+        return api.AnswerResponse(answer="Renew from the NSP dashboard.", success=True)
+
+    monkeypatch.setattr(api, "coalesced_answer", answer)
+    message = "How do I renew my NSP application after it was rejected by the institute?"
+    response = client.post("/chat", json={"message": message})
+    assert response.json()["tier"] == "llm"
+
+
+@pytest.mark.parametrize("message, language", [("nsp", "en"), ("What is DBT?", "en"), ("dbt ka matlab kya hai", "hi")])
+def test_short_keyword_question_answered_at_tier_one(client, message, language):
+    response = client.post("/chat", json={"message": message, "language": language})
+    assert response.json()["tier"] == "keyword"
+
+
+class EchoModel:
+    async def generate_content_async(self, prompt, **kwargs):
+        return type("Response", (), {"text": "Hello, I am working correctly!"})()
+
+
+def test_waiting_for_a_gemini_slot_is_not_counted_by_the_breaker(monkeypatch):
+    breaker = api.CircuitBreaker("test")
+    monkeypatch.setattr(api, "gemini_breaker", breaker)
+    monkeypatch.setattr(api, "model", EchoModel())
+    monkeypatch.setattr(api, "GEMINI_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        monkeypatch.setattr(api, "gemini_semaphore", api.asyncio.Semaphore(1))
+        async with api.gemini_slot(1):
+            assert api.gemini_in_flight == 1
+            with pytest.raises(api.asyncio.TimeoutError):
+                await api.generate_content("prompt")
+        return await api.generate_content("prompt")
+
+    assert api.asyncio.run(scenario()).text
+    assert api.gemini_in_flight == 0
+    assert breaker.stats_counts["calls"] == 1
+    assert breaker.stats_counts["failures"] == 0
+
+
+def test_connection_check_bypasses_open_breaker(client, monkeypatch):
+    breaker = api.CircuitBreaker("test")
+    breaker._open("test")
+    monkeypatch.setattr(api, "gemini_breaker", breaker)
+    monkeypatch.setattr(api, "model", EchoModel())
+    response = client.post("/test-connection")
+    assert response.status_code == 200
+    assert breaker.stats_counts["calls"] == 0
+    assert breaker.state == "open"
+
+
+def test_health_does_not_count_cache_entries(client, monkeypatch):
+    counted = []
+    backend = api.answer_cache.backend
+    monkeypatch.setattr(type(backend), "__len__", lambda self: counted.append(1) or 0)
+    assert client.get("/health").status_code == 200
+    assert counted == []
@@ -0,0 +1,20 @@
+from fallback import INTRO, extractive_answer
+from knowledge import FAQ_DATA, KNOWLEDGE_BASE
+
+FAQ_ITEMS = [item for category in FAQ_DATA.values() for item in category["questions"]]
+CHUNKS = [{"text": "Applications are verified by the Institute Nodal Officer before the payment file is generated."}]
+
+
+def test_english_question_gets_a_curated_english_answer():
+    english = {item["answer"] for item in FAQ_ITEMS} | {intent["answer"] for intent in KNOWLEDGE_BASE["en"].values()}
+    for item in FAQ_ITEMS:
+        assert extractive_answer(item["question"], "en", CHUNKS) in english
+
+
+def test_hindi_question_never_gets_english_faq_text():
+    english = {item["answer"] for item in FAQ_ITEMS}
+    hindi = {intent["answer"] for intent in KNOWLEDGE_BASE["hi"].values()}
+    for item in FAQ_ITEMS:
+        answer = extractive_answer(item["question"], "hi", CHUNKS)
+        assert answer not in english
+        assert answer in hindi or answer.startswith(INTRO["hi"])
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+
+from graph_client import GraphClient
+
+
+def make_client(fake_graph, **kwargs):
+    return GraphClient("test-token", "12345", base_url=f"{fake_graph}/v18.0", backoff=0.01, **kwargs)
+
+
+def run(coro_fn, client):
+    async def main():
+        try:
+            return await coro_fn()
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def test_send_posts_the_payload(fake_graph):
+    client = make_client(fake_graph)
+    assert run(lambda: client.send("919000000001", {"type": "text", "text": {"body": "hello"}}), client)
+    messages = httpx.get(f"{fake_graph}/_messages").json()
+    assert len(messages) == 1
+    assert messages[0]["to"] == "919000000001"
+    assert messages[0]["messaging_product"] == "whatsapp"
+    assert messages[0]["text"] == {"body": "hello"}
+    assert messages[0]["phone_number_id"] == "12345"
+
+
+def test_429_is_retried_until_sent(fake_graph):
+    httpx.post(f"{fake_graph}/_failures", params={"count": 2, "status": 429})
+    client = make_client(fake_graph)
+    ok, error = run(lambda: client.deliver("919000000001", b'{"to":"919000000001"}'), client)
+    assert ok and error is None
+    assert httpx.get(f"{fake_graph}/_stats").json() == {"requests": 3, "failures_injected": 2, "messages": 1}
+
+
+def test_gives_up_after_max_retries(fake_graph):
+    httpx.post(f"{fake_graph}/_failures", params={"count": 5, "status": 503})
+    client = make_client(fake_graph, max_retries=1)
+    ok, error = run(lambda: client.deliver("919000000001", b'{"to":"919000000001"}'), client)
+    assert not ok
+    assert "gave up after 2 attempts" in error
+    assert httpx.get(f"{fake_graph}/_stats").json()["requests"] == 2
+
+
+def test_client_errors_are_not_retried(fake_graph):
+    httpx.post(f"{fake_graph}/_failures", params={"count": 1, "status": 400})
+    client = make_client(fake_graph)
+    ok, error = run(lambda: client.deliver("919000000001", b'{"to":"919000000001"}'), client)
+    assert not ok
+    assert error.startswith("HTTP 400")
+    assert httpx.get(f"{fake_graph}/_stats").json()["requests"] == 1
+
+
+def test_sends_to_one_recipient_stay_in_order(fake_graph):
+    client = make_client(fake_graph)
+
+    async def send_all():
+        await asyncio.gather(*(client.send("919000000001", {"type": "text", "text": {"body": str(i)}}) for i in range(20)))
+
+    run(send_all, client)
+    bodies = [m["text"]["body"] for m in httpx.get(f"{fake_graph}/_messages", params={"to": "919000000001"}).json()]
+    assert bodies == [str(i) for i in range(20)]
@@ -0,0 +1,27 @@
+import random
+import sys
+
+import pytest
+
+from knowledge import KNOWLEDGE_BASE
+from matcher import AUTOMATON_MIN_KEYWORDS, IntentMatcher
+
+WORDS = ["aadhaar", "seeding", "bank", "account", "link", "nsp", "scholarship", "dbt", "kya", "hai",
+         "kaise", "kare", "status", "आधार", "बैंक", "खाता", "लिंक", "क्या", "है"]
+
+
+@pytest.mark.parametrize("lang", ["en", "hi"])
+def test_scan_and_automaton_find_the_same_intent(lang):
+    intents = dict(KNOWLEDGE_BASE[lang])
+    intents["overlap"] = {"keywords": ["bank", "bank bank", "link hai"], "answer": ""}
+    scan = IntentMatcher(intents, min_automaton_keywords=sys.maxsize)
+    automaton = IntentMatcher(intents, min_automaton_keywords=0)
+    rng = random.Random(0)
+    messages = [" ".join(rng.choices(WORDS, k=rng.randint(1, 12))) for _ in range(500)]
+    messages += ["What is DBT?", "Aadhar seeding kaise kare", "bankbank account", "bank bank bank"]
+    assert [scan.match(m) for m in messages] == [automaton.match(m) for m in messages]
+
+
+def test_real_knowledge_base_uses_the_scan():
+    assert len(IntentMatcher(KNOWLEDGE_BASE["en"]).keywords) < AUTOMATON_MIN_KEYWORDS
+    assert IntentMatcher(KNOWLEDGE_BASE["en"])._automaton is None
@@ -0,0 +1,13 @@
+import json
+
+import pytest
+
+from payloads import PayloadTemplate
+
+
+@pytest.mark.parametrize("recipient_id", ["919000000001", "٩١٩٠٠٠", "91²", 'x"y'])
+def test_rendered_body_is_valid_json_with_the_recipient(recipient_id):
+    template = PayloadTemplate({"messaging_product": "whatsapp", "text": {"body": "hi"}})
+    body = json.loads(template.render(recipient_id))
+    assert body["to"] == recipient_id
+    assert body["text"] == {"body": "hi"}
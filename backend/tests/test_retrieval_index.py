@@ -0,0 +1,86 @@
+import sys
+import types
+import pickle
+
+import faiss
+import numpy as np
+import pytest
+
+import retrieval
+import vector_store
+
+
+def write_pickle_index(path, texts, dim=8):
+    index = faiss.IndexFlatL2(dim)
+    index.add(np.random.default_rng(0).random((len(texts), dim), dtype="float32"))
+    with open(path, "wb") as f:
+        pickle.dump((index, texts), f)
+    vector_store.write_chunk_metadata([{"id": i, "text": t, "source": "test.txt", "offset": None} for i, t in enumerate(texts)], str(path))
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    pkl, mmap = tmp_path / "dbt_index.pkl", tmp_path / "dbt_index.faiss"
+    monkeypatch.setattr(retrieval, "VECTOR_INDEX_PATH", str(mmap))
+    # Only the test chunks, not the corpus files in backend/
+    monkeypatch.setattr(retrieval, "load_corpus_chunks", lambda: [])
+    return str(pkl), str(mmap)
+
+
+def test_mmap_index_has_its_own_sidecar(paths):
+    pkl, mmap = paths
+    assert vector_store.sidecar_paths(pkl)["chunks"] != vector_store.sidecar_paths(mmap)["chunks"]
+
+
+def test_mmap_index_preferred_when_in_step(paths):
+    pkl, mmap = paths
+    write_pickle_index(pkl, ["aadhaar seeding at the bank", "nsp renewal", "npci mapper"])
+    vector_store.convert("flat", mmap, pkl)
+    retriever = retrieval.Retriever(pkl, mode="bm25")
+    assert retriever.index_path == mmap
+    assert retriever.chunks[0]["source"] == "test.txt"
+
+
+def test_stale_mmap_index_ignored_after_pickle_rebuild(paths):
+    pkl, mmap = paths
+    write_pickle_index(pkl, ["aadhaar seeding at the bank", "nsp renewal", "npci mapper"])
+    vector_store.convert("flat", mmap, pkl)
+    # Same chunk count, different content: pairing these would return wrong chunks
+    write_pickle_index(pkl, ["ifsc code check", "payment file", "level 1 verification"])
+    retriever = retrieval.Retriever(pkl, mode="bm25")
+    assert retriever.index_path == pkl
+    assert retriever.chunks[0]["text"] == "ifsc code check"
+
+
+def test_corpus_chunks_missing_from_the_index_are_still_searched(paths, monkeypatch):
+    pkl, _ = paths
+    write_pickle_index(pkl, ["aadhaar seeding at the bank", "nsp renewal"])
+    corpus = [{"text": "nsp renewal", "source": "a.txt", "offset": 0},
+              {"text": "check the ifsc code of your branch", "source": "b.txt", "offset": 0}]
+    monkeypatch.setattr(retrieval, "load_corpus_chunks", lambda: corpus)
+    retriever = retrieval.Retriever(pkl, mode="bm25")
+    assert (retriever.indexed, len(retriever.chunks)) == (2, 3)
+    assert retriever.search("ifsc code", 1)[0]["source"] == "b.txt"
+
+    # Dense search merges the pickled index with the one built for the extra chunks
+    rng = np.random.default_rng(1)
+    extra = rng.random((1, 8), dtype="float32")
+    retriever.extra_index = vector_store.build_index(extra)
+    hits = retriever._dense("", 3, extra)
+    assert hits[0] == (2, 0.0)
+    assert sorted(idx for idx, _ in hits) == [0, 1, 2]
+
+
+def test_hybrid_falls_back_to_bm25_without_the_embedding_model(paths, monkeypatch):
+    pkl, _ = paths
+    write_pickle_index(pkl, ["aadhaar seeding at the bank", "nsp renewal"])
+
+    def unavailable(name):
+        raise OSError(f"{name} is not cached")
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(SentenceTransformer=unavailable))
+    retriever = retrieval.Retriever(pkl, mode="hybrid")
+    assert (retriever.mode, retriever.model) == ("bm25", None)
+    assert retriever.search("aadhaar seeding", 1)[0]["text"] == "aadhaar seeding at the bank"
+    with pytest.raises(OSError):
+        retrieval.Retriever(pkl, mode="vector")
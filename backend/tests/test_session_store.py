@@ -0,0 +1,47 @@
+import pytest
+
+from fakes.fake_redis import FakeRedis
+from session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore
+
+
+SESSION = {"lang": "hi", "state": "faq_category", "current_category": "dbt_basics"}
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(ttl=60)
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=60)
+    return RedisSessionStore(FakeRedis(), ttl=60)
+
+
+def test_round_trip_and_delete(store):
+    assert store.get("919000000001") == {}
+    store.set("919000000001", SESSION)
+    assert store.get("919000000001") == SESSION
+    assert len(store) == 1
+    store.delete("919000000001")
+    assert store.get("919000000001") == {}
+    assert len(store) == 0
+
+
+def test_redis_session_expires_when_idle_and_access_refreshes_it(clock):
+    store = RedisSessionStore(FakeRedis(clock), ttl=60)
+    store.set("919000000001", SESSION)
+    clock.now += 50
+    assert store.get("919000000001") == SESSION
+    clock.now += 50
+    assert store.get("919000000001") == SESSION
+    clock.now += 61
+    assert store.get("919000000001") == {}
+
+
+def test_redis_len_counts_only_session_keys():
+    redis = FakeRedis()
+    redis.set("dbt:answer:abc", "{}")
+    store = RedisSessionStore(redis, ttl=60)
+    store.set("919000000001", SESSION)
+    store.set("919000000002", SESSION)
+    assert redis.dbsize() == 3
+    assert len(store) == 2
@@ -0,0 +1,47 @@
+import csv
+import glob
+import threading
+
+import pytest
+
+import status_store
+from status_store import create_status_store, load_csv
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(status_store.STATUS_FIELDS)
+        for i in range(rows):
+            writer.writerow([f"S{i:06d}", f"{i % 10000:04d}", "SBIN0000001", "Credited", "Seeded"])
+
+
+def test_concurrent_processes_build_the_store_once(tmp_path, monkeypatch):
+    csv_path, db_path = str(tmp_path / "students.csv"), str(tmp_path / "students.db")
+    write_csv(csv_path, 20000)
+    builds = []
+    real_load = status_store.load_csv
+    monkeypatch.setattr(status_store, "load_csv", lambda *args: builds.append(1) or real_load(*args))
+
+    stores = []
+    threads = [threading.Thread(target=lambda: stores.append(create_status_store(csv_path, db_path))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert [len(store) for store in stores] == [20000] * 3
+    assert stores[0].lookup("S000042", "0042")["dbt_status"] == "Credited"
+    assert not glob.glob(str(tmp_path / "*.tmp"))
+
+
+def test_failed_load_keeps_the_old_database(tmp_path):
+    csv_path, db_path = tmp_path / "students.csv", str(tmp_path / "students.db")
+    write_csv(csv_path, 10)
+    load_csv(str(csv_path), db_path)
+    csv_path.write_text("student_id,ifsc_code\nS1,SBIN0000001\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_csv(str(csv_path), db_path)
+    assert len(status_store.StatusStore(db_path)) == 10
+    assert not glob.glob(str(tmp_path / "*.tmp"))
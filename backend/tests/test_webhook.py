@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import whatsapp_bot
+from work_queue import KeyedWorkQueue
+
+
+class RecordingQueue:
+    """Stands in for the webhook queue: keeps submitted messages instead of processing them"""
+
+    def __init__(self):
+        self.items = []
+        self.depth = 0
+        self.full = False
+
+    def submit(self, key, item):
+        if self.full:
+            return False
+        self.items.append((key, item))
+        return True
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = RecordingQueue()
+    monkeypatch.setattr(whatsapp_bot, "webhook_queue", queue)
+    return queue
+
+
+def payload(messages=(), statuses=()):
+    return {"entry": [{"changes": [{"value": {"messages": list(messages), "statuses": list(statuses)}}]}]}
+
+
+def test_malformed_items_do_not_fail_the_batch(queue):
+    client = TestClient(whatsapp_bot.app)
+    body = payload(
+        messages=["not a message", {"id": ["unhashable"], "from": "919000000001"},
+                  {"id": "wamid.ok-1", "from": "919000000002", "type": "text", "text": {"body": "hi"}}],
+        statuses=[42, {"id": "wamid.s-1", "status": "failed", "errors": ["boom"]}, {"id": "wamid.s-2", "status": "read"}],
+    )
+    response = client.post("/webhook", json=body)
+    assert response.status_code == 200
+    assert [key for key, _ in queue.items] == ["919000000002"]
+
+
+def test_malformed_entries_and_changes_are_skipped(queue):
+    client = TestClient(whatsapp_bot.app)
+    body = payload(messages=[{"id": "wamid.ok-2", "from": "919000000003", "type": "text", "text": {"body": "hi"}}])
+    body["entry"] = ["junk", {"changes": ["junk"]}] + body["entry"]
+    assert client.post("/webhook", json=body).status_code == 200
+    assert [key for key, _ in queue.items] == ["919000000003"]
+
+
+def test_health_does_not_count_sessions(monkeypatch):
+    counted = []
+    monkeypatch.setattr(type(whatsapp_bot.session_store), "__len__", lambda self: counted.append(1) or 0)
+    assert TestClient(whatsapp_bot.app).get("/health").status_code == 200
+    assert counted == []
+
+
+def test_statuses_are_recorded_once_the_delivery_is_accepted(queue, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(whatsapp_bot, "record_status", lambda status: recorded.append(status["id"]))
+    client = TestClient(whatsapp_bot.app)
+    body = payload(messages=[{"id": "wamid.busy-1", "from": "919000000004", "type": "text", "text": {"body": "hi"}}],
+                   statuses=[{"id": "wamid.s-3", "status": "delivered"}])
+
+    queue.full = True
+    assert client.post("/webhook", json=body).status_code == 503
+    assert recorded == []
+    # Meta redelivers the same payload
+    queue.full = False
+    assert client.post("/webhook", json=body).status_code == 200
+    assert recorded == ["wamid.s-3"]
+
+
+def test_unstarted_queue_is_a_server_error_not_bad_input(monkeypatch):
+    monkeypatch.setattr(whatsapp_bot, "webhook_queue", KeyedWorkQueue(whatsapp_bot.timed_process_message))
+    body = payload(messages=[{"id": "wamid.early-1", "from": "919000000005", "type": "text", "text": {"body": "hi"}}])
+    with pytest.raises(RuntimeError, match="before start"):
+        TestClient(whatsapp_bot.app).post("/webhook", json=body)
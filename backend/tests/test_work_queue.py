@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from work_queue import KeyedWorkQueue
+
+
+def test_slow_key_does_not_hold_up_other_keys():
+    async def scenario():
+        release = asyncio.Event()
+        done = []
+
+        async def handler(item):
+            key, n = item
+            if key == "slow":
+                await release.wait()
+            done.append(item)
+
+        # Two handler slots: the slow key holds one, every other key shares the other
+        queue = KeyedWorkQueue(handler, workers=2, max_depth=100)
+        queue.start()
+        queue.submit("slow", ("slow", 1))
+        for n in range(5):
+            for key in ("a", "b"):
+                queue.submit(key, (key, n))
+        await asyncio.sleep(0.05)
+        assert [item for item in done if item[0] == "a"] == [("a", n) for n in range(5)]
+        assert [item for item in done if item[0] == "b"] == [("b", n) for n in range(5)]
+        assert queue.stats()["active_keys"] == 1
+        release.set()
+        await queue.stop(drain=True)
+        return done
+
+    done = asyncio.run(scenario())
+    assert done[-1] == ("slow", 1)
+
+
+def test_depth_is_bounded_across_keys():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def handler(item):
+            await release.wait()
+
+        queue = KeyedWorkQueue(handler, workers=4, max_depth=3)
+        queue.start()
+        accepted = [queue.submit(f"key-{n}", n) for n in range(5)]
+        release.set()
+        await queue.stop(drain=True)
+        return accepted, queue.stats()
+
+    accepted, stats = asyncio.run(scenario())
+    assert accepted == [True, True, True, False, False]
+    assert (stats["processed"], stats["rejected"], stats["depth"], stats["active_keys"]) == (3, 2, 0, 0)
+
+
+def test_handler_errors_do_not_stop_the_chain():
+    async def scenario():
+        done = []
+
+        async def handler(item):
+            if item == 1:
+                raise ValueError("bad item")
+            done.append(item)
+
+        queue = KeyedWorkQueue(handler, workers=1)
+        queue.start()
+        for n in range(3):
+            queue.submit("sender", n)
+        await queue.stop(drain=True)
+        return done, queue.stats()["errors"]
+
+    assert asyncio.run(scenario()) == ([0, 2], 1)
+
+
+def test_submit_before_start_raises():
+    async def handler(item):
+        pass
+
+    with pytest.raises(RuntimeError, match="before start"):
+        KeyedWorkQueue(handler).submit("sender", 1)
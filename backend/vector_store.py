@@ -0,0 +1,165 @@
+"""
+On-disk vector index that worker processes memory-map instead of unpickling.
+
+The index is written with faiss.write_index and opened with the mmap IO flags, so
+the vectors / inverted lists live in the page cache and are shared by every
+uvicorn worker on the machine. Three layouts are supported:
+  - flat:  exact brute-force search (same results as dbt_index.pkl)
+  - ivf:   inverted file over k-means cells, sub-linear search
+  - ivfpq: inverted file with product-quantized codes, smallest on disk
+
+For the IVF layouts `nprobe` is the recall-vs-latency knob: more cells probed
+means higher recall and slower queries.
+
+Usage:
+    python vector_store.py --kind ivf    # convert dbt_index.pkl to dbt_index.faiss
+"""
+import os
+import json
+import math
+import pickle
+import argparse
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import faiss
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.getenv("RETRIEVAL_INDEX_PATH", os.path.join(BASE_DIR, "dbt_index.pkl"))
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", os.path.join(BASE_DIR, "dbt_index.faiss"))
+VECTOR_NPROBE = int(os.getenv("VECTOR_NPROBE", "8"))
+INDEX_KINDS = ("flat", "ivf", "ivfpq")
+
+
+# --- Sidecar Helpers ---
+def sidecar_paths(index_path: str) -> Dict[str, str]:
+    """Paths of the metadata files written alongside an index by build_index.py"""
+    stem, ext = os.path.splitext(index_path)
+    prefix = stem[:-len("_index")] if stem.endswith("_index") else stem
+    # The pickled and memory-mapped indexes can be rebuilt separately, so each keeps
+    # the chunks its vectors were built from (dbt_chunks.json / dbt_faiss_chunks.json)
+    kind = "_faiss" if ext == ".faiss" else ""
+    return {
+        "chunks": f"{prefix}{kind}_chunks.json",
+        "manifest": f"{prefix}_manifest.json",
+        "embeddings": f"{prefix}_embeddings.npy",
+    }
+
+
+def write_chunk_metadata(chunks: List[Dict[str, Any]], index_path: str) -> None:
+    """Write the chunk id -> text/source/offset sidecar for an index"""
+    path = sidecar_paths(index_path)["chunks"]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(chunks, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_chunk_metadata(index_path: str) -> Optional[List[Dict[str, Any]]]:
+    """Load the chunk id -> text/source/offset sidecar for an index, if present"""
+    path = sidecar_paths(index_path)["chunks"]
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_pickled(index_path: str = INDEX_PATH) -> Tuple[faiss.Index, Optional[List[str]]]:
+    """Load the legacy pickled IndexFlatL2 and its chunk texts, if stored with it"""
+    with open(index_path, "rb") as f:
+        stored = pickle.load(f)
+    if isinstance(stored, tuple):
+        return stored[0], list(stored[1])
+    return stored, None
+
+
+# --- Index Build / Open ---
+def build_index(vectors: np.ndarray, kind: str = "flat", nlist: Optional[int] = None, pq_m: int = 16) -> faiss.Index:
+    """Build a trained index of the given kind over the vectors"""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n, d = vectors.shape
+    if kind == "flat":
+        index = faiss.IndexFlatL2(d)
+        index.add(vectors)
+        return index
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind: {kind}")
+
+    # ~sqrt(n) cells is the usual starting point; never more cells than vectors
+    nlist = max(1, min(nlist or int(math.sqrt(n)), n))
+    quantizer = faiss.IndexFlatL2(d)
+    if kind == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, d, nlist)
+    else:
+        if d % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the vector dimension {d}")
+        # 8-bit codes need 256 training points per sub-quantizer; shrink for small corpora
+        nbits = max(1, min(8, int(math.log2(n))))
+        index = faiss.IndexIVFPQ(quantizer, d, nlist, pq_m, nbits)
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def write_index(index: faiss.Index, path: str = VECTOR_INDEX_PATH) -> None:
+    """Persist an index in faiss' native on-disk format"""
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def open_index(path: str = VECTOR_INDEX_PATH, nprobe: int = VECTOR_NPROBE) -> faiss.Index:
+    """Memory-map a persisted index read-only so workers share it via the page cache"""
+    with open(path, "rb") as f:
+        fourcc = f.read(4)
+    if fourcc.startswith(b"Iw"):
+        # IVF layouts: inverted lists are mapped as OnDiskInvertedLists
+        flags = faiss.IO_FLAG_MMAP
+    else:
+        # Flat codes are only mmap-able on faiss >= 1.8; older versions read into RAM
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    index = faiss.read_index(path, flags | faiss.IO_FLAG_READ_ONLY)
+    set_nprobe(index, nprobe)
+    return index
+
+
+def set_nprobe(index: faiss.Index, nprobe: int) -> None:
+    """Set how many IVF cells a query visits; no-op for flat indexes"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = max(1, min(nprobe, ivf.nlist))
+
+
+def convert(kind: str, output: str = VECTOR_INDEX_PATH, index_path: str = INDEX_PATH, nlist: Optional[int] = None) -> None:
+    """Convert the pickled index (and its chunk texts) to the mmap-able format"""
+    flat, texts = load_pickled(index_path)
+    if texts is None:
+        raise ValueError(f"{index_path} has no chunk texts to pair with the converted vectors")
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+
+    # The .faiss file holds vectors only; its sidecar gets the pickle's chunks (with
+    # source/offset if build_index.py's sidecar matches them)
+    chunks = load_chunk_metadata(index_path)
+    if not chunks or [chunk["text"] for chunk in chunks] != texts:
+        chunks = [{"id": i, "text": t, "source": None, "offset": None} for i, t in enumerate(texts)]
+    write_index(build_index(vectors, kind, nlist), output)
+    write_chunk_metadata(chunks, output)
+    logger.info(f"Wrote {kind} index with {len(vectors)} vectors to {output}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Convert dbt_index.pkl to a memory-mapped index")
+    parser.add_argument("--kind", choices=INDEX_KINDS, default="flat")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF cells (default: sqrt(n))")
+    parser.add_argument("--input", default=INDEX_PATH)
+    parser.add_argument("--output", default=VECTOR_INDEX_PATH)
+    args = parser.parse_args()
+    convert(args.kind, args.output, args.input, args.nlist)
+
+
+if __name__ == "__main__":
+    main()
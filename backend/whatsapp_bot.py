@@ -1,23 +1,45 @@
 import os
-import json
-import requests
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Any
 from dotenv import load_dotenv
 
+from knowledge import FAQ_DATA
+from graph_client import GraphClient
+from work_queue import KeyedWorkQueue
+from session_store import create_session_store
+from dedup import create_seen_index
+from payloads import PayloadTemplate
+from status_store import create_status_store
+from metrics import MetricsRegistry, MetricsMiddleware
+
 # --- Initial Setup ---
 load_dotenv()
 app = FastAPI()
 
+# Per-stage latency histograms and counters, scraped from /metrics (METRICS_ENABLED)
+metrics = MetricsRegistry("dbt_dost_bot")
+if metrics.enabled:
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
 # --- Load Credentials and Configuration ---
 ACCESS_TOKEN = os.getenv("WHATSAPP_ACCESS_TOKEN")
 PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
 VERIFY_TOKEN = os.getenv("WHATSAPP_VERIFY_TOKEN")
 LOGO_IMAGE_URL = "https://i.postimg.cc/J0wCNPRN/ad.jpg"
 
+# Shared outbound client: pooled connections, per-recipient ordering, retries
+graph_client = GraphClient(ACCESS_TOKEN, PHONE_NUMBER_ID)
+
 # --- Global Variables ---
-conversation_state: Dict[str, Dict[str, Any]] = {}
+# Pluggable, idle-expiring conversation state (see SESSION_BACKEND)
+session_store = create_session_store()
+# Indexed student status records, opened in the background at startup (None until then,
+# or if students.csv is unavailable)
+status_store = None
+status_task = None
 
 # --- Bot's Text Content (Bilingual) ---
 MESSAGES = {
@@ -27,6 +49,9 @@ MESSAGES = {
         'menu_button_2': "FAQ",
         'menu_button_3': "Help and Support",
         'check_status_msg': "To check your status, please visit the official Aadhaar website:\nhttps://tathya.uidai.gov.in/access/login?role=resident",
+        'status_prompt': "Please send your Student ID and the last 4 digits of your Aadhaar number, separated by a space.\nExample: 101 1234",
+        'status_result': "Status for Student ID {student_id}:\nDBT status: {dbt_status}\nAadhaar seeding: {seeding_status}\nBank IFSC: {ifsc_code}",
+        'status_not_found': "No record matches that Student ID and Aadhaar number.",
         'support_msg': "For help and support, please visit the official UIDAI FAQ page:\nhttps://uidai.gov.in/en/contact-support/have-any-question/308-english-uk/faqs/direct-benefit-transfer-dbt.html",
         'invalid_input': "Invalid input. Please send 'Hi' to see the main menu.",
         'continue_prompt': "Would you like to ask another question?",
@@ -39,6 +64,9 @@ MESSAGES = {
         'menu_button_2': "FAQ",
         'menu_button_3': "सहायता और समर्थन",
         'check_status_msg': "अपनी स्थिति की जांच करने के लिए, कृपया आधिकारिक आधार वेबसाइट पर जाएं:\nhttps://tathya.uidai.gov.in/access/login?role=resident",
+        'status_prompt': "कृपया अपनी छात्र आईडी और अपने आधार नंबर के अंतिम 4 अंक, बीच में एक स्पेस के साथ भेजें।\nउदाहरण: 101 1234",
+        'status_result': "छात्र आईडी {student_id} की स्थिति:\nडीबीटी स्थिति: {dbt_status}\nआधार सीडिंग: {seeding_status}\nबैंक IFSC: {ifsc_code}",
+        'status_not_found': "इस छात्र आईडी और आधार नंबर से कोई रिकॉर्ड मेल नहीं खाता।",
         'support_msg': "सहायता और समर्थन के लिए, कृपया आधिकारिक यूआईडीएआई FAQ पृष्ठ पर जाएं:\nhttps://uidai.gov.in/en/contact-support/have-any-question/308-english-uk/faqs/direct-benefit-transfer-dbt.html",
         'invalid_input': "अमान्य इनपुट। कृपया मुख्य मेनू देखने के लिए 'Hi' भेजें।",
         'continue_prompt': "क्या आप एक और प्रश्न पूछना चाहेंगे?",
@@ -47,98 +75,12 @@ MESSAGES = {
     }
 }
 
-# --- FAQ Data with Built-in Answers ---
-FAQ_DATA = {
-    "dbt": {
-        "title": "DBT Guidelines",
-        "questions": [
-            {
-                "question": "What is Direct Benefit Transfer?",
-                "answer": "Direct Benefit Transfer (DBT) is a major reform initiative launched by Government of India on 1 January 2013 to transfer benefits directly into the bank/postal accounts of beneficiaries. It aims to eliminate middlemen, reduce leakages, and ensure better delivery of government subsidies and welfare payments using modern Information and Communication Technology (ICT)."
-            },
-            {
-                "question": "How does DBT work?",
-                "answer": "DBT works by digitizing beneficiary databases and making payments directly to bank accounts through electronic transfer. For cash benefits, funds flow from Central Government to State Treasury via PFMS (Public Financial Management System) and then to individual beneficiary accounts. For in-kind benefits, distribution happens through PoS devices with authentication."
-            },
-            {
-                "question": "What are the transaction charges for DBT?",
-                "answer": "As per Government Order dated 26.02.2016:\n\n• Transaction charges: Rs. 0.50/- per transaction shared between sponsor banks, destination entities and NPCI\n• Cash out incentives: For MGNREGA, Maternity Benefits and Pension Schemes - Rs. 5/- fixed + Rs. 0.50/- per Rs. 100 (maximum Rs. 5/-) to promote last mile delivery"
-            },
-            {
-                "question": "How many schemes are under DBT?",
-                "answer": "As of April 2016, 66 schemes of 15 Ministries/Departments are reported to be on DBT. DBT is being implemented across the country, delivering benefits to more than 30 crore beneficiaries with over 100 crore DBT transactions completed."
-            },
-            {
-                "question": "Is Aadhaar mandatory for DBT?",
-                "answer": "At present, Aadhaar is not mandatory for availing DBT in any welfare schemes. DBT can be undertaken by digitizing beneficiary database and making payments directly to bank accounts. However, Aadhaar seeding in beneficiary database and bank accounts is highly desirable to achieve DBT objectives effectively and prevent leakages."
-            },
-            {
-                "question": "What is Aadhaar seeding?",
-                "answer": "Aadhaar seeding is done by updating Aadhaar number in the beneficiary database and linking the Aadhaar number with the bank account of the beneficiary in the Core Banking System (CBS). This helps in de-duplication, curbing leakages, and provides faster channels for welfare payments without middlemen."
-            }
-        ]
-    },
-    "nsp": {
-        "title": "NSP Scholarship",
-        "questions": [
-            {
-                "question": "What is the National Scholarship Portal?",
-                "answer": "National Scholarship Portal (NSP) is a one-stop IT solution launched on 1st July 2015 under 'Digital India'. It facilitates various services from student application, receipt, verification, processing, and disbursal of scholarships to students directly into their accounts through Direct Benefit Transfer (DBT). NSP is a Mission Mode Project providing a SMART system - Simplified, Mission-oriented, Accountable, Responsive and Transparent."
-            },
-            {
-                "question": "How do I apply for a scholarship on NSP?",
-                "answer": "To apply on NSP:\n\n1. Fresh Students: Register at https://scholarships.gov.in/ using 'New Registration'\n2. Provide accurate information as per documents\n3. Keep Aadhaar number, bank details, educational documents ready\n4. Submit application and get unique Application ID via SMS\n5. Login and change password on first login\n6. Submit documents to your Institute after online submission\n\nRenewal Students: Use previous year's Application ID and update marks obtained."
-            },
-            {
-                "question": "What is the workflow for NSP?",
-                "answer": "NSP follows a 7-step workflow:\n\n1. Student Registration and Application Submission\n2. Level 1 Verification at Institute Level\n3. Level 2/3 Verification at District/State/Ministry Level\n4. Beneficiary Records Creation and Account Validation by PFMS\n5. Applications Deduplication and Merit List Generation\n6. Payment File Generation and Financial Approval\n7. Scholarship Disbursement through DBT"
-            },
-            {
-                "question": "Who are the users of NSP?",
-                "answer": "Primary users of NSP include:\n\n• Students/Applicants (Fresh and Renewal)\n• Institute Nodal Officers\n• District/State/Ministry Nodal Officers\n• Scheme owner Ministries/Departments\n• Ministry of Electronics & Information Technology (MeitY)\n• Direct Benefit Transfer (DBT) Mission\n• National Informatics Center (NIC)\n• Help Desk support"
-            },
-            {
-                "question": "What are the steps for scholarship disbursement?",
-                "answer": "Scholarship disbursement steps:\n\n1. Applications verified at Institute and State/District levels\n2. Beneficiary records created and account validation by PFMS\n3. Deduplication process and merit list generation\n4. Payment file generation and financial approval\n5. Final disbursement through DBT directly to student's bank account\n\nNote: Priority is given to Aadhaar seeded bank accounts for disbursement."
-            },
-            {
-                "question": "What documents are required for NSP application?",
-                "answer": "Required documents for NSP:\n\n• Educational documents (certificates, mark sheets)\n• Aadhaar number (mandatory if available)\n• Bank passbook with photograph (PDF/JPEG, max 200KB)\n• Enrolment ID (if Aadhaar not available)\n• Bonafide student certificate from Institute\n• Category certificates (if applicable)\n• Income certificate\n• Any scheme-specific documents as per eligibility criteria"
-            }
-        ]
-    },
-    "aadhaar": {
-        "title": "Aadhaar Steps",
-        "questions": [
-            {
-                "question": "How do I link my Aadhaar to my bank account?",
-                "answer": "To link Aadhaar to your bank account:\n\n1. Visit your bank branch where you have the account\n2. Request bank officials to link your Aadhaar with your account\n3. Fill up the mandate and consent form of the bank\n4. Bank will verify your details and documents\n5. Bank officials will link Aadhaar number to your account in CBS\n6. Bank will also update NPCI mapper\n7. Once completed, your account becomes DBT enabled"
-            },
-            {
-                "question": "How can I check my bank seeding status?",
-                "answer": "You can check your bank seeding status from:\n\n• Official website: https://myaadhaar.uidai.gov.in/\n• NPCI website: https://base.npci.org.in/catalog/seedingRequestDetails\n\nNote: Information is fetched from National Payment Corporation of India (NPCI) server. UIDAI is not responsible for its correctness and does not store this information."
-            },
-            {
-                "question": "What is the process for Aadhaar seeding?",
-                "answer": "Aadhaar seeding process:\n\n1. Customer visits bank branch and submits duly filled consent form\n2. Bank officials verify details, documents and customer authenticity\n3. Bank accepts consent form and provides acknowledgement\n4. Branch links Aadhaar number to customer's account and NPCI mapper\n5. Once completed, Aadhaar number reflects in NPCI mapper\n6. Account becomes ready for DBT transactions\n\nCustomer can link only one account with Aadhaar at any point of time."
-            },
-            {
-                "question": "What do I do if my Aadhaar status is inactive?",
-                "answer": "If your Aadhaar status is inactive:\n\n1. Visit your respective bank branch in person\n2. Submit duly filled customer consent form\n3. Bank will reactivate your Aadhaar seeding status\n4. For pending subsidies, approach Oil Marketing Companies (OMCs)\n5. Contact OMCs through toll free number: 1800 2333 555\n6. OMCs will reinitiate failed transactions to your seeded bank account"
-            },
-            {
-                "question": "Who do I contact for grievance redressal?",
-                "answer": "For Aadhaar seeding grievances:\n\n1. First approach your bank's customer service cell\n2. Follow bank's escalation matrix if issue not resolved\n3. If Aadhaar not reflecting in NPCI mapper after submitting documents, contact bank only\n4. For NPCI related issues: Write to npci.dbtl@npci.org.in with Aadhaar consent acknowledgment copy from bank\n5. NPCI will coordinate with concerned bank teams for resolution"
-            },
-            {
-                "question": "How do I receive benefits in my bank account?",
-                "answer": "To receive DBT benefits in your bank account:\n\n1. Visit the bank branch where you have opened the account\n2. Request bank to link your Aadhaar with your account\n3. Fill up the mandate and consent form of the bank\n4. This account will be seeded with NPCI-mapper by the bank\n5. Account becomes DBT enabled for receiving government benefits\n6. All eligible scheme benefits will be directly transferred to this account\n\nEnsure your account remains active and functional to receive payments."
-            }
-        ]
-    }
-}
-
 # --- Helper Functions ---
+def update_session(sender_id: str, session: Dict[str, Any], **changes):
+    """Apply changes to a user's session and persist it"""
+    session.update(changes)
+    session_store.set(sender_id, session)
+
 def get_hardcoded_answer(category: str, question_index: int) -> str:
     """Get hardcoded answer for a specific question"""
     try:
@@ -146,34 +88,38 @@ def get_hardcoded_answer(category: str, question_index: int) -> str:
     except (KeyError, IndexError):
         return "Sorry, I couldn't find the answer to that question. Please contact support for assistance."
 
-def send_whatsapp_message(recipient_id: str, data: Dict[str, Any]):
+async def send_whatsapp_message(recipient_id: str, data: Dict[str, Any]):
     """Send message to WhatsApp user"""
-    url = f"https://graph.facebook.com/v18.0/{PHONE_NUMBER_ID}/messages"
-    headers = {
-        "Authorization": f"Bearer {ACCESS_TOKEN}", 
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "messaging_product": "whatsapp", 
-        "to": recipient_id, 
-        **data
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
+    with metrics.span("graph_send"):
+        sent = await graph_client.send(recipient_id, data)
+    if sent:
         print(f"Message sent successfully to {recipient_id}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending message to {recipient_id}: {e}")
+    else:
+        metrics.errors.labels("graph_send").inc()
+        print(f"Error sending message to {recipient_id}")
 
-def send_text_message(recipient_id: str, message_text: str):
+async def send_payload(recipient_id: str, template: PayloadTemplate):
+    """Send a precompiled message to WhatsApp user"""
+    with metrics.span("graph_send"):
+        sent = await graph_client.send_raw(recipient_id, template.render(recipient_id))
+    if sent:
+        print(f"Message sent successfully to {recipient_id}")
+    else:
+        metrics.errors.labels("graph_send").inc()
+        print(f"Error sending message to {recipient_id}")
+
+async def send_text_message(recipient_id: str, message_text: str):
     """Send simple text message"""
-    data = {"text": {"body": message_text}}
-    send_whatsapp_message(recipient_id, data)
+    await send_whatsapp_message(recipient_id, build_text(message_text))
 
-def send_language_selection(recipient_id: str):
-    """Send language selection menu"""
-    data = {
+# --- Message Payloads ---
+def build_text(message_text: str) -> Dict[str, Any]:
+    """Simple text message"""
+    return {"text": {"body": message_text}}
+
+def build_language_selection() -> Dict[str, Any]:
+    """Language selection menu"""
+    return {
         "type": "interactive",
         "interactive": {
             "type": "button",
@@ -187,12 +133,11 @@ def send_language_selection(recipient_id: str):
             }
         }
     }
-    send_whatsapp_message(recipient_id, data)
 
-def send_main_menu(recipient_id: str, lang: str):
-    """Send main menu options"""
+def build_main_menu(lang: str) -> Dict[str, Any]:
+    """Main menu options"""
     msg = MESSAGES.get(lang, MESSAGES['en'])
-    data = {
+    return {
         "type": "interactive",
         "interactive": {
             "type": "button",
@@ -207,12 +152,11 @@ def send_main_menu(recipient_id: str, lang: str):
             }
         }
     }
-    send_whatsapp_message(recipient_id, data)
 
-def send_continue_menu(recipient_id: str, lang: str):
-    """Send continue or exit menu after answering question"""
+def build_continue_menu(lang: str) -> Dict[str, Any]:
+    """Continue or exit menu after answering question"""
     msg = MESSAGES.get(lang, MESSAGES['en'])
-    data = {
+    return {
         "type": "interactive",
         "interactive": {
             "type": "button",
@@ -225,10 +169,9 @@ def send_continue_menu(recipient_id: str, lang: str):
             }
         }
     }
-    send_whatsapp_message(recipient_id, data)
 
-def send_faq_category_menu(recipient_id: str):
-    """Send FAQ category selection menu"""
+def build_faq_category_menu() -> Dict[str, Any]:
+    """FAQ category selection menu"""
     rows = []
     for key, value in FAQ_DATA.items():
         rows.append({
@@ -237,7 +180,7 @@ def send_faq_category_menu(recipient_id: str):
             "description": f"{len(value['questions'])} questions"
         })
     
-    data = {
+    return {
         "type": "interactive",
         "interactive": {
             "type": "list",
@@ -248,15 +191,10 @@ def send_faq_category_menu(recipient_id: str):
             }
         }
     }
-    send_whatsapp_message(recipient_id, data)
 
-def send_faq_question_menu(recipient_id: str, category: str):
-    """Send FAQ question selection menu for a specific category"""
-    category_data = FAQ_DATA.get(category)
-    if not category_data:
-        send_text_message(recipient_id, "Sorry, I couldn't find that category.")
-        return
-    
+def build_faq_question_menu(category: str) -> Dict[str, Any]:
+    """FAQ question selection menu for a specific category"""
+    category_data = FAQ_DATA[category]
     rows = []
     for i, item in enumerate(category_data["questions"]):
         question = item["question"]
@@ -275,7 +213,7 @@ def send_faq_question_menu(recipient_id: str, category: str):
         "description": "Return to topic selection"
     })
     
-    data = {
+    return {
         "type": "interactive",
         "interactive": {
             "type": "list",
@@ -286,7 +224,59 @@ def send_faq_question_menu(recipient_id: str, category: str):
             }
         }
     }
-    send_whatsapp_message(recipient_id, data)
+
+# Static per (language, menu, category): serialised once, recipient spliced in per send
+LANGUAGE_SELECTION_PAYLOAD = PayloadTemplate(build_language_selection())
+MAIN_MENU_PAYLOADS = {lang: PayloadTemplate(build_main_menu(lang)) for lang in MESSAGES}
+CONTINUE_MENU_PAYLOADS = {lang: PayloadTemplate(build_continue_menu(lang)) for lang in MESSAGES}
+FAQ_CATEGORY_MENU_PAYLOAD = PayloadTemplate(build_faq_category_menu())
+FAQ_QUESTION_MENU_PAYLOADS = {category: PayloadTemplate(build_faq_question_menu(category)) for category in FAQ_DATA}
+TEXT_PAYLOADS = {
+    lang: {key: PayloadTemplate(build_text(msg[key])) for key in ('check_status_msg', 'status_prompt', 'status_not_found', 'support_msg', 'invalid_input')}
+    for lang, msg in MESSAGES.items()
+}
+
+async def send_language_selection(recipient_id: str):
+    """Send language selection menu"""
+    await send_payload(recipient_id, LANGUAGE_SELECTION_PAYLOAD)
+
+async def send_main_menu(recipient_id: str, lang: str):
+    """Send main menu options"""
+    await send_payload(recipient_id, MAIN_MENU_PAYLOADS.get(lang, MAIN_MENU_PAYLOADS['en']))
+
+async def send_continue_menu(recipient_id: str, lang: str):
+    """Send continue or exit menu after answering question"""
+    await send_payload(recipient_id, CONTINUE_MENU_PAYLOADS.get(lang, CONTINUE_MENU_PAYLOADS['en']))
+
+async def send_faq_category_menu(recipient_id: str):
+    """Send FAQ category selection menu"""
+    await send_payload(recipient_id, FAQ_CATEGORY_MENU_PAYLOAD)
+
+async def send_faq_question_menu(recipient_id: str, category: str):
+    """Send FAQ question selection menu for a specific category"""
+    template = FAQ_QUESTION_MENU_PAYLOADS.get(category)
+    if template is None:
+        await send_text_message(recipient_id, "Sorry, I couldn't find that category.")
+        return
+    await send_payload(recipient_id, template)
+
+async def send_static_text(recipient_id: str, lang: str, key: str):
+    """Send one of the fixed per-language text replies"""
+    await send_payload(recipient_id, TEXT_PAYLOADS.get(lang, TEXT_PAYLOADS['en'])[key])
+
+async def send_status_result(recipient_id: str, lang: str, message_body: str) -> bool:
+    """Look up "<student_id> <aadhaar_last4>" and reply; False if the text is not in that format"""
+    parts = message_body.split()
+    if len(parts) != 2 or len(parts[1]) != 4 or not parts[1].isdigit():
+        return False
+    with metrics.span("status_lookup"):
+        record = await run_in_threadpool(status_store.lookup, parts[0], parts[1])
+    if record is None:
+        await send_static_text(recipient_id, lang, 'status_not_found')
+    else:
+        msg = MESSAGES.get(lang, MESSAGES['en'])
+        await send_text_message(recipient_id, msg['status_result'].format(**record))
+    return True
 
 # --- Webhook Endpoints ---
 @app.get("/webhook")
@@ -303,21 +293,14 @@ async def webhook_verify(request: Request):
     print("Webhook verification failed!")
     return PlainTextResponse("Failed validation.", status_code=403)
 
-@app.post("/webhook")
-async def webhook_handler(request: Request):
-    """Handle incoming WhatsApp messages"""
-    data = await request.json()
-    
+async def process_message(message_data: Dict[str, Any]):
+    """Handle one incoming WhatsApp message (runs on a webhook queue worker)"""
     try:
-        # Check if we have a message
-        if "messages" not in data["entry"][0]["changes"][0]["value"]:
-            return PlainTextResponse("OK", status_code=200)
-        
-        message_data = data["entry"][0]["changes"][0]["value"]["messages"][0]
         sender_id = message_data["from"]
         
         # Get or initialize user session
-        user_session = conversation_state.get(sender_id, {})
+        with metrics.span("session_lookup"):
+            user_session = session_store.get(sender_id)
         lang = user_session.get('lang', 'en')
         
         print(f"Processing message from {sender_id}: {message_data.get('type')}")
@@ -333,26 +316,30 @@ async def webhook_handler(request: Request):
                 if button_id.startswith("lang_"):
                     # Language selection
                     chosen_lang = button_id.split("_")[1]
-                    conversation_state[sender_id] = {'lang': chosen_lang, 'state': 'menu'}
-                    send_main_menu(sender_id, chosen_lang)
+                    update_session(sender_id, {}, lang=chosen_lang, state='menu')
+                    await send_main_menu(sender_id, chosen_lang)
                 
                 elif button_id == "menu_check_status":
-                    send_text_message(sender_id, MESSAGES[lang]['check_status_msg'])
+                    if status_store:
+                        update_session(sender_id, user_session, state='awaiting_status_query')
+                        await send_static_text(sender_id, lang, 'status_prompt')
+                    else:
+                        await send_static_text(sender_id, lang, 'check_status_msg')
                 
                 elif button_id == "menu_faq":
-                    conversation_state[sender_id]['state'] = 'awaiting_faq_category'
-                    send_faq_category_menu(sender_id)
+                    update_session(sender_id, user_session, state='awaiting_faq_category')
+                    await send_faq_category_menu(sender_id)
 
                 elif button_id == "menu_help_support":
-                    send_text_message(sender_id, MESSAGES[lang]['support_msg'])
+                    await send_static_text(sender_id, lang, 'support_msg')
                 
                 elif button_id == "continue_faq":
-                    conversation_state[sender_id]['state'] = 'awaiting_faq_category'
-                    send_faq_category_menu(sender_id)
+                    update_session(sender_id, user_session, state='awaiting_faq_category')
+                    await send_faq_category_menu(sender_id)
                 
                 elif button_id == "exit_faq":
-                    conversation_state[sender_id]['state'] = 'menu'
-                    send_main_menu(sender_id, lang)
+                    update_session(sender_id, user_session, state='menu')
+                    await send_main_menu(sender_id, lang)
 
             elif interaction_type == "list_reply":
                 list_reply_id = message_data["interactive"]["list_reply"]["id"]
@@ -361,14 +348,13 @@ async def webhook_handler(request: Request):
                 if list_reply_id.startswith("faq_cat_"):
                     # FAQ category selected
                     category_key = list_reply_id.replace("faq_cat_", "")
-                    conversation_state[sender_id]['state'] = 'awaiting_faq_question'
-                    conversation_state[sender_id]['current_category'] = category_key
-                    send_faq_question_menu(sender_id, category_key)
+                    update_session(sender_id, user_session, state='awaiting_faq_question', current_category=category_key)
+                    await send_faq_question_menu(sender_id, category_key)
                 
                 elif list_reply_id == "back_to_categories":
                     # Back to categories
-                    conversation_state[sender_id]['state'] = 'awaiting_faq_category'
-                    send_faq_category_menu(sender_id)
+                    update_session(sender_id, user_session, state='awaiting_faq_category')
+                    await send_faq_category_menu(sender_id)
                 
                 elif list_reply_id.startswith("faq_q_"):
                     # FAQ question selected
@@ -382,15 +368,15 @@ async def webhook_handler(request: Request):
                         print(f"Sending hardcoded answer for {category} question {q_index}")
                         
                         # Send the answer
-                        send_text_message(sender_id, answer)
+                        await send_text_message(sender_id, answer)
                         
                         # Ask if they want to continue
-                        conversation_state[sender_id]['state'] = 'awaiting_continue_or_exit'
-                        send_continue_menu(sender_id, lang)
+                        update_session(sender_id, user_session, state='awaiting_continue_or_exit')
+                        await send_continue_menu(sender_id, lang)
                         
                     except (IndexError, ValueError, KeyError) as e:
                         print(f"Error processing FAQ question: {e}")
-                        send_text_message(sender_id, "Sorry, I couldn't find the answer to that question.")
+                        await send_text_message(sender_id, "Sorry, I couldn't find the answer to that question.")
 
         # Handle text messages
         elif message_data.get("type") == "text":
@@ -400,27 +386,150 @@ async def webhook_handler(request: Request):
             # Check for greeting or menu commands
             if message_body in ['hi', 'hello', 'menu', 'start', 'नमस्ते', 'मेनू']:
                 if 'lang' in user_session:
-                    send_main_menu(sender_id, user_session['lang'])
+                    await send_main_menu(sender_id, user_session['lang'])
+                else:
+                    await send_language_selection(sender_id)
+            elif user_session.get('state') == 'awaiting_status_query' and status_store:
+                if await send_status_result(sender_id, lang, message_data["text"]["body"]):
+                    update_session(sender_id, user_session, state='menu')
+                    await send_main_menu(sender_id, lang)
                 else:
-                    send_language_selection(sender_id)
+                    await send_static_text(sender_id, lang, 'status_prompt')
             else:
                 # For any other text, show invalid input message
-                send_text_message(sender_id, MESSAGES[lang]['invalid_input'])
+                await send_static_text(sender_id, lang, 'invalid_input')
 
     except (KeyError, IndexError, TypeError) as e:
+        metrics.errors.labels("process").inc()
         print(f"Error processing webhook data: {e}")
         pass
     except Exception as e:
+        metrics.errors.labels("process").inc()
         print(f"Unexpected error in webhook handler: {e}")
         pass
+
+async def timed_process_message(message_data: Dict[str, Any]):
+    """process_message, timed as the 'process' stage"""
+    with metrics.span("process"):
+        await process_message(message_data)
+
+# Messages are processed off the request path; per-sender order is preserved
+webhook_queue = KeyedWorkQueue(timed_process_message)
+seen_messages = create_seen_index()
+webhook_messages = metrics.counter("webhook_messages_total", "Incoming messages by outcome (queued, duplicate, rejected, malformed)", ["outcome"])
+webhook_statuses = metrics.counter("webhook_statuses_total", "Delivery receipts by status (sent, delivered, read, failed, malformed)", ["status"])
+metrics.gauge("webhook_queue_depth", "Messages waiting for a webhook worker").set_function(lambda: webhook_queue.depth)
+# Counted at scrape time only, not on every liveness probe: for redis this is a keyspace SCAN
+metrics.gauge("sessions", "Conversation sessions in the session store").set_function(lambda: len(session_store))
+
+def iter_webhook_values(data: Dict[str, Any]):
+    """Every change value in a webhook payload; Meta batches several entries and changes under load"""
+    for entry in data.get("entry") or []:
+        if not isinstance(entry, dict):
+            continue
+        for change in entry.get("changes") or []:
+            value = change.get("value") if isinstance(change, dict) else None
+            if isinstance(value, dict):
+                yield value
+
+def record_status(status: Dict[str, Any]):
+    """Delivery receipt for an outbound message (sent, delivered, read or failed)"""
+    state = str(status.get("status", "unknown"))
+    webhook_statuses.labels(state).inc()
+    if state == "failed":
+        errors = status.get("errors") or [{}]
+        print(f"Message {status.get('id')} to {status.get('recipient_id')} failed: {errors[0].get('title', errors[0])}")
+
+@app.post("/webhook")
+async def webhook_handler(request: Request):
+    """Acknowledge WhatsApp webhooks immediately and queue every message in them for processing"""
+    try:
+        with metrics.span("parse"):
+            data = await request.json()
+            values = list(iter_webhook_values(data))
+    except (ValueError, AttributeError, TypeError) as e:
+        print(f"Error processing webhook data: {e}")
+        return PlainTextResponse("OK", status_code=200)
+    
+    # One malformed item is skipped on its own; it must not fail the rest of the batch
+    for value in values:
+        # Messages are queued in payload order; the queue keeps each sender's messages in
+        # order and runs different senders concurrently
+        for message_data in value.get("messages") or []:
+            if not isinstance(message_data, dict):
+                webhook_messages.labels("malformed").inc()
+                continue
+            try:
+                message_id = message_data.get("id")
+                # Meta redelivers on slow acks; a message id is only ever processed once
+                if message_id and seen_messages.check_and_add(message_id):
+                    webhook_messages.labels("duplicate").inc()
+                    continue
+                queued = webhook_queue.submit(str(message_data.get("from", "")), message_data)
+            except (TypeError, ValueError, AttributeError) as e:
+                # Bad ids or senders only: anything else (a queue that was never started,
+                # an unreachable dedup store) is a server fault and must surface as one
+                webhook_messages.labels("malformed").inc()
+                print(f"Error queueing webhook message: {e}")
+                continue
+            
+            if not queued:
+                # Backpressure: ask Meta to redeliver the payload later rather than timing out.
+                # Nothing after this message is queued, so no sender's messages get reordered;
+                # the ones already queued are dropped as duplicates on redelivery.
+                if message_id:
+                    seen_messages.discard(message_id)
+                webhook_messages.labels("rejected").inc()
+                print(f"Webhook queue full ({webhook_queue.depth} queued); rejecting delivery")
+                return PlainTextResponse("Busy", status_code=503)
+            
+            webhook_messages.labels("queued").inc()
+    
+    # Receipts are recorded only once the whole delivery is accepted: after a 503 Meta
+    # redelivers the payload, receipts included, and they would be counted twice
+    for value in values:
+        for status in value.get("statuses") or []:
+            if not isinstance(status, dict):
+                webhook_statuses.labels("malformed").inc()
+                continue
+            try:
+                record_status(status)
+            except Exception as e:
+                print(f"Error recording delivery status: {e}")
     
     return PlainTextResponse("OK", status_code=200)
 
+async def load_status_store():
+    """Open the status store, building it from the CSV if needed, off the event loop"""
+    global status_store
+    status_store = await run_in_threadpool(create_status_store)
+
+@app.on_event("startup")
+async def start_webhook_workers():
+    """Start the background workers that drain the webhook queue, and the status store load"""
+    global status_task
+    webhook_queue.start()
+    # Not awaited: loading a large CSV must not hold up startup; status checks are
+    # offered once the store is open
+    status_task = asyncio.create_task(load_status_store())
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Finish queued messages, then close pooled outbound connections"""
+    await webhook_queue.stop(drain=True)
+    await graph_client.close()
+
+# --- Metrics Endpoint ---
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of webhook, stage and send metrics"""
+    return metrics.response()
+
 # --- Health Check Endpoint ---
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "simple-whatsapp-bot"}
+    return {"status": "healthy", "service": "simple-whatsapp-bot", "webhook_queue": webhook_queue.stats(), "dedup": seen_messages.stats(), "status_records": len(status_store) if status_store else 0}
 
 if __name__ == "__main__":
     import uvicorn
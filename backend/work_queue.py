@@ -0,0 +1,122 @@
+"""
+Bounded, keyed background work queue.
+
+Every key (e.g. one WhatsApp sender) with work waiting gets its own chain: a task that
+processes that key's items one at a time, in submission order, and ends when the
+key has nothing left. Keys never share a chain, so a sender whose messages are slow
+to handle only delays its own later messages. At most `workers` handlers run at once
+across all keys, and at most `max_depth` items wait in total; submit() never blocks
+and returns False when the queue is full, so callers can push back (e.g. answer 503
+and let the sender retry) instead of stalling.
+"""
+import os
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "16"))
+WEBHOOK_QUEUE_MAX_DEPTH = int(os.getenv("WEBHOOK_QUEUE_MAX_DEPTH", "10000"))
+
+
+class KeyedWorkQueue:
+    """Per-key ordered processing with a global concurrency and depth bound"""
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        workers: int = WEBHOOK_WORKERS,
+        max_depth: int = WEBHOOK_QUEUE_MAX_DEPTH,
+    ):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        # key -> items not yet finished (the head is being handled) and the task draining them
+        self._pending: Dict[str, Deque[Any]] = {}
+        self._chains: Dict[str, asyncio.Task] = {}
+        self._depth = 0
+        self._slots: asyncio.Semaphore = None
+        self._idle: asyncio.Event = None
+        self.enqueued = 0
+        self.processed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.max_depth_seen = 0
+
+    def start(self) -> None:
+        if self._slots is not None:
+            return
+        self._slots = asyncio.Semaphore(self.workers)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        logger.info(f"Queue started ({self.workers} concurrent handlers, max depth {self.max_depth})")
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop processing, optionally after the queued items are processed"""
+        if self._slots is None:
+            return
+        if drain:
+            await self._idle.wait()
+        chains = list(self._chains.values())
+        for task in chains:
+            task.cancel()
+        await asyncio.gather(*chains, return_exceptions=True)
+        self._slots = None
+
+    def submit(self, key: str, item: Any) -> bool:
+        """Enqueue an item without blocking; False means the queue is full"""
+        if self._slots is None:
+            raise RuntimeError("KeyedWorkQueue.submit() called before start()")
+        if self._depth >= self.max_depth:
+            self.rejected += 1
+            return False
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = deque()
+            self._chains[key] = asyncio.create_task(self._run_chain(key, pending))
+            self._idle.clear()
+        pending.append(item)
+        self._depth += 1
+        self.enqueued += 1
+        self.max_depth_seen = max(self.max_depth_seen, self._depth)
+        return True
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    async def _run_chain(self, key: str, pending: Deque[Any]) -> None:
+        """Handle one key's items in order until it has none left"""
+        try:
+            while pending:
+                async with self._slots:
+                    try:
+                        await self.handler(pending[0])
+                        self.processed += 1
+                    except Exception as e:
+                        self.errors += 1
+                        logger.exception(f"Error processing queued item: {e}")
+                pending.popleft()
+                self._depth -= 1
+        finally:
+            # No await between the emptiness check and here, so no item can be left behind
+            self._depth -= len(pending)
+            del self._pending[key]
+            del self._chains[key]
+            if not self._chains:
+                self._idle.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "active_keys": len(self._chains),
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "max_depth_seen": self.max_depth_seen,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
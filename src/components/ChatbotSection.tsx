@@ -32,7 +32,7 @@ const API_BASE =
   // Fallback for local dev
   "http://localhost:8000";
 
-const API_URL = `${API_BASE}/chat`;
+const STREAM_URL = `${API_BASE}/chat/stream`;
 
 const defaultMessage =
   "मैं केवल Aadhaar और DBT related questions में help कर सकता हूं। कृपया DBT, Aadhaar linking, NSP scholarships, या bank seeding के बारे में पूछें। अन्य queries के लिए relevant government helpline contact करें।";
@@ -50,6 +50,7 @@ export const ChatbotSection = () => {
   ]);
   const [inputMessage, setInputMessage] = useState("");
   const [isTyping, setIsTyping] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const { language, t } = useLanguage();
@@ -65,7 +66,7 @@ export const ChatbotSection = () => {
     scrollToBottom();
   }, [messages]);
 
-  // Cleanup on unmount: abort any pending fetch
+  // Refresh the welcome message when the language changes
   useEffect(() => {
     setMessages(prev =>
       prev[0]?.sender === "bot"
@@ -76,34 +77,67 @@ export const ChatbotSection = () => {
   }, [language]);
 
 
-  // 1) Make generateResponse async to call backend (with abortable fetch)
-  const generateResponse = async (userMessage: string): Promise<string> => {
+  // Abort any in-flight stream when the chatbot unmounts
+  useEffect(() => () => abortRef.current?.abort(), []);
+
+  // 1) Stream the answer from the backend, reporting the text received so far via onText
+  const streamResponse = async (userMessage: string, onText: (text: string) => void): Promise<void> => {
+    abortRef.current?.abort();
+    const controller = new AbortController();
+    abortRef.current = controller;
+
     try {
-      const res = await fetch("http://localhost:8000/chat", {
+      const res = await fetch(STREAM_URL, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ message: userMessage, language }),
+        signal: controller.signal,
       });
-      if (!res.ok) {
-        return language === "hi"
+      if (!res.ok || !res.body) {
+        onText(language === "hi"
           ? "सर्वर त्रुटि. कृपया थोड़ी देर बाद पुनः प्रयास करें."
-          : "Server error. Please try again later.";
+          : "Server error. Please try again later.");
+        return;
+      }
+
+      // NDJSON: one {"type": "token"} line per chunk, then a final {"type": "done"} line
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let answer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.type === "token") {
+            answer += event.text;
+            onText(answer);
+          } else if (event.type === "done" && !event.success && !answer && event.answer) {
+            answer = event.answer;
+            onText(answer);
+          }
+        }
+      }
+      if (!answer) {
+        onText(language === "hi" ? "कोई उत्तर उपलब्ध नहीं है।" : "No answer available.");
       }
-      const data = await res.json();
-      return data.answer ?? (language === "hi"
-        ? "कोई उत्तर उपलब्ध नहीं है।"
-        : "No answer available.");
     } catch (e) {
-      return language === "hi"
+      if (controller.signal.aborted) return;
+      onText(language === "hi"
         ? "नेटवर्क त्रुटि। कृपया थोड़ी देर बाद पुनः प्रयास करें।"
-        : "Network error. Please try again.";
+        : "Network error. Please try again.");
     }
   };
 
 
-  // 2) Update handleSendMessage to await the backend
+  // 2) Update handleSendMessage to render the bot message as tokens arrive
   const handleSendMessage = async () => {
-    if (!inputMessage.trim() || isTyping) return;
+    if (!inputMessage.trim() || isTyping || isStreaming) return;
 
     const userMessage: Message = {
       id: Date.now().toString(),
@@ -116,18 +150,21 @@ export const ChatbotSection = () => {
     const toSend = inputMessage; // snapshot
     setInputMessage("");
     setIsTyping(true);
+    setIsStreaming(true);
 
-    const botText = await generateResponse(toSend);
-
-    const botResponse: Message = {
-      id: (Date.now() + 1).toString(),
-      text: botText,
-      sender: 'bot',
-      timestamp: new Date()
-    };
+    const botId = (Date.now() + 1).toString();
+    await streamResponse(toSend, (text) => {
+      // First chunk replaces the typing indicator with the (growing) bot message
+      setIsTyping(false);
+      setMessages(prev =>
+        prev.some(m => m.id === botId)
+          ? prev.map(m => (m.id === botId ? { ...m, text } : m))
+          : [...prev, { id: botId, text, sender: 'bot', timestamp: new Date() }]
+      );
+    });
 
-    setMessages(prev => [...prev, botResponse]);
     setIsTyping(false);
+    setIsStreaming(false);
   };
 
   // Use onKeyDown instead of deprecated onKeyPress
@@ -226,11 +263,11 @@ export const ChatbotSection = () => {
                     onKeyDown={handleKeyDown}
                     placeholder={t("chatbot.placeholder")}
                     className="flex-1"
-                    disabled={isTyping}
+                    disabled={isTyping || isStreaming}
                   />
                   <Button
                     onClick={handleSendMessage}
-                    disabled={!inputMessage.trim() || isTyping}
+                    disabled={!inputMessage.trim() || isTyping || isStreaming}
                     size="sm"
                   >
                     <Send className="w-4 h-4" />
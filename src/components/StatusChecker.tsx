@@ -6,11 +6,27 @@ import { AudioButton } from "./AudioButton";
 import { useLanguage } from "@/contexts/LanguageContext";
 import { CheckCircle, XCircle, Loader2, ArrowRight, ExternalLink } from "lucide-react";
 
+// Env-configurable API base (Vite/Next/Default localhost)
+const API_BASE =
+  (import.meta as any)?.env?.VITE_API_BASE ||
+  (typeof process !== "undefined" ? (process as any)?.env?.NEXT_PUBLIC_API_BASE : undefined) ||
+  "http://localhost:8000";
+
+interface StatusRecord {
+  student_id: string;
+  aadhaar_last4: string;
+  ifsc_code: string;
+  dbt_status: string;
+  seeding_status: string;
+}
+
 export const StatusChecker = () => {
   const { t } = useLanguage();
+  const [studentId, setStudentId] = useState("");
   const [aadhaarNumber, setAadhaarNumber] = useState("");
   const [isChecking, setIsChecking] = useState(false);
-  const [checkResult, setCheckResult] = useState<'success' | 'failure' | null>(null);
+  const [checkResult, setCheckResult] = useState<'success' | 'failure' | 'notfound' | 'error' | null>(null);
+  const [record, setRecord] = useState<StatusRecord | null>(null);
   const [step2Unlocked, setStep2Unlocked] = useState(false);
 
   const formatAadhaar = (value: string) => {
@@ -24,31 +40,46 @@ export const StatusChecker = () => {
     setAadhaarNumber(formatted);
   };
 
-  const handleCheck = () => {
+  const handleCheck = async () => {
     const cleanNumber = aadhaarNumber.replace(/\s/g, '');
     
-    if (cleanNumber.length !== 12) {
+    if (cleanNumber.length !== 12 || !studentId.trim()) {
       alert(t('checker.step1.note'));
       return;
     }
 
     setIsChecking(true);
     setCheckResult(null);
+    setRecord(null);
 
-    // Simulate API call with random result
-    setTimeout(() => {
-      const isSuccess = Math.random() > 0.3; // 70% success rate
-      setCheckResult(isSuccess ? 'success' : 'failure');
-      setIsChecking(false);
+    // Only the last 4 Aadhaar digits leave the browser
+    const params = new URLSearchParams({ student_id: studentId.trim(), aadhaar_last4: cleanNumber.slice(-4) });
+    try {
+      const res = await fetch(`${API_BASE}/status?${params}`);
+      if (res.status === 404) {
+        setCheckResult('notfound');
+        return;
+      }
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+
+      const data: StatusRecord = await res.json();
+      const isReady = data.seeding_status === 'Completed';
+      setRecord(data);
+      setCheckResult(isReady ? 'success' : 'failure');
       
-      if (isSuccess) {
+      if (isReady) {
         setStep2Unlocked(true);
         // Scroll to result
         setTimeout(() => {
           document.getElementById('check-result')?.scrollIntoView({ behavior: 'smooth' });
         }, 100);
       }
-    }, 2500);
+    } catch (error) {
+      console.error('Status check failed:', error);
+      setCheckResult('error');
+    } finally {
+      setIsChecking(false);
+    }
   };
 
   const openNSPPortal = () => {
@@ -83,6 +114,18 @@ export const StatusChecker = () => {
             </CardHeader>
             <CardContent className="space-y-6">
               <div className="space-y-4">
+                <label className="text-sm font-medium">
+                  {t('checker.step1.studentId')}:
+                  <AudioButton text={t('checker.step1.studentId')} />
+                </label>
+                <Input
+                  type="text"
+                  placeholder={t('checker.step1.studentIdPlaceholder')}
+                  value={studentId}
+                  onChange={(e) => setStudentId(e.target.value)}
+                  className="text-lg p-4"
+                  maxLength={32}
+                />
                 <label className="text-sm font-medium">
                   {t('checker.step1.subtitle')}:
                   <AudioButton text={t('checker.step1.subtitle')} />
@@ -103,7 +146,7 @@ export const StatusChecker = () => {
 
               <Button 
                 onClick={handleCheck}
-                disabled={isChecking || aadhaarNumber.replace(/\s/g, '').length !== 12}
+                disabled={isChecking || !studentId.trim() || aadhaarNumber.replace(/\s/g, '').length !== 12}
                 className="w-full text-lg p-4"
                 size="lg"
               >
@@ -132,11 +175,16 @@ export const StatusChecker = () => {
                     <div className="bg-destructive/10 border border-destructive/20 rounded-lg p-4 text-center">
                       <XCircle className="w-8 h-8 text-destructive mx-auto mb-2" />
                       <p className="font-semibold text-destructive">
-                        {t('checker.step1.failure')}
-                        <AudioButton text={t('checker.step1.failure')} />
+                        {t(`checker.step1.${checkResult}`)}
+                        <AudioButton text={t(`checker.step1.${checkResult}`)} />
                       </p>
                     </div>
                   )}
+                  {record && (
+                    <p className="text-sm text-muted-foreground text-center mt-2">
+                      DBT: {record.dbt_status} · {t('checker.step1.seeding')}: {record.seeding_status} · IFSC: {record.ifsc_code}
+                    </p>
+                  )}
                 </div>
               )}
             </CardContent>
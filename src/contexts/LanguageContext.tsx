@@ -43,7 +43,12 @@ const translations = {
     'checker.step1.title': 'अपना बैंक तैयार है?',
     'checker.step1.subtitle': 'आधार नंबर डालें',
     'checker.step1.placeholder': '1234 5678 9012',
-    'checker.step1.note': 'यह एक सिमुलेशन है - वास्तविक DBT चेक नहीं है',
+    'checker.step1.note': 'जांच के लिए केवल आपके आधार के अंतिम 4 अंक भेजे जाते हैं',
+    'checker.step1.studentId': 'छात्र आईडी डालें',
+    'checker.step1.studentIdPlaceholder': '101',
+    'checker.step1.seeding': 'आधार सीडिंग',
+    'checker.step1.notfound': 'इस छात्र आईडी और आधार नंबर का कोई रिकॉर्ड नहीं मिला',
+    'checker.step1.error': 'अभी स्थिति की जांच नहीं हो सकी। कृपया फिर से प्रयास करें।',
     'checker.step1.button': 'चेक करें',
     'checker.step1.checking': 'जांच रहे हैं...',
     'checker.step1.success': 'बधाई हो! आपका बैंक DBT के लिए तैयार है!',
@@ -139,7 +144,12 @@ const translations = {
     'checker.step1.title': 'Is Your Bank Ready?',
     'checker.step1.subtitle': 'Enter Aadhaar Number',
     'checker.step1.placeholder': '1234 5678 9012',
-    'checker.step1.note': 'This is a simulation - not actual DBT check',
+    'checker.step1.note': 'Only the last 4 digits of your Aadhaar are sent for the check',
+    'checker.step1.studentId': 'Enter Student ID',
+    'checker.step1.studentIdPlaceholder': '101',
+    'checker.step1.seeding': 'Aadhaar seeding',
+    'checker.step1.notfound': 'No record found for this Student ID and Aadhaar number',
+    'checker.step1.error': 'Could not check your status right now. Please try again.',
     'checker.step1.button': 'Check Now',
     'checker.step1.checking': 'Checking...',
     'checker.step1.success': 'Congratulations! Your bank is ready for DBT!',